@@ -61,20 +61,23 @@ class BayesianEstimator(ParameterEstimator):
         <TabularCPD representing P(A:2) at 0x7f7b4dfd4fd0>,
         <TabularCPD representing P(D:2 | C:2) at 0x7f7b4df822b0>]
         """
-        parameters = []
-
-        for node in self.model.nodes():
-            _equivalent_sample_size = equivalent_sample_size[node] if isinstance(equivalent_sample_size, dict) else \
-                                      equivalent_sample_size
-            _pseudo_counts = pseudo_counts[node] if pseudo_counts else None
-
-            cpd = self.estimate_cpd(node,
-                                    prior_type=prior_type,
-                                    equivalent_sample_size=_equivalent_sample_size,
-                                    pseudo_counts=_pseudo_counts)
-            parameters.append(cpd)
-
-        return parameters
+        nodes = sorted(self.model.nodes())
+        families = [[node] + sorted(self.model.get_parents(node)) for node in nodes]
+
+        # the counts of all families are computed with a single scan over the encoded data,
+        # and all CPDs are normalized at once after adding the pseudo counts
+        bayesian_counts = []
+        for family, counts in zip(families, self._joint_state_counts_many(families)):
+            node = family[0]
+            prior = self._pseudo_counts(
+                node, family[1:], prior_type,
+                pseudo_counts=pseudo_counts[node] if pseudo_counts else None,
+                equivalent_sample_size=(equivalent_sample_size[node] if isinstance(equivalent_sample_size, dict)
+                                        else equivalent_sample_size))
+            bayesian_counts.append(counts.reshape(prior.shape) + prior)
+
+        return [self._cpd(family[0], family[1:], values)
+                for family, values in zip(families, _normalize_columns(bayesian_counts))]
 
     def estimate_cpd(self, node, prior_type='BDeu', pseudo_counts=[], equivalent_sample_size=5):
         """
@@ -125,30 +128,57 @@ class BayesianEstimator(ParameterEstimator):
         ╘══════╧══════╧══════╧══════╧════════════════════╛
         """
 
-        node_cardinality = len(self.state_names[node])
         parents = sorted(self.model.get_parents(node))
-        parents_cardinalities = [len(self.state_names[parent]) for parent in parents]
-        cpd_shape = (node_cardinality, np.prod(parents_cardinalities, dtype=int))
+        prior = self._pseudo_counts(node, parents, prior_type, pseudo_counts, equivalent_sample_size)
+        counts = self._joint_state_counts([node] + parents)
+
+        values, = _normalize_columns([counts.reshape(prior.shape) + prior])
+        return self._cpd(node, parents, values)
+
+    def _pseudo_counts(self, node, parents, prior_type, pseudo_counts, equivalent_sample_size):
+        """
+        Returns the array of pseudo counts of the prior for the CPD of `node` given `parents`,
+        with shape (node_card, product of parents_card).
+        """
+        node_cardinality = len(self.state_names[node])
+        cpd_shape = (node_cardinality, int(np.prod([len(self.state_names[parent]) for parent in parents])))
 
         if prior_type == 'K2':
-            pseudo_counts = np.ones(cpd_shape, dtype=int)
+            return np.ones(cpd_shape)
         elif prior_type == 'BDeu':
-            alpha = float(equivalent_sample_size) / (node_cardinality * np.prod(parents_cardinalities))
-            pseudo_counts = np.ones(cpd_shape, dtype=float) * alpha
+            return np.full(cpd_shape, float(equivalent_sample_size) / (cpd_shape[0] * cpd_shape[1]))
         elif prior_type == 'dirichlet':
-            pseudo_counts = np.array(pseudo_counts)
+            pseudo_counts = np.asarray(pseudo_counts, dtype=float)
             if pseudo_counts.shape != cpd_shape:
                 raise ValueError("The shape of pseudo_counts must be: {shape}".format(
                    shape=str(cpd_shape)))
+            return pseudo_counts
         else:
             raise ValueError("'prior_type' not specified")
 
-        state_counts = self.state_counts(node)
-        bayesian_counts = state_counts + pseudo_counts
-
-        cpd = TabularCPD(node, node_cardinality, np.array(bayesian_counts),
-                         evidence=parents,
-                         evidence_card=parents_cardinalities,
-                         state_names=self.state_names)
-        cpd.normalize()
-        return cpd
+    def _cpd(self, node, parents, values):
+        "Returns the TabularCPD of `node` given `parents` with the (normalized) `values`."
+        return TabularCPD(node, len(self.state_names[node]), values,
+                          evidence=parents,
+                          evidence_card=[len(self.state_names[parent]) for parent in parents],
+                          state_names=self.state_names)
+
+
+def _normalize_columns(arrays):
+    """
+    Normalizes the columns of all 2-D `arrays` at once, by summing the columns of the
+    concatenated arrays with `np.add.reduceat`. Returns a list of the normalized arrays.
+    """
+    if not arrays:
+        return []
+    flat = np.concatenate([array.T.ravel() for array in arrays])
+    sizes = [array.size for array in arrays]
+    offsets = np.cumsum([0] + sizes)
+    column_starts = np.concatenate([offset + np.arange(0, size, array.shape[0])
+                                    for offset, size, array in zip(offsets, sizes, arrays)])
+    column_lengths = np.concatenate([np.full(array.shape[1], array.shape[0], dtype=int) for array in arrays])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        flat = flat / np.repeat(np.add.reduceat(flat, column_starts), column_lengths)
+    return [flat[offset:offset + array.size].reshape(array.shape[1], array.shape[0]).T
+            for offset, array in zip(offsets, arrays)]
@@ -1,5 +1,7 @@
 #!/usr/bin/env python
-from math import lgamma
+from __future__ import division
+
+from scipy.special import gammaln
 
 from pgmpy.estimators import StructureScore
 
@@ -14,7 +16,7 @@ class BdeuScore(StructureScore):
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -44,25 +46,28 @@ class BdeuScore(StructureScore):
         self.equivalent_sample_size = equivalent_sample_size
         super(BdeuScore, self).__init__(data, **kwargs)
 
+    def _score_parameters(self):
+        parameters = super(BdeuScore, self)._score_parameters()
+        parameters['equivalent_sample_size'] = self.equivalent_sample_size
+        return parameters
+
     def local_score(self, variable, parents):
         "Computes a score that measures how much a \
         given variable is \"influenced\" by a given list of potential parents."
 
-        var_states = self.state_names[variable]
-        var_cardinality = len(var_states)
-        state_counts = self.state_counts(variable, parents)
-        num_parents_states = float(len(state_counts.columns))
+        return self.local_scores(variable, [parents])[0]
+
+    def local_scores(self, variable, parents_list):
+        "Computes the local score of `variable` for each parent set in `parents_list`."
 
-        score = 0
-        for parents_state in state_counts:  # iterate over df columns (only 1 if no parents)
-            conditional_sample_size = sum(state_counts[parents_state])
+        var_cardinality = len(self.state_names[variable])
+        state_counts, parent_set, num_parents_states = self._stacked_state_counts(variable, parents_list)
+        conditional_sample_size = state_counts.sum(axis=0)
 
-            score += (lgamma(self.equivalent_sample_size / num_parents_states) -
-                      lgamma(conditional_sample_size + self.equivalent_sample_size / num_parents_states))
+        # pseudo counts for each parents' state configuration (only 1 if no parents)
+        alpha = self.equivalent_sample_size / num_parents_states[parent_set]
+        beta = alpha / var_cardinality
 
-            for state in var_states:
-                if state_counts[parents_state][state] > 0:
-                    score += (lgamma(state_counts[parents_state][state] +
-                                     self.equivalent_sample_size / (num_parents_states * var_cardinality)) -
-                              lgamma(self.equivalent_sample_size / (num_parents_states * var_cardinality)))
-        return score
+        scores = (gammaln(alpha) - gammaln(conditional_sample_size + alpha) +
+                  (gammaln(state_counts + beta) - gammaln(beta)).sum(axis=0))
+        return self._sum_by_parent_set(parent_set, scores, len(parents_list))
@@ -2,6 +2,8 @@
 
 from math import log
 
+from scipy.special import xlogy
+
 from pgmpy.estimators import StructureScore
 
 
@@ -15,7 +17,7 @@ class BicScore(StructureScore):
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -44,21 +46,21 @@ class BicScore(StructureScore):
         "Computes a score that measures how much a \
         given variable is \"influenced\" by a given list of potential parents."
 
-        var_states = self.state_names[variable]
-        var_cardinality = len(var_states)
-        state_counts = self.state_counts(variable, parents)
-        sample_size = len(self.data)
-        num_parents_states = float(len(state_counts.columns))
+        return self.local_scores(variable, [parents])[0]
 
-        score = 0
-        for parents_state in state_counts:  # iterate over df columns (only 1 if no parents)
-            conditional_sample_size = sum(state_counts[parents_state])
+    def local_scores(self, variable, parents_list):
+        "Computes the local score of `variable` for each parent set in `parents_list`."
 
-            for state in var_states:
-                if state_counts[parents_state][state] > 0:
-                    score += state_counts[parents_state][state] * (log(state_counts[parents_state][state]) -
-                                                                   log(conditional_sample_size))
+        var_cardinality = len(self.state_names[variable])
+        state_counts, parent_set, num_parents_states = self._stacked_state_counts(variable, parents_list)
+        sample_size = self.dataset.sample_size
+        conditional_sample_size = state_counts.sum(axis=0)
 
-        score -= 0.5 * log(sample_size) * num_parents_states * (var_cardinality - 1)
+        # log-likelihood for each parents' state configuration (only 1 if no parents);
+        # xlogy(0, 0) = 0, so states that do not occur do not contribute
+        scores = (xlogy(state_counts, state_counts).sum(axis=0) -
+                  xlogy(conditional_sample_size, conditional_sample_size))
+        scores = self._sum_by_parent_set(parent_set, scores, len(parents_list))
+        scores -= 0.5 * log(sample_size) * num_parents_states * (var_cardinality - 1)
 
-        return score
+        return scores
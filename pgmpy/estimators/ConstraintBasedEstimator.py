@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 
+import os
+import pickle
 from warnings import warn
-from itertools import combinations
+from itertools import combinations, chain
 
 from pgmpy.base import UndirectedGraph
 from pgmpy.models import BayesianModel
 from pgmpy.estimators import StructureEstimator
+from pgmpy.estimators.base import _check_n_jobs, _make_pool, _apply_worker
 from pgmpy.independencies import Independencies, IndependenceAssertion
 
 
@@ -20,7 +23,7 @@ class ConstraintBasedEstimator(StructureEstimator):
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -36,6 +39,10 @@ class ConstraintBasedEstimator(StructureEstimator):
             every row where neither the variable nor its parents are `np.NaN` is used.
             This sets the behavior of the `state_count`-method.
 
+        n_jobs: int (optional, default 1)
+            Number of worker processes used to run the conditional independence tests
+            of the stable PC variant (see `estimate_skeleton`), -1 to use all CPUs.
+
         References
         ----------
         [1] Koller & Friedman, Probabilistic Graphical Models - Principles and Techniques,
@@ -45,7 +52,7 @@ class ConstraintBasedEstimator(StructureEstimator):
         """
         super(ConstraintBasedEstimator, self).__init__(data, **kwargs)
 
-    def estimate(self, significance_level=0.01):
+    def estimate(self, significance_level=0.01, stable=False, checkpoint=None):
         """
         Estimates a BayesianModel for the data set, using the PC contraint-based
         structure learning algorithm. Independencies are identified from the
@@ -64,6 +71,12 @@ class ConstraintBasedEstimator(StructureEstimator):
             given that they are. The lower `significance_level`, the less likely
             we are to accept dependencies, resulting in a sparser graph.
 
+        stable: bool, default: False
+            Whether to use the order-independent PC-stable variant for the skeleton, see `build_skeleton`.
+
+        checkpoint: str or None
+            Path of a file to save the skeleton search to after each level, see `build_skeleton`.
+
         Returns
         -------
         model: BayesianModel()-instance
@@ -102,12 +115,12 @@ class ConstraintBasedEstimator(StructureEstimator):
         [('Z', 'sum'), ('X', 'sum'), ('Y', 'sum')]
         """
 
-        skel, separating_sets = self.estimate_skeleton(significance_level)
+        skel, separating_sets = self.estimate_skeleton(significance_level, stable=stable, checkpoint=checkpoint)
         pdag = self.skeleton_to_pdag(skel, separating_sets)
         model = self.pdag_to_dag(pdag)
         return model
 
-    def estimate_skeleton(self, significance_level=0.01):
+    def estimate_skeleton(self, significance_level=0.01, stable=False, checkpoint=None):
         """Estimates a graph skeleton (UndirectedGraph) for the data set.
         Uses the build_skeleton method (PC algorithm); independencies are
         determined using a chisquare statistic with the acceptance threshold
@@ -123,6 +136,14 @@ class ConstraintBasedEstimator(StructureEstimator):
             given that they are. The lower `significance_level`, the less likely
             we are to accept dependencies, resulting in a sparser graph.
 
+        stable: bool, default: False
+            Whether to use the order-independent PC-stable variant, see `build_skeleton`.
+            Its tests are run by `n_jobs` worker processes, as set in the constructor.
+
+        checkpoint: str or None
+            Path of a file to save the search to after each level, and to resume it from,
+            see `build_skeleton`.
+
         Returns
         -------
         skeleton: UndirectedGraph
@@ -170,15 +191,10 @@ class ConstraintBasedEstimator(StructureEstimator):
         """
 
         nodes = self.state_names.keys()
+        is_independent = _ChiSquareTest(self, significance_level)
 
-        def is_independent(X, Y, Zs):
-            """Returns result of hypothesis test for the null hypothesis that
-            X _|_ Y | Zs, using a chi2 statistic and threshold `significance_level`.
-            """
-            chi2, p_value, sufficient_data = self.test_conditional_independence(X, Y, Zs)
-            return p_value >= significance_level
-
-        return self.build_skeleton(nodes, is_independent)
+        return self.build_skeleton(nodes, is_independent, stable=stable, n_jobs=self.n_jobs if stable else 1,
+                                   checkpoint=checkpoint)
 
     @staticmethod
     def estimate_from_independencies(nodes, independencies):
@@ -441,7 +457,7 @@ class ConstraintBasedEstimator(StructureEstimator):
         return pdag
 
     @staticmethod
-    def build_skeleton(nodes, independencies):
+    def build_skeleton(nodes, independencies, stable=False, n_jobs=1, checkpoint=None):
         """Estimates a graph skeleton (UndirectedGraph) from a set of independencies
         using (the first part of) the PC algorithm. The independencies can either be
         provided as an instance of the `Independencies`-class or by passing a
@@ -466,6 +482,22 @@ class ConstraintBasedEstimator(StructureEstimator):
             function `f(X, Y, Zs)` that returns `True` when X _|_ Y | Zs,
             otherwise `False`. (X, Y being individual nodes and Zs a list of nodes).
 
+        stable: bool (default: False)
+            If True, the PC-stable variant [3] is used: the neighbors of all nodes are fixed at the
+            beginning of each level (size of the separating sets), and edges found to be independent
+            are only removed at the end of the level. The result does then not depend on the
+            order of the nodes, and the tests of a level are independent of each other.
+
+        n_jobs: int (default: 1)
+            Number of worker processes used to run the tests of each level when `stable` is True,
+            -1 to use all CPUs. `independencies` is sent to each worker once (workers inherit it
+            on platforms that fork; elsewhere it has to be picklable).
+
+        checkpoint: str or None (default: None)
+            Path of a file where the search is saved after each level. If the file exists, the
+            search resumes from the saved level, so a long search can be continued after an
+            interruption. The file is kept afterwards; it has to be removed to start a new search.
+
         Returns
         -------
         skeleton: UndirectedGraph
@@ -475,6 +507,7 @@ class ConstraintBasedEstimator(StructureEstimator):
             A dict containing for each pair of not directly connected nodes a
             separating set ("witnessing set") of variables that makes then
             conditionally independent. (needed for edge orientation procedures)
+            Separating sets are tuples of nodes.
 
         Reference
         ---------
@@ -482,6 +515,8 @@ class ConstraintBasedEstimator(StructureEstimator):
             http://www.cs.technion.ac.il/~dang/books/Learning%20Bayesian%20Networks(Neapolitan,%20Richard).pdf
         [2] Koller & Friedman, Probabilistic Graphical Models - Principles and Techniques, 2009
             Section 3.4.2.1 (page 85), Algorithm 3.3
+        [3] Colombo & Maathuis, Order-independent constraint-based causal structure learning,
+            Journal of Machine Learning Research 15, 2014
 
         Examples
         --------
@@ -508,27 +543,108 @@ class ConstraintBasedEstimator(StructureEstimator):
         nodes = list(nodes)
 
         if isinstance(independencies, Independencies):
-            def is_independent(X, Y, Zs):
-                return IndependenceAssertion(X, Y, Zs) in independencies
+            is_independent = _AssertionTest(independencies)
         elif callable(independencies):
             is_independent = independencies
         else:
             raise ValueError("'independencies' must be either Independencies-instance " +
                              "or a ternary function that decides independencies.")
-
-        graph = UndirectedGraph(combinations(nodes, 2))
-        lim_neighbors = 0
-        separating_sets = dict()
-        while not all([len(graph.neighbors(node)) < lim_neighbors for node in nodes]):
-            for node in nodes:
-                for neighbor in graph.neighbors(node):
-                    # search if there is a set of neighbors (of size lim_neighbors)
-                    # that makes X and Y independent:
-                    for separating_set in combinations(set(graph.neighbors(node)) - set([neighbor]), lim_neighbors):
-                        if is_independent(node, neighbor, separating_set):
-                            separating_sets[frozenset((node, neighbor))] = separating_set
-                            graph.remove_edge(node, neighbor)
-                            break
-            lim_neighbors += 1
+        _check_n_jobs(n_jobs)
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint, 'rb') as f:
+                saved = pickle.load(f)
+            if set(saved['nodes']) != set(nodes):
+                raise ValueError("The checkpoint '{0}' was saved for other nodes.".format(checkpoint))
+            graph = UndirectedGraph(saved['edges'])
+            graph.add_nodes_from(nodes)
+            lim_neighbors, separating_sets = saved['lim_neighbors'], saved['separating_sets']
+        else:
+            graph = UndirectedGraph(combinations(nodes, 2))
+            graph.add_nodes_from(nodes)
+            lim_neighbors = 0
+            separating_sets = dict()
+
+        pool = _make_pool(n_jobs, is_independent) if stable else None
+        try:
+            while not all([len(graph.neighbors(node)) < lim_neighbors for node in nodes]):
+                if stable:
+                    # neighbors are fixed for the whole level, so the edges can be tested independently
+                    index = {node: i for i, node in enumerate(nodes)}
+                    neighbors = {node: sorted(graph.neighbors(node), key=index.get) for node in nodes}
+                    tasks = [(X, Y, [Z for Z in neighbors[X] if Z != Y], [Z for Z in neighbors[Y] if Z != X],
+                              lim_neighbors) for X, Y in sorted(graph.edges(), key=lambda e: sorted(map(index.get, e)))]
+                    if pool is None:
+                        results = [_find_separating_set(is_independent, *task) for task in tasks]
+                    else:
+                        results = pool.map(_apply_worker, [(_find_separating_set,) + task for task in tasks])
+                    for (X, Y, _, _, _), separating_set in zip(tasks, results):
+                        if separating_set is not None:
+                            separating_sets[frozenset((X, Y))] = separating_set
+                            graph.remove_edge(X, Y)
+                else:
+                    for node in nodes:
+                        for neighbor in graph.neighbors(node):
+                            # search if there is a set of neighbors (of size lim_neighbors)
+                            # that makes X and Y independent:
+                            for separating_set in combinations(set(graph.neighbors(node)) - set([neighbor]),
+                                                               lim_neighbors):
+                                if is_independent(node, neighbor, separating_set):
+                                    separating_sets[frozenset((node, neighbor))] = separating_set
+                                    graph.remove_edge(node, neighbor)
+                                    break
+                lim_neighbors += 1
+
+                if checkpoint is not None:
+                    _save_checkpoint(checkpoint, {'nodes': nodes, 'edges': graph.edges(),
+                                                  'lim_neighbors': lim_neighbors,
+                                                  'separating_sets': separating_sets})
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
         return graph, separating_sets
+
+
+class _ChiSquareTest(object):
+    """Decides X _|_ Y | Zs with the chi2 test of `estimator.test_conditional_independence`
+    and the acceptance threshold `significance_level` (picklable, unlike a closure)."""
+
+    def __init__(self, estimator, significance_level):
+        self.estimator = estimator
+        self.significance_level = significance_level
+
+    def __call__(self, X, Y, Zs):
+        chi2, p_value, sufficient_data = self.estimator.test_conditional_independence(X, Y, Zs)
+        return p_value >= self.significance_level
+
+
+class _AssertionTest(object):
+    "Decides X _|_ Y | Zs by looking the assertion up in an `Independencies` instance."
+
+    def __init__(self, independencies):
+        self.independencies = independencies
+
+    def __call__(self, X, Y, Zs):
+        return IndependenceAssertion(X, Y, Zs) in self.independencies
+
+
+def _find_separating_set(is_independent, X, Y, X_neighbors, Y_neighbors, size):
+    """Returns the first set of `size` neighbors of X (or else of Y) that makes X and Y
+    independent, as a tuple, or None if there is none."""
+    tested = set()
+    for separating_set in chain(combinations(X_neighbors, size), combinations(Y_neighbors, size)):
+        if frozenset(separating_set) in tested:
+            continue
+        tested.add(frozenset(separating_set))
+        if is_independent(X, Y, separating_set):
+            return separating_set
+    return None
+
+
+def _save_checkpoint(path, state):
+    "Writes `state` to a temporary file that then replaces `path`, so a checkpoint is never partially written."
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(state, f, protocol=2)
+    getattr(os, 'replace', os.rename)(path + '.tmp', path)
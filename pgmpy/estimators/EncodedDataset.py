@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+class EncodedDataset(object):
+    def __init__(self, data, state_names=None, weights=None):
+        """
+        Discrete data set with each variable encoded as integer codes, which can be
+        built once and passed instead of a DataFrame to all estimators in pgmpy, so
+        that the data is not encoded again by each of them.
+
+        Parameters
+        ----------
+        data: pandas DataFrame object
+            datafame object where each column represents one variable.
+            (If some values in the data are missing the data cells should be set to `numpy.NaN`.
+            Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
+
+        state_names: dict (optional)
+            A dict indicating, for each variable, the discrete set of states (or values)
+            that the variable can take. If unspecified, the observed values in the data set
+            are taken to be the only possible states.
+
+        weights: array-like or column name (optional)
+            A non-negative weight for each row of `data`, such as the number of times it
+            has been observed, or the name of the column of `data` that holds them (which
+            is then not a variable of the data set). Every row counts once if unspecified.
+            All counts of the estimators are weighted sums, so that learning from distinct
+            rows weighted by their number of occurrences (see `deduplicate`) gives the same
+            results as learning from all rows.
+
+        Attributes
+        ----------
+        variables: list
+            The variables of the data set, in the order of the columns of `codes`.
+
+        state_names: dict
+            dict of the form {var: list of states}, with the sorted states of each variable.
+
+        codes: numpy.array
+            Array of shape (number of rows, number of variables) with the position of the
+            value of each variable in its state names, or the number of states if the
+            value is missing.
+
+        missing: numpy.array
+            Boolean array of the same shape as `codes` which is `True` for missing values.
+
+        complete_rows: numpy.array
+            Boolean array which is `True` for the rows without missing values.
+
+        weights: numpy.array or None
+            The weight of each row, or `None` if every row counts once.
+
+        sample_size: int or float
+            The number of rows, or the sum of the weights.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> from pgmpy.estimators import EncodedDataset, K2Score, ConstraintBasedEstimator
+        >>> data = pd.DataFrame(data={'A': ['a1', 'a1', 'a2'], 'B': ['b1', 'b2', 'b1']})
+        >>> dataset = EncodedDataset(data)
+        >>> dataset.codes
+        array([[0, 0],
+               [0, 1],
+               [1, 0]], dtype=uint8)
+        >>> dataset.state_names
+        {'A': ['a1', 'a2'], 'B': ['b1', 'b2']}
+        >>> score = K2Score(dataset)
+        >>> dataset.deduplicate().sample_size
+        3.0
+        >>> skeleton = ConstraintBasedEstimator(dataset).estimate_skeleton()
+        """
+        if not isinstance(state_names, dict):
+            state_names = {}
+
+        if weights is not None and np.ndim(weights) == 0:
+            if weights not in data.columns:
+                raise ValueError("weights column '{0}' not in data.".format(str(weights)))
+            data, weights = data.drop(weights, axis=1), data[weights].values
+
+        self.variables = list(data.columns.values)
+        self.state_names = {}
+        columns = []
+        for var in self.variables:
+            column = data[var]
+            if var in state_names:
+                states = sorted(state_names[var])
+                codes = pd.Categorical(column, categories=states).codes
+                if ((codes < 0) & column.notnull().values).any():
+                    raise ValueError("Data contains unexpected states for variable '{0}'.".format(str(var)))
+            else:
+                states = sorted(column.dropna().unique())
+                codes = pd.Categorical(column, categories=states).codes
+            self.state_names[var] = states
+            columns.append(codes)
+
+        cardinalities = np.array([len(self.state_names[var]) for var in self.variables], dtype=int)
+        dtype = np.min_scalar_type(max(list(cardinalities) + [0]))
+        self.codes = np.empty((len(data), len(self.variables)), dtype=dtype)
+        for index, codes in enumerate(columns):
+            self.codes[:, index] = np.where(codes < 0, cardinalities[index], codes)
+
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
+            if weights.shape != (len(data),) or not (weights >= 0).all():
+                raise ValueError("weights should be a non-negative number for each row of data.")
+        self.weights = weights
+        self._build_index()
+
+    def _build_index(self):
+        "Derives the attributes that are not pickled from `codes` and `state_names`."
+        self.variable_index = {var: index for index, var in enumerate(self.variables)}
+        self.cardinalities = np.array([len(self.state_names[var]) for var in self.variables], dtype=int)
+        self.missing = self.codes >= self.cardinalities
+        self.complete_rows = ~self.missing.any(axis=1)
+        self.sample_size = len(self.codes) if self.weights is None else self.weights.sum()
+        self._fingerprint = None
+
+    def __getstate__(self):
+        return {'variables': self.variables, 'state_names': self.state_names,
+                'codes': self.codes, 'weights': self.weights}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_index()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def deduplicate(self):
+        """
+        Returns an equivalent EncodedDataset with each distinct row once, weighted by its
+        number of occurrences (or by the sum of its weights). Counting, and thus learning,
+        then takes time proportional to the number of distinct rows.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> from pgmpy.estimators import EncodedDataset
+        >>> data = pd.DataFrame(data={'A': ['a1', 'a1', 'a2', 'a1'], 'B': ['b1', 'b2', 'b1', 'b1']})
+        >>> dataset = EncodedDataset(data).deduplicate()
+        >>> dataset.codes
+        array([[0, 0],
+               [0, 1],
+               [1, 0]], dtype=uint8)
+        >>> dataset.weights
+        array([ 2.,  1.,  1.])
+        """
+        index, inverse = _unique_rows(self.codes)
+        weights = np.bincount(inverse, weights=self.weights, minlength=len(index)).astype(float)
+        dataset = EncodedDataset.__new__(EncodedDataset)
+        dataset.__setstate__({'variables': list(self.variables), 'state_names': dict(self.state_names),
+                              'codes': self.codes[index], 'weights': weights})
+        return dataset
+
+    def fingerprint(self):
+        """
+        Returns a hex digest that identifies the data set, i.e. the variables, their
+        state names, the state of each variable in each row and the weights.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1(repr([(var, self.state_names[var]) for var in self.variables]).encode('utf-8'))
+            digest.update(np.ascontiguousarray(self.codes).tobytes())
+            if self.weights is not None:
+                digest.update(self.weights.tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+
+def _unique_rows(array):
+    "Returns the indices of the first occurrences of the distinct rows of `array` and the inverse index."
+    array = np.ascontiguousarray(array)
+    keys = array.view(np.dtype((np.void, array.dtype.itemsize * array.shape[1]))).ravel()
+    _, index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return index, inverse
@@ -1,9 +1,14 @@
 #!/usr/bin/env python
 
+from collections import OrderedDict
 from warnings import warn
 from itertools import combinations
+import os
+import shutil
+import tempfile
 
 import networkx as nx
+import numpy as np
 
 from pgmpy.estimators import StructureEstimator
 from pgmpy.estimators import K2Score
@@ -12,14 +17,14 @@ from pgmpy.models import BayesianModel
 
 
 class ExhaustiveSearch(StructureEstimator):
-    def __init__(self, data, scoring_method=None, **kwargs):
+    def __init__(self, data, scoring_method=None, n_jobs=1, **kwargs):
         """
         Search class for exhaustive searches over all BayesianModels with a given set of variables.
         Takes a `StructureScore`-Instance as parameter; `estimate` finds the model with maximal score.
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -38,13 +43,17 @@ class ExhaustiveSearch(StructureEstimator):
             that contain `np.Nan` somewhere are ignored. If `False` then, for each variable,
             every row where neither the variable nor its parents are `np.NaN` is used.
             This sets the behavior of the `state_count`-method.
+
+        n_jobs: int (optional, default 1)
+            Number of worker processes used to score the DAGs, -1 to use all CPUs.
+            The results do not depend on the number of workers.
         """
         if scoring_method is not None:
             self.scoring_method = scoring_method
         else:
             self.scoring_method = K2Score(data, **kwargs)
 
-        super(ExhaustiveSearch, self).__init__(data, **kwargs)
+        super(ExhaustiveSearch, self).__init__(data, n_jobs=n_jobs, **kwargs)
 
     def all_dags(self, nodes=None):
         """
@@ -98,6 +107,38 @@ class ExhaustiveSearch(StructureEstimator):
             if nx.is_directed_acyclic_graph(graph):
                 yield graph
 
+    def _score_dags(self, dags):
+        """
+        Returns the structure scores of `dags`. Every distinct (node, parents)
+        family is scored once, possibly in parallel, and the scores of the
+        DAGs are summed from the family scores.
+        """
+        families = {}
+        for dag in dags:
+            for node in dag.nodes():
+                families.setdefault(node, OrderedDict())[tuple(dag.predecessors(node))] = None
+
+        tasks = [(node, [list(parents) for parents in parents_sets]) for node, parents_sets in families.items()]
+        pool = self._get_pool()
+        try:
+            task_scores = self._batch_local_scores(tasks, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        local_scores = {}
+        for (node, parents_sets), scores in zip(families.items(), task_scores):
+            local_scores.update(((node, parents), score) for parents, score in zip(parents_sets, scores))
+
+        dag_scores = []
+        for dag in dags:
+            score = 0
+            for node in dag.nodes():
+                score += local_scores[(node, tuple(dag.predecessors(node)))]
+            dag_scores.append(score + self.scoring_method.structure_prior(dag))
+        return dag_scores
+
     def all_scores(self):
         """
         Computes a list of DAGs and their structure scores, ordered by score.
@@ -146,21 +187,79 @@ class ExhaustiveSearch(StructureEstimator):
         -16237.575725538434     [('C', 'B')]
         """
 
-        scored_dags = sorted([(self.scoring_method.score(dag), dag) for dag in self.all_dags()],
-                             key=lambda x: x[0])
+        dags = list(self.all_dags())
+        scored_dags = sorted(zip(self._score_dags(dags), dags), key=lambda x: x[0])
         return scored_dags
 
-    def estimate(self):
+    def _best_parent_sets(self, nodes, max_indegree, pool, directory):
+        """
+        Returns two arrays of shape (n, 2**(n-1)) for the n `nodes`. Subsets of the nodes other
+        than `nodes[i]` are indexed by bitmasks over these n-1 nodes (in the order of `nodes`).
+        Entry [i, C] of the first array is the best local score of `nodes[i]` with parents
+        chosen from C, and entry [i, C] of the second array is the bitmask of these parents.
+        """
+        n = len(nodes)
+        best_scores = _empty_table((n, 2 ** (n - 1)), np.float64, directory, 'best_scores')
+        best_parents = _empty_table((n, 2 ** (n - 1)), np.uint32, directory, 'best_parents')
+
+        tasks, task_masks = [], []
+        for i, node in enumerate(nodes):
+            others = nodes[:i] + nodes[i + 1:]
+            subsets = [subset for size in range(max_indegree + 1) for subset in combinations(range(n - 1), size)]
+            tasks.append((node, [[others[j] for j in subset] for subset in subsets]))
+            task_masks.append(np.array([sum(1 << j for j in subset) for subset in subsets], dtype=np.uint32))
+
+        for i, (masks, scores) in enumerate(zip(task_masks, self._batch_local_scores(tasks, pool))):
+            node_scores, node_parents = best_scores[i], best_parents[i]
+            node_scores[:] = -np.inf
+            node_scores[masks] = scores
+            node_parents[:] = np.arange(2 ** (n - 1), dtype=np.uint32)
+
+            # best over all subsets of C, computed one bit at a time; ties keep the smaller parent set
+            for j in range(n - 1):
+                without_j = node_scores.reshape(-1, 2, 2 ** j)[:, 0, :]
+                with_j = node_scores.reshape(-1, 2, 2 ** j)[:, 1, :]
+                better = without_j >= with_j
+                np.copyto(with_j, without_j, where=better)
+                np.copyto(node_parents.reshape(-1, 2, 2 ** j)[:, 1, :],
+                          node_parents.reshape(-1, 2, 2 ** j)[:, 0, :], where=better)
+
+        return best_scores, best_parents
+
+    def estimate(self, max_indegree=None, memmap_dir=None):
         """
         Estimates the `BayesianModel` structure that fits best to the given data set,
         according to the scoring method supplied in the constructor.
-        Exhaustively searches through all models. Only estimates network structure, no parametrization.
+        Exactly searches through all models, by dynamic programming over the subsets of
+        the variables [1]. Only estimates network structure, no parametrization.
+
+        For each variable the best parent set among every subset of the other variables is
+        tabulated from the local scores; then, for every subset of variables, the variable
+        that is best placed last (the sink) in an optimal network over the subset. Time and
+        memory grow as `n * 2**n` for n variables, instead of the super-exponential number
+        of DAGs, which makes the search feasible up to about 20-25 variables (with `max_indegree`).
+        The `structure_prior` of the scoring method is not taken into account.
+
+        Parameters
+        ----------
+        max_indegree: int or None
+            If provided and unequal None, only models where all nodes have at most
+            `max_indegree` parents are searched. This bounds the number of local scores
+            computed to `n * sum(binomial(n - 1, k) for k <= max_indegree)`.
+        memmap_dir: str or None
+            If provided, the dynamic programming tables are memory-mapped files in a temporary
+            directory created in `memmap_dir` (and deleted afterwards), instead of arrays in memory.
 
         Returns
         -------
         model: `BayesianModel` instance
             A `BayesianModel` with maximal score.
 
+        References
+        ----------
+        [1] Silander & Myllymaki, A simple approach for finding the globally optimal
+            Bayesian network structure, UAI 2006
+
         Examples
         --------
         >>> import pandas as pd
@@ -176,10 +275,71 @@ class ExhaustiveSearch(StructureEstimator):
         >>> best_model.edges()
         [('B', 'C')]
         """
+        nodes = sorted(self.state_names.keys())
+        n = len(nodes)
+        if n == 0:
+            return BayesianModel()
+        if max_indegree is None or max_indegree > n - 1:
+            max_indegree = max(n - 1, 0)
+
+        directory = tempfile.mkdtemp(dir=memmap_dir) if memmap_dir is not None else None
+        pool = self._get_pool()
+        try:
+            best_scores, best_parents = self._best_parent_sets(nodes, max_indegree, pool, directory)
 
-        best_dag = max(self.all_dags(), key=self.scoring_method.score)
+            # network_scores[W] is the best score of a network over the subset (bitmask) W of nodes,
+            # and sinks[W] the node that has no children in it
+            network_scores = _empty_table((2 ** n,), np.float64, directory, 'network_scores')
+            sinks = _empty_table((2 ** n,), np.int8, directory, 'sinks')
+            network_scores[0] = 0
+            subset_sizes = np.zeros(1, dtype=np.int8)
+            for i in range(n):
+                subset_sizes = np.concatenate([subset_sizes, subset_sizes + 1])
+
+            for size in range(1, n + 1):
+                subsets = np.flatnonzero(subset_sizes == size)
+                subset_scores = np.full(len(subsets), -np.inf)
+                subset_sinks = np.zeros(len(subsets), dtype=np.int8)
+                for i in range(n):
+                    contains_i = np.flatnonzero((subsets >> i) & 1)
+                    rest = subsets[contains_i] ^ (1 << i)
+                    scores = network_scores[rest] + best_scores[i][_drop_bit(rest, i)]
+                    better = scores > subset_scores[contains_i]
+                    subset_scores[contains_i[better]] = scores[better]
+                    subset_sinks[contains_i[better]] = i
+                network_scores[subsets] = subset_scores
+                sinks[subsets] = subset_sinks
+
+            # take the sinks off one by one, each with its best parents among the remaining nodes
+            edges = []
+            subset = 2 ** n - 1
+            while subset:
+                sink = int(sinks[subset])
+                subset ^= 1 << sink
+                parents = int(best_parents[sink][_drop_bit(subset, sink)])
+                others = nodes[:sink] + nodes[sink + 1:]
+                edges.extend((others[j], nodes[sink]) for j in range(n - 1) if parents >> j & 1)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
 
         best_model = BayesianModel()
-        best_model.add_nodes_from(sorted(best_dag.nodes()))
-        best_model.add_edges_from(sorted(best_dag.edges()))
+        best_model.add_nodes_from(nodes)
+        best_model.add_edges_from(sorted(edges))
         return best_model
+
+
+def _empty_table(shape, dtype, directory, name):
+    "Returns an uninitialized array, memory-mapped to the file `name` in `directory` unless that is None."
+    if directory is None:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(os.path.join(directory, name), dtype=dtype, mode='w+', shape=shape)
+
+
+def _drop_bit(subsets, i):
+    "Removes bit i from the bitmasks `subsets` (which do not have it set), shifting the higher bits down."
+    low = (1 << i) - 1
+    return (subsets & low) | ((subsets >> 1) & ~low)
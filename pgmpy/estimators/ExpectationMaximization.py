@@ -0,0 +1,355 @@
+import numpy as np
+import pandas as pd
+
+from pgmpy.estimators import ParameterEstimator, EncodedDataset
+from pgmpy.estimators.base import _check_n_jobs, _make_pool, _apply_worker
+from pgmpy.estimators.EncodedDataset import _unique_rows
+from pgmpy.factors.discrete import TabularCPD
+from pgmpy.models import BayesianModel
+
+# Maximum number of distinct rows of data processed at once in the E-step
+_E_STEP_CHUNK_SIZE = 4096
+
+
+class ExpectationMaximization(ParameterEstimator):
+    # `fit` can't keep state counts as sufficient statistics for this estimator
+    _uses_state_counts = False
+
+    def __init__(self, model, data, **kwargs):
+        """
+        Class used to compute parameters for a model with missing data or latent
+        variables using the Expectation-Maximization algorithm.
+
+        Parameters
+        ----------
+        model: A pgmpy.models.BayesianModel instance
+
+        data: pandas DataFrame object or EncodedDataset
+            DataFrame object with column names identical to the variable names of the network.
+            Missing values should be set to `numpy.NaN`. Variables of the model that are not
+            columns of a DataFrame are latent variables, for which `state_names` have to be given.
+
+        state_names: dict (optional)
+            A dict indicating, for each variable, the discrete set of states
+            that the variable can take. If unspecified, the observed values
+            in the data set are taken to be the only possible states.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> from pgmpy.models import BayesianModel
+        >>> from pgmpy.estimators import ExpectationMaximization
+        >>> data = pd.DataFrame(np.random.randint(low=0, high=2, size=(1000, 3)),
+        ...                     columns=['A', 'B', 'C'])
+        >>> model = BayesianModel([('H', 'A'), ('H', 'B'), ('H', 'C')])
+        >>> estimator = ExpectationMaximization(model, data, state_names={'H': [0, 1]})
+        """
+        if not isinstance(model, BayesianModel):
+            raise NotImplementedError("Expectation Maximization is only implemented for BayesianModel")
+        if not isinstance(data, (pd.DataFrame, EncodedDataset)):
+            raise ValueError("Expectation Maximization needs the data as a pandas DataFrame or EncodedDataset.")
+
+        if isinstance(data, pd.DataFrame):
+            latent_variables = [node for node in model.nodes() if node not in data.columns]
+        else:
+            latent_variables = []
+        if latent_variables:
+            state_names = kwargs.get('state_names')
+            if not isinstance(state_names, dict) or not set(latent_variables) <= set(state_names):
+                raise ValueError("state_names have to be given for the latent variables {0}".format(
+                    latent_variables))
+            data = data.copy()
+            for var in latent_variables:
+                data[var] = np.NaN
+
+        super(ExpectationMaximization, self).__init__(model, data, **kwargs)
+        self.log_likelihoods = []
+        self.converged = None
+
+    def get_parameters(self, max_iter=100, tol=1e-6, init_cpds=None, seed=None, n_jobs=1):
+        """
+        Method to estimate the model parameters (CPDs) using Expectation-Maximization.
+
+        In the E-step the expected state counts of each variable and its parents are computed
+        from the posterior distribution of the missing values of each row, given the observed
+        values and the current parameters. Rows with the same observed values are only
+        processed once and weighted by their number of occurrences, and rows with the same
+        missing variables are processed together, by batched message passing on a junction
+        tree of the missing variables. The M-step takes the maximum likelihood parameters of
+        the expected counts.
+
+        Parameters
+        ----------
+        max_iter: int (default: 100)
+            Maximum number of iterations.
+
+        tol: float (default: 1e-6)
+            The iteration stops when the log-likelihood of the data improves by less than
+            `tol` times its absolute value.
+
+        init_cpds: list of TabularCPD (optional)
+            Initial CPDs for some of the variables. The CPDs of the other variables are
+            initialized with the counts of the complete rows of their family, plus
+            random pseudo counts of at most 1 (with random state `seed`).
+
+        seed: int (optional)
+            Seed for the random initialization.
+
+        n_jobs: int (default: 1)
+            Number of processes computing the E-step in parallel, or -1 for all CPUs.
+
+        Returns
+        -------
+        parameters: list
+            List of TabularCPDs, one for each variable of the model.
+            The log-likelihood of the data at each iteration is stored in `log_likelihoods`,
+            and whether the iteration converged before `max_iter` in `converged`.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> from pgmpy.models import BayesianModel
+        >>> from pgmpy.estimators import ExpectationMaximization
+        >>> data = pd.DataFrame(data={'A': [0, 0, 1, 1, np.NaN], 'B': [0, np.NaN, 1, 1, 0]})
+        >>> model = BayesianModel([('A', 'B')])
+        >>> estimator = ExpectationMaximization(model, data)
+        >>> print(estimator.get_parameters()[0])
+        +--------+-----+
+        | A(0.0) | 0.6 |
+        +--------+-----+
+        | A(1.0) | 0.4 |
+        +--------+-----+
+        >>> estimator.converged
+        True
+        """
+        _check_n_jobs(n_jobs)
+        nodes = sorted(self.model.nodes())
+        cardinalities = {var: len(self.state_names[var]) for var in nodes}
+        unknown_states = [var for var in nodes if cardinalities[var] == 0]
+        if unknown_states:
+            raise ValueError("state_names have to be given for {0}, which are never observed.".format(unknown_states))
+
+        families = [[node] + sorted(self.model.get_parents(node)) for node in nodes]
+        parameters = self._initial_parameters(families, init_cpds, seed)
+        tasks = self._evidence_groups(nodes, cardinalities)
+
+        self.log_likelihoods = []
+        self.converged = False
+        pool = _make_pool(n_jobs, None)
+        try:
+            for _ in range(max_iter):
+                task_args = [(_expected_counts_worker, parameters, families, cardinalities) + task
+                             for task in tasks]
+                if pool:
+                    results = pool.map(_apply_worker, task_args)
+                else:
+                    results = [task[0](None, *task[1:]) for task in task_args]
+
+                log_likelihood = sum(result[1] for result in results)
+                parameters = {family[0]: _normalize(sum(result[0][index] for result in results))
+                              for index, family in enumerate(families)}
+
+                self.log_likelihoods.append(log_likelihood)
+                if (len(self.log_likelihoods) > 1 and
+                        abs(log_likelihood - self.log_likelihoods[-2]) <= tol * abs(self.log_likelihoods[-2])):
+                    self.converged = True
+                    break
+        finally:
+            if pool:
+                pool.close()
+
+        return [TabularCPD(family[0], cardinalities[family[0]],
+                           parameters[family[0]].reshape(cardinalities[family[0]], -1),
+                           evidence=family[1:],
+                           evidence_card=[cardinalities[parent] for parent in family[1:]],
+                           state_names=self.state_names)
+                for family in families]
+
+    def _initial_parameters(self, families, init_cpds, seed):
+        """
+        Returns a dict {node: array} with the initial CPD values of each family, with
+        an axis for each variable of the family.
+        """
+        random_state = np.random.RandomState(seed)
+        init_cpds = {cpd.variable: cpd for cpd in init_cpds or []}
+
+        parameters = {}
+        counts = self._joint_state_counts_many(families, complete_samples_only=False)
+        for family, family_counts in zip(families, counts):
+            if family[0] in init_cpds:
+                cpd = init_cpds[family[0]]
+                if sorted(cpd.variables) != sorted(family) or cpd.values.shape != family_counts.shape:
+                    raise ValueError("The initial CPD of {0} doesn't match the model.".format(family[0]))
+                parameters[family[0]] = cpd.values.transpose([cpd.variables.index(var) for var in family])
+            else:
+                parameters[family[0]] = _normalize(family_counts + random_state.uniform(size=family_counts.shape))
+        return parameters
+
+    def _evidence_groups(self, nodes, cardinalities):
+        """
+        Groups the distinct rows of the data by their missing variables. Returns a list of
+        tuples (observed variables, missing variables, codes of the observed variables,
+        number of occurrences or sum of weights) with at most `_E_STEP_CHUNK_SIZE` rows each.
+        """
+        columns = [self.dataset.variable_index[var] for var in nodes]
+        codes, missing = self.dataset.codes[:, columns], self.dataset.missing[:, columns]
+
+        distinct_index, inverse = _unique_rows(codes)
+        weights = np.bincount(inverse, weights=self.dataset.weights).astype(float)
+        codes, missing = codes[distinct_index], missing[distinct_index]
+
+        pattern_index, pattern_inverse = _unique_rows(missing)
+        groups = []
+        for pattern, row in enumerate(pattern_index):
+            observed = [var for var, is_missing in zip(nodes, missing[row]) if not is_missing]
+            hidden = [var for var, is_missing in zip(nodes, missing[row]) if is_missing]
+            rows = np.flatnonzero(pattern_inverse == pattern)
+            observed_codes = codes[rows][:, ~missing[row]].astype(int)
+            for start in range(0, len(rows), _E_STEP_CHUNK_SIZE):
+                groups.append((observed, hidden, observed_codes[start:start + _E_STEP_CHUNK_SIZE],
+                               weights[rows[start:start + _E_STEP_CHUNK_SIZE]]))
+        return groups
+
+
+def _normalize(counts):
+    "Normalizes `counts` over the first axis, with uniform values where all counts are 0."
+    totals = counts.sum(axis=0)
+    return np.where(totals > 0, counts / np.where(totals > 0, totals, 1).astype(float), 1.0 / counts.shape[0])
+
+
+def _align(values, scope, target, cardinalities):
+    """
+    Returns `values`, with the rows as first axis followed by an axis for each variable of
+    `scope`, transposed and reshaped to broadcast against an array with axes for `target`.
+    """
+    order = sorted(range(len(scope)), key=lambda index: target.index(scope[index]))
+    values = values.transpose([0] + [index + 1 for index in order])
+    return values.reshape((values.shape[0],) + tuple(cardinalities[var] if var in scope else 1 for var in target))
+
+
+def _marginal(values, scope, target):
+    "Sums `values` (rows, then `scope`) over the variables that are not in `target`, ordered as `target`."
+    values = values.sum(axis=tuple(index + 1 for index, var in enumerate(scope) if var not in target))
+    scope = [var for var in scope if var in target]
+    return values.transpose([0] + [scope.index(var) + 1 for var in target])
+
+
+def _row_normalize(values):
+    "Normalizes `values` to sum to 1 in each row (first axis). Returns the values and the row sums."
+    totals = values.reshape(len(values), -1).sum(axis=1)
+    return values / totals.reshape((-1,) + (1,) * (values.ndim - 1)), totals
+
+
+def _expected_counts_worker(worker_state, parameters, families, cardinalities, observed, hidden, codes, weights):
+    """
+    Returns the expected state counts of the `families` for rows with the values `codes` of
+    the `observed` variables and the `hidden` variables missing, each row weighted by
+    `weights`, together with the log-likelihood of the rows.
+
+    The CPDs are reduced by the observed values to factors of the hidden variables, with
+    an additional first axis for the rows. The posterior distributions of the hidden
+    variables of each family are then computed for all rows at once by message passing on
+    a junction tree of the hidden variables, built from a greedy elimination order.
+    """
+    num_rows = len(codes)
+    column = {var: index for index, var in enumerate(observed)}
+    log_likelihood = np.zeros(num_rows)
+
+    factors = []
+    for family in families:
+        observed_axes = [index for index, var in enumerate(family) if var in column]
+        hidden_axes = [index for index, var in enumerate(family) if var not in column]
+        values = parameters[family[0]].transpose(observed_axes + hidden_axes)
+        if observed_axes:
+            values = values[tuple(codes[:, column[family[index]]] for index in observed_axes)]
+        else:
+            values = np.broadcast_to(values, (num_rows,) + values.shape)
+        factors.append(([family[index] for index in hidden_axes], values))
+
+    # Build the cliques of the junction tree by eliminating the hidden variables
+    neighbors = {var: set() for var in hidden}
+    for scope, _ in factors:
+        for var in scope:
+            neighbors[var].update(scope)
+    remaining = set(hidden)
+    elimination_order, cliques, children = [], {}, {var: [] for var in hidden}
+    while remaining:
+        var = min(remaining, key=lambda var: (np.prod([cardinalities[neighbor] for neighbor in neighbors[var]]),
+                                              hidden.index(var)))
+        neighbors[var].discard(var)
+        cliques[var] = [var] + sorted(neighbors[var], key=hidden.index)
+        for neighbor in neighbors[var]:
+            neighbors[neighbor].update(neighbors[var])
+            neighbors[neighbor].discard(var)
+        remaining.remove(var)
+        elimination_order.append(var)
+    rank = {var: index for index, var in enumerate(elimination_order)}
+    parent = {var: min(cliques[var][1:], key=rank.get) if len(cliques[var]) > 1 else None for var in hidden}
+    for var in hidden:
+        if parent[var] is not None:
+            children[parent[var]].append(var)
+
+    # Assign each factor to the clique of its first eliminated variable
+    potentials = {var: np.ones((num_rows,) + tuple(cardinalities[v] for v in cliques[var])) for var in hidden}
+    factor_cliques = []
+    with np.errstate(divide='ignore'):
+        for scope, values in factors:
+            if scope:
+                clique = min(scope, key=rank.get)
+                potentials[clique] = potentials[clique] * _align(values, scope, cliques[clique], cardinalities)
+            else:
+                clique = None
+                log_likelihood += np.log(values)
+            factor_cliques.append(clique)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Upward pass, from the leaves to the roots of the junction tree
+        upward = {}
+        for var in elimination_order:
+            belief = potentials[var]
+            for child in children[var]:
+                belief = belief * _align(upward[child], cliques[child][1:], cliques[var], cardinalities)
+            if parent[var] is None:
+                log_likelihood += np.log(belief.reshape(num_rows, -1).sum(axis=1))
+            else:
+                upward[var], totals = _row_normalize(belief.sum(axis=1))
+                log_likelihood += np.log(totals)
+
+        # Downward pass, from the roots to the leaves
+        downward, beliefs = {}, {}
+        for var in reversed(elimination_order):
+            incoming = potentials[var]
+            if parent[var] is not None:
+                incoming = incoming * _align(downward[var], cliques[var][1:], cliques[var], cardinalities)
+            messages = [_align(upward[child], cliques[child][1:], cliques[var], cardinalities)
+                        for child in children[var]]
+            for index, child in enumerate(children[var]):
+                message = incoming
+                for other_index, other_message in enumerate(messages):
+                    if other_index != index:
+                        message = message * other_message
+                downward[child] = _row_normalize(_marginal(message, cliques[var], cliques[child][1:]))[0]
+            for message in messages:
+                incoming = incoming * message
+            beliefs[var] = _row_normalize(incoming)[0]
+
+    counts = []
+    for family, (scope, _), clique in zip(families, factors, factor_cliques):
+        if clique is None:
+            posterior = weights
+        else:
+            posterior = _marginal(beliefs[clique], cliques[clique], scope)
+            posterior = posterior * weights.reshape((-1,) + (1,) * len(scope))
+        observed_axes = [index for index, var in enumerate(family) if var in column]
+        hidden_axes = [index for index, var in enumerate(family) if var not in column]
+        family_counts = np.zeros([cardinalities[var] for var in family])
+        if observed_axes:
+            np.add.at(family_counts.transpose(observed_axes + hidden_axes),
+                      tuple(codes[:, column[family[index]]] for index in observed_axes), posterior)
+        else:
+            family_counts += posterior.sum(axis=0)
+        counts.append(family_counts)
+
+    return counts, float(weights.dot(log_likelihood))
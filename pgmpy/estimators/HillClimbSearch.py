@@ -1,21 +1,24 @@
 #!/usr/bin/env python
-from itertools import permutations
+import heapq
+from itertools import count, permutations
 
 import networkx as nx
+import numpy as np
 
 from pgmpy.estimators import StructureEstimator, K2Score
+from pgmpy.estimators.ScoreCache import ScoreCache
 from pgmpy.models import BayesianModel
 
 
 class HillClimbSearch(StructureEstimator):
-    def __init__(self, data, scoring_method=None, **kwargs):
+    def __init__(self, data, scoring_method=None, n_jobs=1, **kwargs):
         """
         Class for heuristic hill climb searches for BayesianModels, to learn
         network structure from data. `estimate` attempts to find a model with optimal score.
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -34,13 +37,19 @@ class HillClimbSearch(StructureEstimator):
             that contain `np.Nan` somewhere are ignored. If `False` then, for each variable,
             every row where neither the variable nor its parents are `np.NaN` is used.
             This sets the behavior of the `state_count`-method.
+
+        n_jobs: int (optional, default 1)
+            Number of worker processes used to score candidate operations, -1 to use all CPUs.
+            The estimated model does not depend on the number of workers.
         """
         if scoring_method is not None:
             self.scoring_method = scoring_method
         else:
             self.scoring_method = K2Score(data, **kwargs)
 
-        super(HillClimbSearch, self).__init__(data, **kwargs)
+        self.score_cache_stats = None
+
+        super(HillClimbSearch, self).__init__(data, n_jobs=n_jobs, **kwargs)
 
     def _legal_operations(self, model, tabu_list=[], max_indegree=None):
         """Generates a list of legal (= not in tabu_list) graph modifications
@@ -51,13 +60,15 @@ class HillClimbSearch(StructureEstimator):
         of parents for each node below `max_indegree` are considered."""
 
         local_score = self.scoring_method.local_score
-        nodes = self.state_names.keys()
+        nodes = list(self.state_names.keys())
+        index = {node: i for i, node in enumerate(nodes)}
+        reachable = _transitive_closure(model, nodes)
         potential_new_edges = (set(permutations(nodes, 2)) -
                                set(model.edges()) -
                                set([(Y, X) for (X, Y) in model.edges()]))
 
         for (X, Y) in potential_new_edges:  # (1) add single edge
-            if nx.is_directed_acyclic_graph(nx.DiGraph(model.edges() + [(X, Y)])):
+            if not reachable[index[Y], index[X]]:
                 operation = ('+', (X, Y))
                 if operation not in tabu_list:
                     old_parents = model.get_parents(Y)
@@ -76,9 +87,7 @@ class HillClimbSearch(StructureEstimator):
                 yield(operation, score_delta)
 
         for (X, Y) in model.edges():  # (3) flip single edge
-            new_edges = model.edges() + [(Y, X)]
-            new_edges.remove((X, Y))
-            if nx.is_directed_acyclic_graph(nx.DiGraph(new_edges)):
+            if not _has_indirect_path(model, reachable, index, X, Y):
                 operation = ('flip', (X, Y))
                 if operation not in tabu_list and ('flip', (Y, X)) not in tabu_list:
                     old_X_parents = model.get_parents(X)
@@ -93,6 +102,24 @@ class HillClimbSearch(StructureEstimator):
                                        local_score(Y, old_Y_parents))
                         yield(operation, score_delta)
 
+    def _score_deltas(self, changed_nodes, parents, nodes, pool=None):
+        """Returns a dict with, for each node in `changed_nodes`, a dict with the change of its
+        local score when each other node is added to its parents (if it is not a parent)
+        or removed from them."""
+
+        tasks = []
+        for node in changed_nodes:
+            others = [other for other in nodes if other != node]
+            parent_sets = [[parent for parent in parents[node] if parent != other] if other in parents[node]
+                           else parents[node] + [other] for other in others]
+            tasks.append((node, [parents[node]] + parent_sets))
+
+        score_deltas = {}
+        for (node, parent_sets), scores in zip(tasks, self._batch_local_scores(tasks, pool)):
+            others = [other for other in nodes if other != node]
+            score_deltas[node] = dict(zip(others, scores[1:] - scores[0]))
+        return score_deltas
+
     def estimate(self, start=None, tabu_length=0, max_indegree=None):
         """
         Performs local hill climb search to estimates the `BayesianModel` structure
@@ -117,6 +144,10 @@ class HillClimbSearch(StructureEstimator):
         model: `BayesianModel` instance
             A `BayesianModel` at a (local) score maximum.
 
+        If the scoring method is a `ScoreCache`, its statistics (`ScoreCache.stats`) after the
+        search are stored in the `score_cache_stats` attribute. With `n_jobs` other than 1,
+        workers score with their own copies of the cache, which are not counted.
+
         Examples
         --------
         >>> import pandas as pd
@@ -136,38 +167,148 @@ class HillClimbSearch(StructureEstimator):
         >>> est.estimate(max_indegree=1).edges()
         [('J', 'A'), ('B', 'J')]
         """
-        epsilon = 1e-8
-        nodes = self.state_names.keys()
+        nodes = list(self.state_names.keys())
         if start is None:
             start = BayesianModel()
             start.add_nodes_from(nodes)
         elif not isinstance(start, BayesianModel) or not set(start.nodes()) == set(nodes):
             raise ValueError("'start' should be a BayesianModel with the same variables as the data set, or 'None'.")
 
-        tabu_list = []
         current_model = start
 
+        pool = self._get_pool()
+        try:
+            return self._climb(current_model, nodes, tabu_length, max_indegree, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if isinstance(self.scoring_method, ScoreCache):
+                self.score_cache_stats = self.scoring_method.stats()
+
+    def _climb(self, current_model, nodes, tabu_length, max_indegree, pool):
+        "Runs the hill climb search of `estimate` starting from `current_model`, which is modified in place."
+
+        epsilon = 1e-8
+        tabu_list = []
+
+        # The score change of an operation only depends on the parents of the nodes whose parents it
+        # modifies. Score changes are kept in a heap of (-score_delta, tie breaker, operation, versions)
+        # entries, and only recomputed for the nodes whose parents changed (which bumps their version,
+        # making their old entries stale). Acyclicity is checked with a reachability matrix.
+        index = {node: i for i, node in enumerate(nodes)}
+        reachable = _transitive_closure(current_model, nodes)
+        parents = {node: current_model.get_parents(node) for node in nodes}
+        score_deltas = {}
+        versions = dict.fromkeys(nodes, 0)
+        heap = []
+        tie_breaker = count()
+
+        def operation_versions(operation):
+            X, Y = operation[1]
+            return (versions[X], versions[Y]) if operation[0] == 'flip' else versions[Y]
+
+        def is_legal(operation):
+            X, Y = operation[1]
+            if operation in tabu_list:
+                return False
+            elif operation[0] == '+':
+                return (X not in parents[Y] and Y not in parents[X] and not reachable[index[Y], index[X]] and
+                        (max_indegree is None or len(parents[Y]) < max_indegree))
+            elif operation[0] == '-':
+                return X in parents[Y]
+            else:
+                return (X in parents[Y] and ('flip', (Y, X)) not in tabu_list and
+                        (max_indegree is None or len(parents[X]) < max_indegree) and
+                        not _has_indirect_path(current_model, reachable, index, X, Y))
+
+        changed_nodes = nodes
         while True:
-            best_score_delta = 0
-            best_operation = None
+            for node in changed_nodes:
+                versions[node] += 1
+            score_deltas.update(self._score_deltas(changed_nodes, parents, nodes, pool))
 
-            for operation, score_delta in self._legal_operations(current_model, tabu_list, max_indegree):
-                if score_delta > best_score_delta:
-                    best_operation = operation
-                    best_score_delta = score_delta
+            operations = {}
+            for node in changed_nodes:
+                for other, score_delta in score_deltas[node].items():
+                    if other in parents[node]:
+                        operations[('-', (other, node))] = score_delta
+                        operations[('flip', (other, node))] = score_delta + score_deltas[other][node]
+                    else:
+                        operations[('+', (other, node))] = score_delta
+                        if node in parents[other]:
+                            operations[('flip', (node, other))] = score_delta + score_deltas[other][node]
+            for operation, score_delta in operations.items():
+                heapq.heappush(heap, (-score_delta, next(tie_breaker), operation, operation_versions(operation)))
+
+            # pop entries until the best legal operation is found; entries of
+            # operations that are currently illegal are kept for later iterations
+            best_operation = None
+            kept_entries = []
+            while heap and -heap[0][0] >= epsilon:
+                entry = heapq.heappop(heap)
+                if entry[3] != operation_versions(entry[2]):
+                    continue
+                kept_entries.append(entry)
+                if is_legal(entry[2]):
+                    best_operation = entry[2]
+                    break
+            for entry in kept_entries:
+                heapq.heappush(heap, entry)
 
-            if best_operation is None or best_score_delta < epsilon:
+            if best_operation is None:
                 break
-            elif best_operation[0] == '+':
-                current_model.add_edge(*best_operation[1])
+
+            X, Y = best_operation[1]
+            if best_operation[0] == '+':
+                current_model.add_edge(X, Y)
+                parents[Y].append(X)
+                _add_reachability(reachable, index[X], index[Y])
                 tabu_list = ([('-', best_operation[1])] + tabu_list)[:tabu_length]
+                changed_nodes = [Y]
             elif best_operation[0] == '-':
-                current_model.remove_edge(*best_operation[1])
+                current_model.remove_edge(X, Y)
+                parents[Y].remove(X)
+                reachable = _transitive_closure(current_model, nodes)
                 tabu_list = ([('+', best_operation[1])] + tabu_list)[:tabu_length]
+                changed_nodes = [Y]
             elif best_operation[0] == 'flip':
-                X, Y = best_operation[1]
                 current_model.remove_edge(X, Y)
                 current_model.add_edge(Y, X)
+                parents[Y].remove(X)
+                parents[X].append(Y)
+                reachable = _transitive_closure(current_model, nodes)
                 tabu_list = ([best_operation] + tabu_list)[:tabu_length]
+                changed_nodes = [X, Y]
 
         return current_model
+
+
+def _transitive_closure(model, nodes):
+    """Returns a boolean matrix whose entry [i, j] is True if there is a directed path
+    from `nodes[i]` to `nodes[j]` in `model`."""
+
+    index = {node: i for i, node in enumerate(nodes)}
+    reachable = np.zeros((len(nodes), len(nodes)), dtype=bool)
+    for node in reversed(list(nx.topological_sort(model))):
+        for child in model.successors(node):
+            reachable[index[node], index[child]] = True
+            reachable[index[node]] |= reachable[index[child]]
+    return reachable
+
+
+def _add_reachability(reachable, x, y):
+    "Updates the matrix returned by `_transitive_closure` in place for a new edge from node x to node y."
+
+    sources = reachable[:, x].copy()
+    sources[x] = True
+    targets = reachable[y].copy()
+    targets[y] = True
+    reachable[np.ix_(sources, targets)] = True
+
+
+def _has_indirect_path(model, reachable, index, X, Y):
+    "Checks if there is a directed path from X to Y in `model` other than the edge (X, Y)."
+
+    return any(reachable[index[child], index[Y]]
+               for child in model.successors(X) if child != Y)
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-from math import lgamma
+from scipy.special import gammaln
 
 from pgmpy.estimators import StructureScore
 
@@ -13,7 +13,7 @@ class K2Score(StructureScore):
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -42,17 +42,16 @@ class K2Score(StructureScore):
         "Computes a score that measures how much a \
         given variable is \"influenced\" by a given list of potential parents."
 
-        var_states = self.state_names[variable]
-        var_cardinality = len(var_states)
-        state_counts = self.state_counts(variable, parents)
+        return self.local_scores(variable, [parents])[0]
 
-        score = 0
-        for parents_state in state_counts:  # iterate over df columns (only 1 if no parents)
-            conditional_sample_size = sum(state_counts[parents_state])
+    def local_scores(self, variable, parents_list):
+        "Computes the local score of `variable` for each parent set in `parents_list`."
 
-            score += lgamma(var_cardinality) - lgamma(conditional_sample_size + var_cardinality)
+        var_cardinality = len(self.state_names[variable])
+        state_counts, parent_set, _ = self._stacked_state_counts(variable, parents_list)
+        conditional_sample_size = state_counts.sum(axis=0)
 
-            for state in var_states:
-                if state_counts[parents_state][state] > 0:
-                    score += lgamma(state_counts[parents_state][state] + 1)
-        return score
+        # one term for each parents' state configuration (only 1 if no parents)
+        scores = (gammaln(var_cardinality) - gammaln(conditional_sample_size + var_cardinality) +
+                  gammaln(state_counts + 1).sum(axis=0))
+        return self._sum_by_parent_set(parent_set, scores, len(parents_list))
@@ -16,7 +16,7 @@ class MaximumLikelihoodEstimator(ParameterEstimator):
         ----------
         model: A pgmpy.models.BayesianModel instance
 
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             DataFrame object with column names identical to the variable names of the network.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -73,11 +73,13 @@ class MaximumLikelihoodEstimator(ParameterEstimator):
         <TabularCPD representing P(A:2) at 0x7f7b4dfd4fd0>,
         <TabularCPD representing P(D:2 | C:2) at 0x7f7b4df822b0>]
         """
-        parameters = []
+        nodes = sorted(self.model.nodes())
+        families = [[node] + sorted(self.model.get_parents(node)) for node in nodes]
 
-        for node in sorted(self.model.nodes()):
-            cpd = self.estimate_cpd(node)
-            parameters.append(cpd)
+        # the counts of all families are computed with a single scan over the encoded data
+        parameters = []
+        for family, counts in zip(families, self._joint_state_counts_many(families)):
+            parameters.append(self._cpd_from_counts(family[0], family[1:], counts))
 
         return parameters
 
@@ -121,19 +123,21 @@ class MaximumLikelihoodEstimator(ParameterEstimator):
         ╘══════╧══════╧══════╧══════╧══════╛
         """
 
-        state_counts = self.state_counts(node)
+        parents = sorted(self.model.get_parents(node))
+        return self._cpd_from_counts(node, parents, self._joint_state_counts([node] + parents))
+
+    def _cpd_from_counts(self, node, parents, counts):
+        "Returns the TabularCPD of `node` estimated from the joint state counts of `node` and `parents`."
+        node_cardinality = len(self.state_names[node])
+        counts = counts.reshape(node_cardinality, -1)
 
         # if a column contains only `0`s (no states observed for some configuration
         # of parents' states) fill that column uniformly instead
-        state_counts.ix[:, (state_counts == 0).all()] = 1
+        totals = counts.sum(axis=0)
+        values = np.where(totals > 0, counts / np.where(totals > 0, totals, 1).astype(float), 1.0 / node_cardinality)
 
-        parents = sorted(self.model.get_parents(node))
         parents_cardinalities = [len(self.state_names[parent]) for parent in parents]
-        node_cardinality = len(self.state_names[node])
-
-        cpd = TabularCPD(node, node_cardinality, np.array(state_counts),
-                         evidence=parents,
-                         evidence_card=parents_cardinalities,
-                         state_names=self.state_names)
-        cpd.normalize()
-        return cpd
+        return TabularCPD(node, node_cardinality, values,
+                          evidence=parents,
+                          evidence_card=parents_cardinalities,
+                          state_names=self.state_names)
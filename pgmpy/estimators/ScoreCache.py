@@ -1,10 +1,18 @@
 #!/usr/bin/env python
+import hashlib
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
 from pgmpy.estimators import StructureScore
+from pgmpy.extern import six
 
 
 class ScoreCache(StructureScore):
 
-    def __init__(self, base_scorer, data, max_size=10000, **kwargs):
+    def __init__(self, base_scorer, data, max_size=10000, max_bytes=None, store=None, **kwargs):
         """
         A wrapper class for StructureScore instances, which implement a decomposable score,
         that caches local scores.
@@ -14,13 +22,21 @@ class ScoreCache(StructureScore):
         ----------
         base_scorer: StructureScore instance
              Has to be a decomposable score.
-        data: pandas DataFrame instance
+        data: pandas DataFrame instance or EncodedDataset
             DataFrame instance where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
         max_size: int (optional, default 10_000)
             The maximum number of elements allowed in the cache. When the limit is reached, the least recently used
             entries will be discarded.
+        max_bytes: int (optional, default None)
+            The maximum (approximate) memory in bytes used by the cached local scores. When the limit
+            is reached, the least recently used entries will be discarded. No limit if None.
+        store: ScoreStore instance or str (optional, default None)
+            A persistent store (or the path of its database file) that is looked up before
+            local scores are computed, and where computed local scores are written to.
+            Scores are kept apart by the data of `base_scorer`, its type and its hyper-parameters,
+            so one store can be shared by different data sets, scores and processes.
         **kwargs
             Additional arguments that will be handed to the super constructor.
 
@@ -28,20 +44,165 @@ class ScoreCache(StructureScore):
         ---------
         Koller & Friedman, Probabilistic Graphical Models - Principles and Techniques, 2009
         Section 18.3
+
+        Notes
+        -----
+        Local scores are cached by variable and set of parents, so the order of the parents
+        does not matter. Hit, miss and eviction counts are returned by `stats`, and after each
+        `HillClimbSearch.estimate` call in its `score_cache_stats` attribute.
         """
         assert isinstance(base_scorer, StructureScore), "Base scorer has to be of type StructureScore."
 
         self.base_scorer = base_scorer
-        self.cache = LRUCache(original_function=self._wrapped_original, max_size=int(max_size))
+        self.cache = LRUCache(original_function=self._wrapped_original, max_size=int(max_size), max_bytes=max_bytes)
+        if isinstance(store, six.string_types):
+            store = ScoreStore(store)
+        self.store = store
+        self._store_context = _score_context(base_scorer) if store is not None else None
+        self._computed = {}
         super(ScoreCache, self).__init__(data, **kwargs)
 
     def local_score(self, variable, parents):
-        hashable = tuple(parents)
-        return self.cache(variable, hashable)
+        return self.cache(variable, frozenset(parents))
+
+    def local_scores(self, variable, parents_list):
+        keys = [frozenset(parents) for parents in parents_list]
+        missing = [key for key in set(keys) if (variable, key) not in self.cache]
+        if len(missing) > 1:
+            # look up and compute the missing scores in one batch; the cache picks them up from `_computed`
+            self._computed = {(variable, key): score for key, score in zip(missing, self._scores(variable, missing))}
+        try:
+            return np.array([self.cache(variable, key) for key in keys], dtype=float)
+        finally:
+            self._computed = {}
+
+    def stats(self):
+        """
+        Returns a dict with the statistics of the cache: the number of `hits`, `misses` and
+        `evictions` since the cache was created, the number of cached local scores (`size`),
+        their approximate memory use in bytes (`nbytes`), and the `max_size` and `max_bytes` limits.
+        """
+        return self.cache.stats()
 
     def _wrapped_original(self, variable, parents):
-        expected = list(parents)
-        return self.base_scorer.local_score(variable, expected)
+        if (variable, parents) in self._computed:
+            return self._computed[(variable, parents)]
+        return self._scores(variable, [parents])[0]
+
+    def _scores(self, variable, parents_list):
+        """
+        Returns the local scores for the parent sets (frozensets) in `parents_list` from the store,
+        computing (and storing) those that are not stored yet. The parents are handed to the base
+        scorer in a canonical order, so a score does not depend on the order it was requested in.
+        """
+        ordered = [tuple(sorted(parents, key=str)) for parents in parents_list]
+        stored = self.store.get(self._store_context, variable, ordered) if self.store is not None else {}
+        missing = [parents for parents in ordered if parents not in stored]
+        if len(missing) == 1:
+            computed = [self.base_scorer.local_score(variable, list(missing[0]))]
+        elif missing:
+            computed = self.base_scorer.local_scores(variable, [list(parents) for parents in missing])
+        else:
+            computed = []
+        computed = dict(zip(missing, computed))
+        if computed and self.store is not None:
+            self.store.put(self._store_context, variable, computed)
+
+        stored.update(computed)
+        return [stored[parents] for parents in ordered]
+
+
+def _score_context(scorer):
+    "Returns a hex digest that identifies the local scores of `scorer` in a `ScoreStore`."
+    score_type = type(scorer).__module__ + '.' + type(scorer).__name__
+    parameters = sorted(scorer._score_parameters().items())
+    return hashlib.sha1(repr((score_type, parameters, scorer._data_fingerprint())).encode('utf-8')).hexdigest()
+
+
+class ScoreStore(object):
+
+    def __init__(self, path, timeout=60.0):
+        """
+        Persistent store of local scores in an SQLite database file, to reuse local
+        scores across runs and processes. Used through `ScoreCache(..., store=...)`.
+
+        Scores are stored under a context, which identifies the data set, the type of
+        score and its hyper-parameters. The database is opened in write-ahead-logging
+        mode, so readers do not block writers; each process opens its own connection
+        (also after a fork or unpickling), so a store can be handed to worker processes.
+
+        Parameters
+        ----------
+        path: str
+            Path of the database file. It is created if it does not exist.
+        timeout: float (optional, default 60)
+            Number of seconds to wait for a lock on the database held by another process.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> import numpy as np
+        >>> from pgmpy.estimators import HillClimbSearch, BdeuScore
+        >>> from pgmpy.estimators.ScoreCache import ScoreCache, ScoreStore
+        >>> data = pd.DataFrame(np.random.randint(0, 3, size=(1000, 4)), columns=list('ABCD'))
+        >>> store = ScoreStore('scores.sqlite')
+        >>> scorer = ScoreCache(BdeuScore(data, equivalent_sample_size=5), data, store=store)
+        >>> model = HillClimbSearch(data, scoring_method=scorer).estimate()
+        >>> # later runs on the same data read the local scores from 'scores.sqlite'
+        """
+        self.path = path
+        self.timeout = timeout
+        self._connection = None
+        self._pid = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        return state
+
+    def _connect(self):
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS local_scores (context TEXT, variable TEXT, '
+                                   'parents TEXT, score REAL, PRIMARY KEY (context, variable, parents))')
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, context, variable, parents_list):
+        """
+        Returns a dict with the stored local scores of `variable` for the parent
+        sets (tuples) in `parents_list`. Parent sets without a stored score are left out.
+        """
+        connection = self._connect()
+        keys = {repr(tuple(parents)): parents for parents in parents_list}
+        scores = {}
+        key_list = list(keys)
+        # stay below SQLite's limit on the number of query parameters
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            rows = connection.execute('SELECT parents, score FROM local_scores WHERE context = ? AND variable = ? '
+                                      'AND parents IN ({0})'.format(', '.join('?' * len(chunk))),
+                                      [context, repr(variable)] + chunk)
+            scores.update((keys[key], score) for key, score in rows)
+        return scores
+
+    def put(self, context, variable, scores):
+        "Stores the local scores of `variable` given as a dict {parents: score}."
+        connection = self._connect()
+        with connection:
+            connection.executemany('INSERT OR IGNORE INTO local_scores VALUES (?, ?, ?, ?)',
+                                   [(context, repr(variable), repr(tuple(parents)), float(score))
+                                    for parents, score in scores.items()])
+
+    def close(self):
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
 
 
 # link fields
@@ -50,7 +211,7 @@ _PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
 
 class LRUCache:
 
-    def __init__(self, original_function, max_size=10000):
+    def __init__(self, original_function, max_size=10000, max_bytes=None):
         """
         Least-Recently-Used cache.
         Acts as a wrapper around a arbitrary function and caches the return values.
@@ -66,10 +227,25 @@ class LRUCache:
         max_size: int (optional, default 10_000)
             The maximum number of elements allowed within the cache. If the size would be exceeded,
             the least recently used element will be removed from the cache.
+        max_bytes: int (optional, default None)
+            The maximum (approximate) memory used by the cached elements, see `nbytes`.
+            Least recently used elements are removed to stay within it. No limit if None.
+
+        Attributes
+        ----------
+        hits, misses, evictions: int
+            Number of calls answered from the cache, number of calls of `original_function`
+            and number of elements removed from the cache to respect the size limits.
+        nbytes: int
+            Approximate memory used by the cached elements: the sizes of the keys (and their items),
+            the values and the links of the elements, as given by `sys.getsizeof`.
         """
         self.original_function = original_function
         self.max_size = max_size
+        self.max_bytes = max_bytes
         self.mapping = {}
+        self.hits = self.misses = self.evictions = 0
+        self.nbytes = 0
 
         # oldest
         self.head = [None, None, None, None]
@@ -77,24 +253,48 @@ class LRUCache:
         self.tail = [self.head, None, None, None]
         self.head[_NEXT] = self.tail
 
+    def __contains__(self, key):
+        return key in self.mapping
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def _element_size(self, link):
+        key, value = link[_KEY], link[_VALUE]
+        return sys.getsizeof(link) + sys.getsizeof(key) + sum(sys.getsizeof(item) for item in key) + \
+            sys.getsizeof(value)
+
+    def _evict(self):
+        "Unlinks the least recently used element."
+        link = self.head[_NEXT]
+        old_prev, old_next, old_key, old_value = link
+        self.head[_NEXT] = old_next
+        old_next[_PREV] = self.head
+        del self.mapping[old_key]
+        self.nbytes -= self._element_size(link)
+        self.evictions += 1
+
     def __call__(self, *key):
         mapping, head, tail = self.mapping, self.head, self.tail
 
         link = mapping.get(key, head)
         if link is head:
             # Not yet in map
+            self.misses += 1
             value = self.original_function(*key)
-            if len(mapping) >= self.max_size:
-                # Unlink the least recently used element
-                old_prev, old_next, old_key, old_value = head[_NEXT]
-                head[_NEXT] = old_next
-                old_next[_PREV] = head
-                del mapping[old_key]
+            if self.max_size < 1:
+                return value
+            while len(mapping) >= self.max_size:
+                self._evict()
             # Add new value as most recently used element
             last = tail[_PREV]
             link = [last, tail, key, value]
             mapping[key] = last[_NEXT] = tail[_PREV] = link
+            self.nbytes += self._element_size(link)
+            while self.max_bytes is not None and self.nbytes > self.max_bytes and mapping:
+                self._evict()
         else:
+            self.hits += 1
             # Unlink element from current position
             link_prev, link_next, key, value = link
             link_prev[_NEXT] = link_next
@@ -105,3 +305,11 @@ class LRUCache:
             link[_PREV] = last
             link[_NEXT] = tail
         return value
+
+    def stats(self):
+        """
+        Returns a dict with the counters `hits`, `misses` and `evictions`, the number of cached
+        elements (`size`), their approximate memory use in bytes (`nbytes`), and the limits.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self.mapping),
+                'nbytes': self.nbytes, 'max_size': self.max_size, 'max_bytes': self.max_bytes}
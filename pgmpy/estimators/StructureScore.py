@@ -1,5 +1,7 @@
 #!/usr/bin/env python
 
+import numpy as np
+
 from pgmpy.estimators import BaseEstimator
 
 
@@ -12,7 +14,7 @@ class StructureScore(BaseEstimator):
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -71,6 +73,67 @@ class StructureScore(BaseEstimator):
         score += self.structure_prior(model)
         return score
 
+    def local_scores(self, variable, parents_list):
+        """
+        Computes the local score of `variable` for each parent set in `parents_list`.
+        Scores that work on state counts (K2Score, BdeuScore and BicScore) compute
+        all the local scores with a single vectorized evaluation; other scores fall
+        back to calling `local_score` for each parent set.
+
+        Parameters
+        ----------
+        variable: string
+            Name of the variable that is to be scored.
+
+        parents_list: list
+            A list of candidate parent sets (lists or tuples of variable names).
+
+        Returns
+        -------
+        scores: numpy.array
+            The local score of `variable` for each of the parent sets.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> import numpy as np
+        >>> from pgmpy.estimators import BicScore
+        >>> data = pd.DataFrame(np.random.randint(0, 5, size=(5000, 2)), columns=list('AB'))
+        >>> data['C'] = data['B']
+        >>> BicScore(data).local_scores('C', [[], ['A'], ['B'], ['A', 'B']])
+        array([-8063.06709527, -8126.62634648,   -85.17193191,  -425.85965957])
+        """
+        return np.array([self.local_score(variable, parents) for parents in parents_list], dtype=float)
+
+    def _stacked_state_counts(self, variable, parents_list):
+        """
+        Returns the state counts of `variable` for all parent sets in `parents_list`,
+        stacked into one array with a column for each parents' state configuration,
+        together with the index of the parent set each column belongs to and the
+        number of parents' state configurations of each parent set.
+        The counts of all parent sets are computed in a single scan over the data.
+        """
+        var_cardinality = len(self.state_names[variable])
+        families = [[variable] + list(parents) for parents in parents_list]
+        counts = [state_counts.reshape(var_cardinality, -1) for state_counts in self._joint_state_counts_many(families)]
+        num_parents_states = np.array([state_counts.shape[1] for state_counts in counts], dtype=int)
+        parent_set = np.repeat(np.arange(len(counts)), num_parents_states)
+        stacked_counts = np.concatenate(counts, axis=1) if counts else np.zeros((var_cardinality, 0), dtype=int)
+        return stacked_counts, parent_set, num_parents_states
+
+    @staticmethod
+    def _sum_by_parent_set(parent_set, column_scores, num_parent_sets):
+        "Sums the scores of the columns returned by `_stacked_state_counts` for each parent set."
+        scores = np.bincount(parent_set, weights=column_scores, minlength=max(num_parent_sets, 1))
+        return scores[:num_parent_sets].astype(float)
+
+    def _score_parameters(self):
+        """
+        Returns a dict with the settings the local scores depend on, besides the data.
+        Used to key persistently cached local scores; scores with hyper-parameters extend it.
+        """
+        return {'complete_samples_only': self.complete_samples_only}
+
     def structure_prior(self, model):
         "A (log) prior distribution over models. Currently unused (= uniform)."
         return 0
@@ -1,6 +1,8 @@
+from pgmpy.estimators.EncodedDataset import EncodedDataset
 from pgmpy.estimators.base import BaseEstimator, ParameterEstimator, StructureEstimator
 from pgmpy.estimators.MLE import MaximumLikelihoodEstimator
 from pgmpy.estimators.BayesianEstimator import BayesianEstimator
+from pgmpy.estimators.ExpectationMaximization import ExpectationMaximization
 from pgmpy.estimators.StructureScore import StructureScore
 from pgmpy.estimators.K2Score import K2Score
 from pgmpy.estimators.BdeuScore import BdeuScore
@@ -9,7 +11,7 @@ from pgmpy.estimators.ExhaustiveSearch import ExhaustiveSearch
 from pgmpy.estimators.HillClimbSearch import HillClimbSearch
 from pgmpy.estimators.ConstraintBasedEstimator import ConstraintBasedEstimator
 
-__all__ = ['BaseEstimator',
-           'ParameterEstimator', 'MaximumLikelihoodEstimator', 'BayesianEstimator',
+__all__ = ['EncodedDataset', 'BaseEstimator',
+           'ParameterEstimator', 'MaximumLikelihoodEstimator', 'BayesianEstimator', 'ExpectationMaximization',
            'StructureEstimator', 'ExhaustiveSearch', 'HillClimbSearch', 'ConstraintBasedEstimator'
            'StructureScore', 'K2Score', 'BdeuScore', 'BicScore']
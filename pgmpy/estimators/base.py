@@ -1,13 +1,20 @@
 #!/usr/bin/env python
+from collections import OrderedDict
+from multiprocessing import Pool, cpu_count
 from warnings import warn
+import numbers
+import weakref
 
 import numpy as np
 import pandas as pd
-from scipy.stats import chisquare
+from scipy.stats import chi2
+
+from pgmpy.extern import six
+from pgmpy.estimators.EncodedDataset import EncodedDataset
 
 
 class BaseEstimator(object):
-    def __init__(self, data, state_names=None, complete_samples_only=True):
+    def __init__(self, data, state_names=None, complete_samples_only=True, count_cache_size=0, weights=None):
         """
         Base class for estimators in pgmpy; `ParameterEstimator`,
         `StructureEstimator` and `StructureScore` derive from this class.
@@ -15,10 +22,12 @@ class BaseEstimator(object):
         Parameters
         ----------
 
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
+            The DataFrame is encoded as an `EncodedDataset`, which can also be built once
+            and passed to several estimators instead.
 
         state_names: dict (optional)
             A dict indicating, for each variable, the discrete set of states (or values)
@@ -30,29 +39,127 @@ class BaseEstimator(object):
             that contain `np.Nan` somewhere are ignored. If `False` then, for each variable,
             every row where neither the variable nor its parents are `np.NaN` is used.
             This sets the behavior of the `state_count`-method.
+
+        count_cache_size: int (optional, default 0)
+            Memory budget in bytes for caching joint state counts. Counts of a set of
+            variables are then computed by marginalizing cached counts of a superset if
+            possible, instead of scanning the data again. The cache is shared by all
+            estimators built on the same DataFrame (and `state_names`) or EncodedDataset,
+            so the DataFrame must not be modified in place afterwards. Set to 0 to disable
+            caching.
+
+        weights: array-like or column name (optional)
+            A non-negative weight for each row of a DataFrame, or the name of its column
+            holding them, such as the number of occurrences of each row. All state counts
+            are then weighted sums. Use `EncodedDataset.deduplicate` to collapse repeated
+            rows into weights.
         """
 
-        self.data = data
-        self.complete_samples_only = complete_samples_only
+        if isinstance(data, EncodedDataset):
+            if weights is not None:
+                raise ValueError("weights of an EncodedDataset have to be given to its constructor.")
+            self.data = None
+            self.dataset = data
+            if isinstance(state_names, dict):
+                for var in set(state_names) & set(data.variables):
+                    if sorted(state_names[var]) != data.state_names[var]:
+                        raise ValueError("state_names of '{0}' differ from those of the EncodedDataset.".format(
+                            str(var)))
+        else:
+            self.data = data
+            self.dataset = EncodedDataset(data, state_names=state_names, weights=weights)
 
-        variables = list(data.columns.values)
+        self.complete_samples_only = complete_samples_only
+        self.state_names = dict(self.dataset.state_names)
 
-        if not isinstance(state_names, dict):
-            self.state_names = {var: self._collect_state_names(var) for var in variables}
+        if count_cache_size > 0:
+            self._state_count_cache = _get_state_count_cache(self, count_cache_size)
         else:
-            self.state_names = dict()
-            for var in variables:
-                if var in state_names:
-                    if not set(self._collect_state_names(var)) <= set(state_names[var]):
-                        raise ValueError("Data contains unexpected states for variable '{0}'.".format(str(var)))
-                    self.state_names[var] = sorted(state_names[var])
-                else:
-                    self.state_names[var] = self._collect_state_names(var)
-
-    def _collect_state_names(self, variable):
-        "Return a list of states that the variable takes in the data"
-        states = sorted(list(self.data.ix[:, variable].dropna().unique()))
-        return states
+            self._state_count_cache = None
+
+    def __getstate__(self):
+        # The encoded data set is all that is needed after initialization
+        state = self.__dict__.copy()
+        state['data'] = None
+        return state
+
+    def _data_fingerprint(self):
+        "Returns a hex digest that identifies the encoded data set, see `EncodedDataset.fingerprint`."
+        return self.dataset.fingerprint()
+
+    def _joint_state_counts(self, variables, complete_samples_only=None):
+        """
+        Returns a numpy.array of shape (c(variables[0]), c(variables[1]), ...) with
+        the number of rows in the data for each joint state configuration of
+        `variables`, where c() denotes the variable cardinality. The counts are
+        floats, the sums of the row weights, if the data set is weighted.
+        The returned array is read-only if it is served from the state count cache.
+        """
+        if complete_samples_only is None:
+            complete_samples_only = self.complete_samples_only
+
+        if self._state_count_cache is None:
+            return self._count_states(variables, complete_samples_only)
+        return self._state_count_cache.get(variables, complete_samples_only, self._count_states)
+
+    def _joint_state_counts_many(self, variables_list, complete_samples_only=None):
+        """
+        Returns `_joint_state_counts(variables)` for each list of variables in `variables_list`.
+        Without state count cache, all counts are computed in a single scan over the data.
+        """
+        if complete_samples_only is None:
+            complete_samples_only = self.complete_samples_only
+
+        if self._state_count_cache is None:
+            return self._count_states_many(variables_list, complete_samples_only)
+        return [self._state_count_cache.get(variables, complete_samples_only, self._count_states)
+                for variables in variables_list]
+
+    def _joint_state_index(self, variables, complete_samples_only, rows=slice(None)):
+        """
+        Returns the index of the joint state of `variables` in each row (of the slice
+        `rows` of the data), as a mixed radix number with the first variable as most
+        significant digit, and a boolean mask of the rows to count (complete rows, or
+        rows where none of `variables` is missing).
+        """
+        codes = self.dataset.codes[rows]
+        index = np.zeros(len(codes), dtype=np.intp)
+        mask = self.dataset.complete_rows[rows] if complete_samples_only else np.ones(len(codes), dtype=bool)
+        for var in variables:
+            column = codes[:, self.dataset.variable_index[var]]
+            cardinality = len(self.state_names[var])
+            index *= cardinality
+            index += column
+            if not complete_samples_only:
+                mask &= column < cardinality
+        return index, mask
+
+    def _count_states(self, variables, complete_samples_only):
+        "Counts the joint states of `variables` with a single pass over the encoded data."
+        return self._count_states_many([variables], complete_samples_only)[0]
+
+    def _count_states_many(self, variables_list, complete_samples_only):
+        """
+        Counts the joint states of each list of variables in `variables_list`. The data
+        is scanned once, in blocks of rows, and the counts of all lists are accumulated
+        for each block, which keeps the temporary index arrays small.
+        """
+        weights = self.dataset.weights
+        shapes = [[len(self.state_names[var]) for var in variables] for variables in variables_list]
+        counts = [np.zeros(int(np.prod(shape)), dtype=np.intp if weights is None else float) for shape in shapes]
+
+        for start in range(0, len(self.dataset), _COUNT_BLOCK_SIZE):
+            rows = slice(start, start + _COUNT_BLOCK_SIZE)
+            block_weights = None if weights is None else weights[rows]
+            for variables, variables_counts in zip(variables_list, counts):
+                index, mask = self._joint_state_index(variables, complete_samples_only, rows)
+                index_weights = block_weights
+                if not mask.all():
+                    index = index[mask]
+                    index_weights = None if weights is None else block_weights[mask]
+                variables_counts += np.bincount(index, weights=index_weights, minlength=len(variables_counts))
+
+        return [variables_counts.reshape(shape) for variables_counts, shape in zip(counts, shapes)]
 
     def state_counts(self, variable, parents=[], complete_samples_only=None):
         """
@@ -100,33 +207,20 @@ class BaseEstimator(object):
         c2  0   0   1   0
         """
 
-        # default for how to deal with missing data can be set in class constructor
-        if complete_samples_only is None:
-            complete_samples_only = self.complete_samples_only
-        # ignores either any row containing NaN, or only those where the variable or its parents is NaN
-        data = self.data.dropna() if complete_samples_only else self.data.dropna(subset=[variable] + parents)
+        counts = self._joint_state_counts([variable] + parents, complete_samples_only)
+        row_index = pd.Index(self.state_names[variable], name=variable if parents else None)
 
         if not parents:
-            # count how often each state of 'variable' occured
-            state_count_data = data.ix[:, variable].value_counts()
-            state_counts = state_count_data.reindex(self.state_names[variable]).fillna(0).to_frame()
-
+            state_counts = pd.DataFrame(counts, index=row_index, columns=[variable], copy=True)
         else:
             parents_states = [self.state_names[parent] for parent in parents]
-            # count how often each state of 'variable' occured, conditional on parents' states
-            state_count_data = data.groupby([variable] + parents).size().unstack(parents)
-
-            # reindex rows & columns to sort them and to add missing ones
-            # missing row    = some state of 'variable' did not occur in data
-            # missing column = some state configuration of current 'variable's parents
-            #                  did not occur in data
-            row_index = self.state_names[variable]
             column_index = pd.MultiIndex.from_product(parents_states, names=parents)
-            state_counts = state_count_data.reindex(index=row_index, columns=column_index).fillna(0)
+            state_counts = pd.DataFrame(counts.reshape(len(row_index), -1), index=row_index, columns=column_index,
+                                        copy=True)
 
         return state_counts
 
-    def test_conditional_independence(self, X, Y, Zs=[]):
+    def test_conditional_independence(self, X, Y, Zs=[], method='chi_square'):
         """Chi-square conditional independence test.
         Tests the null hypothesis that X is independent from Y given Zs.
 
@@ -146,6 +240,11 @@ class BaseEstimator(object):
             A list of variable names contained in the data set, different from X and Y.
             This is the separating set that (potentially) makes X and Y independent.
             Default: []
+        method: 'chi_square' or 'g_test'
+            The test statistic: Pearson's chi-square statistic `sum((O - E)**2 / E)`, or the
+            likelihood-ratio (G-test) statistic `2 * sum(O * log(O / E))`, for the observed
+            counts O and the expected counts E. Both are compared to a chi-square distribution.
+            Default: 'chi_square'
 
         Returns
         -------
@@ -154,7 +253,11 @@ class BaseEstimator(object):
         p_value: float
             The p_value, i.e. the probability of observing the computed chi2
             statistic (or an even higher value), given the null hypothesis
-            that X _|_ Y | Zs.
+            that X _|_ Y | Zs. The degrees of freedom are summed over the
+            state configurations z of Zs that occur in the data, as
+            `(r(z) - 1) * (c(z) - 1)` with r(z) and c(z) the number of states of X
+            and of Y that occur together with z, so that structural zeros do not
+            count as degrees of freedom. The p_value is 1 if there are no degrees of freedom.
         sufficient_data: bool
             A flag that indicates if the sample size is considered sufficient.
             As in [4], require at least 5 samples per parameter (on average).
@@ -181,72 +284,234 @@ class BaseEstimator(object):
         >>> data['E'] = data['A'] + data['B'] + data['C']
         >>> c = ConstraintBasedEstimator(data)
         >>> print(c.test_conditional_independence('A', 'C'))  # independent
-        (0.95035644482050263, 0.8132617142699442, True)
+        (0.95035644482050263, 0.32962858395082506, True)
         >>> print(c.test_conditional_independence('A', 'B', 'D'))  # independent
-        (5.5227461320130899, 0.59644169242588885, True)
+        (5.5227461320130899, 0.063204924219024669, True)
         >>> print(c.test_conditional_independence('A', 'B', ['D', 'E']))  # dependent
         (9192.5172226063387, 0.0, True)
         """
+        return self.test_conditional_independences([(X, Y)], Zs, method=method)[0]
+
+    def test_conditional_independences(self, pairs, Zs=[], method='chi_square'):
+        """
+        Tests the null hypotheses that X is independent from Y given Zs, for each
+        pair (X, Y) in `pairs`, with the same conditioning variables Zs. The joint
+        state of Zs is computed once for all pairs. See `test_conditional_independence`.
+
+        Parameters
+        ----------
+        pairs: list of tuples
+            A list of (X, Y) pairs of variable names contained in the data set.
+        Zs: list of variable names
+            A list of variable names contained in the data set, not in any of the pairs.
+        method: 'chi_square' or 'g_test'
+            The test statistic, see `test_conditional_independence`.
 
+        Returns
+        -------
+        results: list
+            A list with a (statistic, p_value, sufficient_data) tuple for each pair.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> import numpy as np
+        >>> from pgmpy.estimators import ConstraintBasedEstimator
+        >>> data = pd.DataFrame(np.random.randint(0, 2, size=(50000, 4)), columns=list('ABCD'))
+        >>> data['E'] = data['A'] + data['B'] + data['C']
+        >>> c = ConstraintBasedEstimator(data)
+        >>> c.test_conditional_independences([('A', 'B'), ('A', 'C'), ('B', 'C')], 'E', method='g_test')
+        [(13321.896075613113, 0.0, True), (12943.516795221203, 0.0, True), (13047.274167809966, 0.0, True)]
+        """
         if isinstance(Zs, (frozenset, list, set, tuple,)):
             Zs = list(Zs)
         else:
             Zs = [Zs]
+        if method not in ('chi_square', 'g_test'):
+            raise ValueError("method should be either 'chi_square' or 'g_test', got: {0}".format(method))
+
+        num_Z_states = int(np.prod([len(self.state_names[Z]) for Z in Zs]))
+        if self._state_count_cache is None:
+            Z_index, Z_rows = self._joint_state_index(Zs, complete_samples_only=False)
+
+        results = []
+        for X, Y in pairs:
+            X_card, Y_card = len(self.state_names[X]), len(self.state_names[Y])
+            num_params = (X_card - 1) * (Y_card - 1) * num_Z_states
+            sufficient_data = self.dataset.sample_size >= num_params * 5
+            if not sufficient_data:
+                warn("Insufficient data for testing {0} _|_ {1} | {2}. ".format(X, Y, Zs) +
+                     "At least {0} samples recommended, {1} present.".format(5 * num_params,
+                                                                             self.dataset.sample_size))
+
+            # observed counts, of shape (c(X), c(Y), number of state configurations of Zs)
+            if self._state_count_cache is None:
+                X_codes = self.dataset.codes[:, self.dataset.variable_index[X]]
+                Y_codes = self.dataset.codes[:, self.dataset.variable_index[Y]]
+                rows = Z_rows & (X_codes < X_card) & (Y_codes < Y_card)
+                index = (X_codes.astype(np.intp) * Y_card + Y_codes) * num_Z_states + Z_index
+                weights = None if self.dataset.weights is None else self.dataset.weights[rows]
+                counts = np.bincount(index[rows], weights=weights, minlength=X_card * Y_card * num_Z_states)
+            else:
+                counts = self._joint_state_counts([X, Y] + Zs, complete_samples_only=False)
+            counts = counts.reshape(X_card, Y_card, num_Z_states)
+
+            statistic, dof = _independence_statistic(counts, method)
+            p_value = chi2.sf(statistic, dof) if dof > 0 else 1.0
+            results.append((statistic, p_value, sufficient_data))
+
+        return results
+
+
+def _independence_statistic(counts, method):
+    """
+    Returns the chi-square or G statistic for the independence of the first two axes of
+    `counts` in each slice along the third axis, and its degrees of freedom.
+    """
+    XZ_counts = counts.sum(axis=1)
+    YZ_counts = counts.sum(axis=0)
+    Z_counts = XZ_counts.sum(axis=0)
+
+    # expected counts if X _|_ Y | Zs: N(X,Zs) * N(Y,Zs) / N(Zs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = XZ_counts[:, np.newaxis, :] * YZ_counts[np.newaxis, :, :] / Z_counts.astype(float)
+    if method == 'chi_square':
+        nonzero = expected > 0
+        statistic = (np.square(counts[nonzero] - expected[nonzero]) / expected[nonzero]).sum()
+    else:
+        nonzero = counts > 0
+        statistic = 2 * (counts[nonzero] * np.log(counts[nonzero] / expected[nonzero])).sum()
+
+    dof = (np.maximum((XZ_counts > 0).sum(axis=0) - 1, 0) * np.maximum((YZ_counts > 0).sum(axis=0) - 1, 0)).sum()
+    return statistic, int(dof)
+
+
+def _data_chunks(data, chunksize, variables):
+    """
+    Yields DataFrames with the consecutive rows of `data`, which is either an iterable
+    of DataFrames, the path of a CSV or Parquet file, or a numpy array (structured, or
+    2-D with a column for each of `variables`), read `chunksize` rows at a time.
+    """
+    if isinstance(data, six.string_types):
+        if data.endswith('.parquet'):
+            try:
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError("pyarrow is required to read Parquet files.")
+            parquet_file = pyarrow.parquet.ParquetFile(data)
+            for row_group in range(parquet_file.num_row_groups):
+                yield parquet_file.read_row_group(row_group).to_pandas()
+        else:
+            for chunk in pd.read_csv(data, chunksize=chunksize):
+                yield chunk
+    elif isinstance(data, np.ndarray):
+        for start in range(0, len(data), chunksize):
+            block = np.asarray(data[start:start + chunksize])
+            yield pd.DataFrame(block) if block.dtype.names else pd.DataFrame(block, columns=variables)
+    else:
+        for chunk in data:
+            yield chunk
+
+
+# Number of rows counted at a time by `BaseEstimator._count_states_many`
+_COUNT_BLOCK_SIZE = 2 ** 18
+
+
+# State count caches, by id of the DataFrame (or EncodedDataset) and by state names of its columns
+_state_count_caches = {}
+
+
+def _get_state_count_cache(estimator, max_bytes):
+    """
+    Returns the state count cache shared by all estimators with the same DataFrame (or
+    EncodedDataset) and state names as `estimator`. The cache is dropped with the data.
+    Weighted DataFrames are keyed by their EncodedDataset, as the weights may differ.
+    """
+    if estimator.data is not None and estimator.dataset.weights is None:
+        data = estimator.data
+    else:
+        data = estimator.dataset
+    data_id = id(data)
+    if data_id not in _state_count_caches:
+        reference = weakref.ref(data, lambda reference: _state_count_caches.pop(data_id, None))
+        _state_count_caches[data_id] = (reference, {})
+
+    caches = _state_count_caches[data_id][1]
+    dataset = estimator.dataset
+    signature = tuple((var, tuple(dataset.state_names[var])) for var in dataset.variables)
+    if signature not in caches:
+        missing = {var: bool(dataset.missing[:, index].any()) for var, index in dataset.variable_index.items()}
+        caches[signature] = _StateCountCache(max_bytes, missing)
+    cache = caches[signature]
+    cache.max_bytes = max(cache.max_bytes, max_bytes)
+    return cache
+
+
+class _StateCountCache(object):
+    def __init__(self, max_bytes, missing):
+        """
+        Least-recently-used cache of joint state count arrays, limited to `max_bytes`.
+        Queries for a set of variables are answered from cached counts of the same set,
+        or by marginalizing cached counts of the smallest superset, before falling
+        back to counting the data.
 
-        num_params = ((len(self.state_names[X])-1) *
-                      (len(self.state_names[Y])-1) *
-                      np.prod([len(self.state_names[Z]) for Z in Zs]))
-        sufficient_data = len(self.data) >= num_params * 5
-        if not sufficient_data:
-            warn("Insufficient data for testing {0} _|_ {1} | {2}. ".format(X, Y, Zs) +
-                 "At least {0} samples recommended, {1} present.".format(5 * num_params, len(self.data)))
-
-        # compute actual frequency/state_count table:
-        # = P(X,Y,Zs)
-        XYZ_state_counts = pd.crosstab(index=self.data[X],
-                                       columns=[self.data[Y]] + [self.data[Z] for Z in Zs])
-        # reindex to add missing rows & columns (if some values don't appear in data)
-        row_index = self.state_names[X]
-        column_index = pd.MultiIndex.from_product(
-                            [self.state_names[Y]] + [self.state_names[Z] for Z in Zs], names=[Y]+Zs)
-        XYZ_state_counts = XYZ_state_counts.reindex(index=row_index,    columns=column_index).fillna(0)
-
-        # compute the expected frequency/state_count table if X _|_ Y | Zs:
-        # = P(X|Zs)*P(Y|Zs)*P(Zs) = P(X,Zs)*P(Y,Zs)/P(Zs)
-        if Zs:
-            XZ_state_counts = XYZ_state_counts.sum(axis=1, level=Zs)  # marginalize out Y
-            YZ_state_counts = XYZ_state_counts.sum().unstack(Zs)      # marginalize out X
+        Parameters
+        ----------
+        max_bytes: int
+            Maximum total size of the cached count arrays in bytes.
+
+        missing: dict
+            dict of the form {var: bool} indicating which variables have missing values.
+            Counts of a superset with rows dropped because of missing values in the
+            additional variables can't be marginalized to the counts of a subset.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.missing = missing
+        self._entries = OrderedDict()
+
+    def get(self, variables, complete_samples_only, count_states):
+        # without missing values both ways of handling them give the same counts
+        complete_samples_only = complete_samples_only or not any(self.missing.values())
+        key = (frozenset(variables), complete_samples_only)
+
+        if key in self._entries:
+            order, counts = self._entries.pop(key)
         else:
-            XZ_state_counts = XYZ_state_counts.sum(axis=1)
-            YZ_state_counts = XYZ_state_counts.sum()
-        Z_state_counts = YZ_state_counts.sum()  # marginalize out both
-
-        XYZ_expected = pd.DataFrame(index=XYZ_state_counts.index, columns=XYZ_state_counts.columns)
-        for X_val in XYZ_expected.index:
-            if Zs:
-                for Y_val in XYZ_expected.columns.levels[0]:
-                    XYZ_expected.loc[X_val, Y_val] = (XZ_state_counts.loc[X_val] *
-                                                      YZ_state_counts.loc[Y_val] /
-                                                      Z_state_counts).values
+            superset = None
+            for (entry_variables, entry_complete), (entry_order, entry_counts) in self._entries.items():
+                if (entry_complete == complete_samples_only and key[0] < entry_variables and
+                        (superset is None or entry_counts.size < superset[1].size) and
+                        (complete_samples_only or not any(self.missing[var] for var in entry_variables - key[0]))):
+                    superset = (entry_order, entry_counts)
+
+            if superset is not None:
+                entry_order, entry_counts = superset
+                order = tuple(var for var in entry_order if var in key[0])
+                counts = entry_counts.sum(axis=tuple(axis for axis, var in enumerate(entry_order)
+                                                     if var not in key[0]))
             else:
-                for Y_val in XYZ_expected.columns:
-                    XYZ_expected.loc[X_val, Y_val] = (XZ_state_counts.loc[X_val] *
-                                                      YZ_state_counts.loc[Y_val] /
-                                                      float(Z_state_counts))
+                order = tuple(variables)
+                counts = count_states(order, complete_samples_only)
+            counts.flags.writeable = False
 
-        observed = XYZ_state_counts.values.flatten()
-        expected = XYZ_expected.fillna(0).values.flatten()
-        # remove elements where the expected value is 0;
-        # this also corrects the degrees of freedom for chisquare
-        observed, expected = zip(*((o, e) for o, e in zip(observed, expected) if not e == 0))
+            if counts.nbytes > self.max_bytes:
+                return np.transpose(counts, [order.index(var) for var in variables])
+            self.nbytes += counts.nbytes
+            while self.nbytes > self.max_bytes:
+                self.nbytes -= self._entries.popitem(last=False)[1][1].nbytes
 
-        chi2, significance_level = chisquare(observed, expected)
-
-        return (chi2, significance_level, sufficient_data)
+        # (re-)insert as most recently used entry
+        self._entries[key] = (order, counts)
+        return np.transpose(counts, [order.index(var) for var in variables])
 
 
 class ParameterEstimator(BaseEstimator):
-    def __init__(self, model, data, **kwargs):
+    # Whether the parameters are estimated from the state counts of the families of the model,
+    # which `BayesianModel.fit` then keeps as sufficient statistics for `BayesianModel.update`
+    _uses_state_counts = True
+
+    def __init__(self, model, data, chunksize=100000, **kwargs):
         """
         Base class for parameter estimators in pgmpy.
 
@@ -255,10 +520,21 @@ class ParameterEstimator(BaseEstimator):
         model: pgmpy.models.BayesianModel or pgmpy.models.MarkovModel or pgmpy.models.NoisyOrModel
             model for which parameter estimation is to be done
 
-        data: pandas DataFrame object
+        data: pandas DataFrame object, EncodedDataset, or a source of chunks of data
             datafame object with column names identical to the variable names of the model.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
+            Data that does not fit in memory can be given as an iterator of such DataFrames,
+            as the path of a CSV file (or of a Parquet file, with pyarrow installed), or as a
+            (memory-mapped) numpy array, either structured with a field for each variable or
+            2-D with the variables of the model in sorted order as columns. The state counts
+            of the families of the model (each variable and its parents) are then accumulated
+            chunk by chunk, and only these are available to the estimator.
+            For an iterator, `state_names` have to be given for all variables of the model;
+            for a file or array, missing state names are collected in an additional pass.
+
+        chunksize: int (optional, default 100000)
+            Number of rows read at a time from a file or array given as `data`.
 
         state_names: dict (optional)
             A dict indicating, for each variable, the discrete set of states (or values)
@@ -270,13 +546,79 @@ class ParameterEstimator(BaseEstimator):
             that contain `np.Nan` somewhere are ignored. If `False` then, for each variable,
             every row where neither the variable nor its parents are `np.NaN` is used.
             This sets the behavior of the `state_count`-method.
-        """
 
-        if not set(model.nodes()) <= set(data.columns.values):
-            raise ValueError("variable names of the model must be identical to column names in data")
+        count_cache_size: int (optional, default 0)
+            Memory budget in bytes for caching joint state counts, see `BaseEstimator`.
+
+        weights: array-like or column name (optional)
+            The weight of each row of the data, see `BaseEstimator`. For chunks of data,
+            the name of the column holding the weights.
+        """
         self.model = model
+        self._family_counts = None
+
+        if not isinstance(data, (pd.DataFrame, EncodedDataset)):
+            weights = kwargs.pop('weights', None)
+            data, kwargs['state_names'] = self._accumulate_family_counts(data, chunksize, weights=weights, **kwargs)
 
         super(ParameterEstimator, self).__init__(data, **kwargs)
+        if not set(model.nodes()) <= set(self.dataset.variables):
+            raise ValueError("variable names of the model must be identical to column names in data")
+
+    def _accumulate_family_counts(self, data, chunksize, state_names=None, complete_samples_only=True, weights=None,
+                                  **kwargs):
+        """
+        Accumulates the state counts of the families of the model over the chunks of `data`
+        into `self._family_counts`, weighted by the column `weights` of the chunks if given.
+        Returns an empty DataFrame with the variables of the model as columns, and the state
+        names, to initialize the estimator with.
+        """
+        if weights is not None and np.ndim(weights) != 0:
+            raise ValueError("weights have to be given as a column name to estimate from chunks of data.")
+        variables = sorted(self.model.nodes())
+        state_names = dict(state_names) if isinstance(state_names, dict) else {}
+        missing_state_names = [var for var in variables if var not in state_names]
+        if missing_state_names:
+            if not isinstance(data, (six.string_types, np.ndarray)):
+                raise ValueError("state_names have to be given for {0} to estimate from an iterator of chunks.".format(
+                    missing_state_names))
+            states = {var: set() for var in missing_state_names}
+            for chunk in _data_chunks(data, chunksize, variables):
+                for var in missing_state_names:
+                    states[var].update(chunk[var].dropna().unique())
+            state_names.update((var, sorted(states[var])) for var in missing_state_names)
+
+        families = [[node] + sorted(self.model.get_parents(node)) for node in variables]
+        empty_data = pd.DataFrame(columns=variables)
+        counts = BaseEstimator(empty_data, state_names=state_names)._joint_state_counts_many(families, False)
+        if weights is not None:
+            counts = [family_counts.astype(float) for family_counts in counts]
+        for chunk in _data_chunks(data, chunksize, variables):
+            if not set(variables) <= set(chunk.columns.values):
+                raise ValueError("variable names of the model must be identical to column names in data")
+            chunk_estimator = BaseEstimator(chunk, state_names=state_names,
+                                            complete_samples_only=complete_samples_only, weights=weights)
+            for family_counts, chunk_counts in zip(counts, chunk_estimator._joint_state_counts_many(families)):
+                family_counts += chunk_counts
+
+        self._family_counts = {tuple(family): family_counts for family, family_counts in zip(families, counts)}
+        return empty_data, state_names
+
+    def _joint_state_counts(self, variables, complete_samples_only=None):
+        if self._family_counts is None:
+            return super(ParameterEstimator, self)._joint_state_counts(variables, complete_samples_only)
+
+        if complete_samples_only is not None and complete_samples_only != self.complete_samples_only:
+            raise ValueError("complete_samples_only can't be changed for state counts accumulated from chunks.")
+        if tuple(variables) not in self._family_counts:
+            raise ValueError("Only the state counts of the families of the model are accumulated from chunks, "
+                             "not of {0}.".format(variables))
+        return self._family_counts[tuple(variables)]
+
+    def _joint_state_counts_many(self, variables_list, complete_samples_only=None):
+        if self._family_counts is None:
+            return super(ParameterEstimator, self)._joint_state_counts_many(variables_list, complete_samples_only)
+        return [self._joint_state_counts(variables, complete_samples_only) for variables in variables_list]
 
     def state_counts(self, variable, **kwargs):
         """
@@ -330,13 +672,13 @@ class ParameterEstimator(BaseEstimator):
 
 
 class StructureEstimator(BaseEstimator):
-    def __init__(self, data, **kwargs):
+    def __init__(self, data, n_jobs=1, **kwargs):
         """
         Base class for structure estimators in pgmpy.
 
         Parameters
         ----------
-        data: pandas DataFrame object
+        data: pandas DataFrame object or EncodedDataset
             datafame object where each column represents one variable.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
@@ -351,9 +693,82 @@ class StructureEstimator(BaseEstimator):
             that contain `np.Nan` somewhere are ignored. If `False` then, for each variable,
             every row where neither the variable nor its parents are `np.NaN` is used.
             This sets the behavior of the `state_count`-method.
+
+        count_cache_size: int (optional, default 0)
+            Memory budget in bytes for caching joint state counts, see `BaseEstimator`.
+
+        n_jobs: int (optional, default 1)
+            Number of worker processes used to compute local scores, -1 to use all CPUs.
+            The results do not depend on the number of workers.
         """
+        _check_n_jobs(n_jobs)
+        self.n_jobs = n_jobs
 
         super(StructureEstimator, self).__init__(data, **kwargs)
 
+    def _get_pool(self, worker_state=None):
+        """
+        Returns a process pool with n_jobs workers, or None if n_jobs is 1. Each worker
+        receives `worker_state` (by default the scoring method) once, when it is started;
+        on platforms that fork, it is shared with the parent process along with its data.
+        """
+        return _make_pool(self.n_jobs, self.scoring_method if worker_state is None else worker_state)
+
+    def _batch_local_scores(self, tasks, pool=None):
+        """
+        Computes `scoring_method.local_scores(variable, parents_list)` for each
+        `(variable, parents_list)` pair in `tasks`, and returns a list with the
+        array of scores of each pair. The parent sets are scored in chunks of a
+        fixed size, by the workers of `pool` if one is given. As the chunks do
+        not depend on the number of workers, neither do the scores.
+        """
+        chunk_size = _LOCAL_SCORES_CHUNK_SIZE
+        chunks = [(variable, parents_list[start:start + chunk_size])
+                  for variable, parents_list in tasks
+                  for start in range(0, len(parents_list), chunk_size)]
+        if pool is None:
+            chunk_scores = iter([self.scoring_method.local_scores(*chunk) for chunk in chunks])
+        else:
+            chunk_scores = iter(pool.map(_local_scores_worker, chunks))
+
+        # chunks are returned in order, so the scores of each task are the next chunks
+        return [np.concatenate([next(chunk_scores) for start in range(0, len(parents_list), chunk_size)] + [[]])
+                for variable, parents_list in tasks]
+
     def estimate(self):
         pass
+
+
+_LOCAL_SCORES_CHUNK_SIZE = 16
+
+
+def _check_n_jobs(n_jobs):
+    if not isinstance(n_jobs, numbers.Integral) or n_jobs == 0 or n_jobs < -1:
+        raise ValueError("n_jobs should be either -1 or a positive integer")
+
+
+def _make_pool(n_jobs, worker_state):
+    """
+    Returns a process pool with `n_jobs` workers (all CPUs if -1), or None if `n_jobs` is 1.
+    Each worker stores `worker_state` for the `*_worker` functions that are mapped over tasks.
+    """
+    n_jobs = cpu_count() if n_jobs == -1 else n_jobs
+    if n_jobs == 1:
+        return None
+    return Pool(n_jobs, initializer=_init_worker, initargs=(worker_state,))
+
+
+def _init_worker(worker_state):
+    "Stores the state used by the `*_worker` functions in a worker process."
+    global _worker_state
+    _worker_state = worker_state
+
+
+def _apply_worker(task):
+    "Calls the function `task[0]` with the worker state and the other items of `task` as arguments."
+    return task[0](_worker_state, *task[1:])
+
+
+def _local_scores_worker(args):
+    variable, parents_list = args
+    return _worker_state.local_scores(variable, parents_list)
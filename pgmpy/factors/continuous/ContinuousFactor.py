@@ -81,6 +81,10 @@ class ContinuousFactor(BaseFactor):
     def variable(self):
         return self.scope()[0]
 
+    @property
+    def variables(self):
+        return self.scope()
+
     def scope(self):
         """
         Returns the scope of the factor.
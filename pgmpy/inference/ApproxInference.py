@@ -0,0 +1,219 @@
+from __future__ import division
+
+import numpy as np
+from scipy.stats import norm
+
+from pgmpy.extern import six
+from pgmpy.inference import Inference
+from pgmpy.models import BayesianModel
+from pgmpy.factors.discrete import DiscreteFactor, State
+
+
+class LikelihoodWeighting(Inference):
+    """
+    Class for approximate inference on Bayesian Models using likelihood
+    weighted importance sampling.
+
+    Posterior marginals are estimated from the self-normalized importance
+    weights of samples generated by
+    `BayesianModelSampling.likelihood_weighted_sample`. 'Probabilistic
+    Graphical Model Principles and Techniques', Koller and Friedman,
+    Section 12.2.
+
+    Parameters
+    ----------
+    model: instance of BayesianModel
+        model on which inference queries will be computed
+
+    Attributes
+    ----------
+    effective_sample_size: float
+        Kish's effective sample size, (sum(w) ** 2) / sum(w ** 2), of the
+        samples used by the last query.
+
+    confidence_intervals: dict
+        dict of the form {var: numpy.array of shape (cardinality, 2)} holding
+        the lower and upper confidence bounds of every posterior probability
+        estimated by the last query.
+
+    num_samples: int
+        Number of samples drawn by the last query.
+
+    Examples
+    --------
+    >>> from pgmpy.models import BayesianModel
+    >>> from pgmpy.factors.discrete import TabularCPD
+    >>> from pgmpy.inference import LikelihoodWeighting
+    >>> student = BayesianModel([('diff', 'grade'), ('intel', 'grade')])
+    >>> cpd_d = TabularCPD('diff', 2, [[0.6], [0.4]])
+    >>> cpd_i = TabularCPD('intel', 2, [[0.7], [0.3]])
+    >>> cpd_g = TabularCPD('grade', 3, [[0.3, 0.05, 0.9, 0.5], [0.4, 0.25,
+    ...                    0.08, 0.3], [0.3, 0.7, 0.02, 0.2]],
+    ...                    ['intel', 'diff'], [2, 2])
+    >>> student.add_cpds(cpd_d, cpd_i, cpd_g)
+    >>> inference = LikelihoodWeighting(student)
+    >>> query = inference.query(['intel'], evidence={'grade': 0}, ess_target=2000)
+    >>> print(query['intel'])
+    +---------+--------------+
+    | intel   |   phi(intel) |
+    +=========+==============+
+    | intel_0 |       0.3861 |
+    +---------+--------------+
+    | intel_1 |       0.6139 |
+    +---------+--------------+
+    >>> inference.effective_sample_size
+    2441.38936721
+    """
+    def __init__(self, model):
+        if not isinstance(model, BayesianModel):
+            raise TypeError("Model expected type: BayesianModel, got type: ", type(model))
+
+        super(LikelihoodWeighting, self).__init__(model)
+        # Imported here as pgmpy.sampling itself depends on pgmpy.inference
+        from pgmpy.sampling import BayesianModelSampling
+        self._sampler = BayesianModelSampling(model)
+
+        self.effective_sample_size = None
+        self.confidence_intervals = None
+        self.num_samples = None
+
+    def _conditional_distribution(self, variable, sampled):
+        """
+        Returns the distribution of `variable` given its Markov blanket for
+        every row of `sampled`, as an array of shape (len(sampled), cardinality).
+        """
+        cpd = self.model.get_cpds(variable)
+        values = cpd.values[(slice(None),) + tuple(sampled[var] for var in cpd.variables[1:])].T
+        # The CPD of a root node is the same for every row
+        values = np.broadcast_to(values, (len(sampled), cpd.variable_card))
+
+        for child in self.model.successors(variable):
+            child_cpd = self.model.get_cpds(child)
+            # The first index is always an array, so numpy puts the broadcast
+            # sample dimension first and the states of `variable` second.
+            index = (sampled[child],) + tuple(slice(None) if var == variable else sampled[var]
+                                              for var in child_cpd.variables[1:])
+            values = values * child_cpd.values[index]
+
+        normalizer = values.sum(axis=1, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(normalizer > 0, values / normalizer, 0)
+
+    def query(self, variables, evidence=None, n_samples=10000, ess_target=None,
+              batch_size=1000, rao_blackwellize=True, confidence=0.95):
+        """
+        Estimates the posterior marginal distributions of `variables`.
+
+        Parameters
+        ----------
+        variables: list
+            list of variables for which you want to compute the probability
+
+        evidence: dict
+            a dict key, value pair as {var: state_of_var_observed}
+            None if no evidence
+
+        n_samples: int
+            Number of samples to draw. If `ess_target` is given this is the
+            maximum number of samples drawn.
+
+        ess_target: float or None
+            If given, samples are drawn in batches of `batch_size` until the
+            effective sample size reaches `ess_target` or `n_samples` samples
+            have been drawn.
+
+        batch_size: int
+            Number of samples drawn per batch when `ess_target` is given.
+
+        rao_blackwellize: boolean
+            If True, the indicator of the sampled state of each query variable
+            is replaced by its exact distribution given its Markov blanket in
+            the sample, which gives lower variance estimates.
+
+        confidence: float
+            Confidence level of the normal approximation intervals stored in
+            `confidence_intervals`.
+
+        Returns
+        -------
+        dict: dict of the form {var: DiscreteFactor} with the estimated
+            posterior distribution of each variable in `variables`.
+
+        Examples
+        --------
+        >>> from pgmpy.models import BayesianModel
+        >>> from pgmpy.factors.discrete import TabularCPD
+        >>> from pgmpy.inference import LikelihoodWeighting
+        >>> student = BayesianModel([('diff', 'grade'), ('intel', 'grade')])
+        >>> cpd_d = TabularCPD('diff', 2, [[0.6], [0.4]])
+        >>> cpd_i = TabularCPD('intel', 2, [[0.7], [0.3]])
+        >>> cpd_g = TabularCPD('grade', 3, [[0.3, 0.05, 0.9, 0.5], [0.4, 0.25,
+        ...                    0.08, 0.3], [0.3, 0.7, 0.02, 0.2]],
+        ...                    ['intel', 'diff'], [2, 2])
+        >>> student.add_cpds(cpd_d, cpd_i, cpd_g)
+        >>> inference = LikelihoodWeighting(student)
+        >>> phi_query = inference.query(['diff', 'intel'], evidence={'grade': 2})
+        >>> inference.confidence_intervals['diff']
+        array([[ 0.36962987,  0.3717436 ],
+               [ 0.6282564 ,  0.63037013]])
+        """
+        if isinstance(variables, six.string_types):
+            raise TypeError("variables must be a list of strings")
+        evidence = evidence if evidence else {}
+        if set(variables) & set(evidence):
+            raise ValueError("Query variables can't be part of evidence")
+        if not 0 < confidence < 1:
+            raise ValueError("confidence should be in the interval (0, 1), got: {confidence}".format(
+                confidence=confidence))
+        if n_samples < 1 or batch_size < 1:
+            raise ValueError("n_samples and batch_size should be positive integers")
+
+        evidence_states = [State(var, state) for var, state in evidence.items()]
+        sum_weight = 0
+        sum_weight_sq = 0
+        # Per variable sums of w * f, w ** 2 * f and w ** 2 * f ** 2, where f is
+        # the (Rao-Blackwellized) indicator of each state.
+        moments = {var: np.zeros((3, self.cardinality[var])) for var in variables}
+
+        num_samples = 0
+        while num_samples < n_samples:
+            size = min(batch_size, n_samples - num_samples) if ess_target is not None else n_samples
+            sampled = self._sampler.likelihood_weighted_sample(evidence_states, size, return_type='recarray')
+            weights = sampled['_weight']
+            num_samples += size
+
+            sum_weight += weights.sum()
+            sum_weight_sq += np.square(weights).sum()
+            for var in variables:
+                if rao_blackwellize:
+                    indicators = self._conditional_distribution(var, sampled)
+                else:
+                    indicators = np.eye(self.cardinality[var])[sampled[var]]
+                moments[var] += [weights.dot(indicators),
+                                 np.square(weights).dot(indicators),
+                                 np.square(weights).dot(np.square(indicators))]
+
+            if ess_target is not None and sum_weight > 0 and sum_weight ** 2 / sum_weight_sq >= ess_target:
+                break
+
+        if sum_weight <= 0:
+            raise ValueError("All samples have zero weight. The evidence might be impossible in the model.")
+
+        z = norm.ppf((1 + confidence) / 2)
+        self.num_samples = num_samples
+        self.effective_sample_size = sum_weight ** 2 / sum_weight_sq
+        self.confidence_intervals = {}
+        query_var_factor = {}
+        for var in variables:
+            weighted_sum, weighted_sq_sum, weighted_sq_sq_sum = moments[var]
+            probabilities = weighted_sum / sum_weight
+            # Delta method variance of the self-normalized estimator:
+            # sum(w ** 2 * (f - p) ** 2) / sum(w) ** 2
+            variance = (weighted_sq_sq_sum - 2 * probabilities * weighted_sq_sum +
+                        np.square(probabilities) * sum_weight_sq) / sum_weight ** 2
+            error = z * np.sqrt(np.maximum(variance, 0))
+            self.confidence_intervals[var] = np.column_stack((np.clip(probabilities - error, 0, 1),
+                                                              np.clip(probabilities + error, 0, 1)))
+            query_var_factor[var] = DiscreteFactor([var], [self.cardinality[var]], probabilities)
+
+        return query_var_factor
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+from collections import namedtuple, OrderedDict
+from string import ascii_letters
+
+import numpy as np
+
+from pgmpy.extern.six import string_types
+from pgmpy.factors.discrete import DiscreteFactor
+from pgmpy.inference import Inference
+from pgmpy.models import BayesianModel, MarkovModel, FactorGraph
+from pgmpy.utils import StateNameDecorator
+
+# One step of the circuit: the product of the `inputs` buffers summed (or maximized) over
+# `variable` into the `output` buffer, with the einsum subscripts precomputed at compile time.
+# `max_inputs`, `max_output`, `product` and `argmax` are the buffers of the max-product pass,
+# `gradients` the einsum subscripts, operands and targets propagating the adjoint of `output`
+# to the inputs.
+_Operation = namedtuple('_Operation', ['variable', 'scope', 'inputs', 'output', 'subscripts', 'max_inputs',
+                                       'max_output', 'product', 'product_subscripts', 'argmax', 'gradients'])
+
+
+class ArithmeticCircuit(Inference):
+    def __init__(self, model, elimination_order=None, **kwargs):
+        """
+        Compiles a model and an elimination order into an arithmetic circuit for answering
+        many queries on the same model quickly.
+
+        The circuit evaluates the network polynomial, i.e. the sum over all states of the
+        product of the factors of the model and of an indicator vector for each variable,
+        by eliminating the variables in `elimination_order`. Choosing the factors, the
+        scopes and the shapes of the intermediate results is done once at compile time,
+        which results in a flat tape of `numpy.einsum` operations over preallocated buffers.
+        A query then only sets the indicator vectors for the evidence and runs the tape:
+        an upward pass gives the probability of the evidence, and a downward pass (the
+        partial derivatives with respect to the indicators) gives the marginals of all
+        variables at once.
+
+        Parameters
+        ----------
+        model: BayesianModel, MarkovModel or FactorGraph
+            model for which the circuit is compiled.
+
+        elimination_order: list (optional)
+            The order in which all variables of the model are eliminated. If unspecified,
+            the variable giving the smallest intermediate result is eliminated first.
+
+        Examples
+        --------
+        >>> from pgmpy.models import BayesianModel
+        >>> from pgmpy.factors.discrete import TabularCPD
+        >>> from pgmpy.inference import ArithmeticCircuit
+        >>> student = BayesianModel([('diff', 'grade'), ('intel', 'grade')])
+        >>> diff_cpd = TabularCPD('diff', 2, [[0.2, 0.8]])
+        >>> intel_cpd = TabularCPD('intel', 2, [[0.3, 0.7]])
+        >>> grade_cpd = TabularCPD('grade', 3, [[0.1, 0.1, 0.1, 0.1],
+        ...                                     [0.1, 0.1, 0.1, 0.1],
+        ...                                     [0.8, 0.8, 0.8, 0.8]],
+        ...                        evidence=['diff', 'intel'], evidence_card=[2, 2])
+        >>> student.add_cpds(diff_cpd, intel_cpd, grade_cpd)
+        >>> circuit = ArithmeticCircuit(student)
+        >>> circuit.query(['grade'], evidence={'diff': 0})['grade'].values
+        array([ 0.1,  0.1,  0.8])
+        """
+        if not isinstance(model, (BayesianModel, MarkovModel, FactorGraph)):
+            raise ValueError("An ArithmeticCircuit can only be compiled for a BayesianModel, "
+                             "MarkovModel or FactorGraph.")
+        super(ArithmeticCircuit, self).__init__(model, **kwargs)
+
+        factors = OrderedDict()
+        for var in self.variables:
+            for factor in self.factors[var]:
+                factors[id(factor)] = factor
+
+        if elimination_order is None:
+            elimination_order = _elimination_order(list(self.variables),
+                                                   [factor.scope() for factor in factors.values()],
+                                                   self.cardinality)
+        elif sorted(elimination_order, key=str) != sorted(self.variables, key=str):
+            raise ValueError("elimination_order should contain each variable of the model once.")
+        self.elimination_order = list(elimination_order)
+
+        # leaves of the circuit: the factors, followed by the indicator vectors of the variables
+        self._values = []
+        working = []
+        self._factor_leaves = {}
+        for factor in factors.values():
+            self._factor_leaves[id(factor)] = len(self._values)
+            working.append((len(self._values), list(factor.scope())))
+            self._values.append(np.array(factor.values, dtype=float))
+        self._indicators = {}
+        for var in self.variables:
+            self._indicators[var] = len(self._values)
+            working.append((len(self._values), [var]))
+            self._values.append(np.ones(self.cardinality[var]))
+        self._ones = {var: np.ones(self.cardinality[var]) for var in self.variables}
+        self._evidence = {}
+
+        self._operations = []
+        self._max_outputs = {}
+        for var in self.elimination_order:
+            inputs = [item for item in working if var in item[1]]
+            working = [item for item in working if var not in item[1]]
+            scope = []
+            for _, input_scope in inputs:
+                scope.extend(v for v in input_scope if v != var and v not in scope)
+            output = self._add_operation(var, scope, inputs)
+            working.append((output, scope))
+        # the product of the remaining scalars, one for each connected component of the model
+        self._root = self._add_operation(None, [], working)
+
+        self._adjoints = [None] * len(self._values)
+        for operation in self._operations:
+            self._adjoints[operation.output] = np.empty_like(self._values[operation.output])
+        for index in self._indicators.values():
+            self._adjoints[index] = np.empty_like(self._values[index])
+
+    def _add_operation(self, variable, scope, inputs):
+        """
+        Appends the operation eliminating `variable` from the product of the `inputs`,
+        a list of (buffer index, scope) tuples, to the tape, allocates its buffers and
+        returns the index of its output buffer.
+        """
+        union = scope + ([variable] if variable is not None else [])
+        if len(union) > len(ascii_letters):
+            raise ValueError("Eliminating {var} results in a factor over more than {number} variables.".format(
+                var=variable, number=len(ascii_letters)))
+        letters = dict(zip(union, ascii_letters))
+        input_subscripts = [''.join(letters[var] for var in input_scope) for _, input_scope in inputs]
+        output_subscripts = ''.join(letters[var] for var in scope)
+        union_subscripts = ''.join(letters[var] for var in union)
+        shape = [self.cardinality[var] for var in scope]
+
+        output = len(self._values)
+        self._values.append(np.empty(shape))
+        max_output = len(self._values)
+        self._values.append(np.empty(shape))
+        self._max_outputs[output] = max_output
+        if variable is not None:
+            product = np.empty(shape + [self.cardinality[variable]])
+            argmax = np.empty(shape, dtype=np.intp)
+        else:
+            product, argmax = None, None
+
+        # d output / d input is the product of the other inputs, summed over the
+        # variables the input does not depend on; variables that only occur in the
+        # input itself are broadcast from a vector of ones
+        factor_leaves = set(self._factor_leaves.values())
+        gradients = []
+        for position, (index, input_scope) in enumerate(inputs):
+            if index in factor_leaves:
+                continue
+            others = [item for other_position, item in enumerate(inputs) if other_position != position]
+            covered = set(scope).union(*[other_scope for _, other_scope in others])
+            operands = [other_index for other_index, _ in others]
+            subscripts = [input_subscripts[other_position] for other_position in range(len(inputs))
+                          if other_position != position]
+            ones = [var for var in input_scope if var not in covered]
+            gradients.append((','.join([output_subscripts] + subscripts + [letters[var] for var in ones]) +
+                              '->' + input_subscripts[position], operands, ones, index))
+
+        self._operations.append(_Operation(
+            variable=variable, scope=scope, inputs=[index for index, _ in inputs], output=output,
+            subscripts=','.join(input_subscripts) + '->' + output_subscripts,
+            max_inputs=[self._max_outputs.get(index, index) for index, _ in inputs], max_output=max_output,
+            product=product, product_subscripts=','.join(input_subscripts) + '->' + union_subscripts,
+            argmax=argmax, gradients=gradients))
+        return output
+
+    @StateNameDecorator(argument='evidence', return_val=None)
+    def _set_evidence(self, evidence=None):
+        "Sets the indicator vectors of the circuit to `evidence`, a dict {var: state}."
+        evidence = evidence if evidence else {}
+        for var, state in evidence.items():
+            if var not in self._indicators:
+                raise ValueError("Evidence variable {var} is not in the model.".format(var=var))
+            if not 0 <= state < self.cardinality[var]:
+                raise ValueError("Evidence state {state} of {var} is out of range.".format(state=state, var=var))
+
+        for var in self._evidence:
+            self._values[self._indicators[var]].fill(1)
+        for var, state in evidence.items():
+            indicator = self._values[self._indicators[var]]
+            indicator.fill(0)
+            indicator[state] = 1
+        self._evidence = dict(evidence)
+
+    def _upward_pass(self):
+        "Evaluates the circuit for the current indicators and returns the value at the root."
+        values = self._values
+        for operation in self._operations:
+            np.einsum(operation.subscripts, *[values[index] for index in operation.inputs],
+                      out=values[operation.output])
+        return float(values[self._root])
+
+    def _downward_pass(self):
+        "Computes the partial derivatives of the root with respect to all buffers but the factors."
+        values, adjoints = self._values, self._adjoints
+        adjoints[self._root].fill(1)
+        for operation in reversed(self._operations):
+            for subscripts, operands, ones, target in operation.gradients:
+                factors = [values[index] for index in operands] + [self._ones[var] for var in ones]
+                np.einsum(subscripts, adjoints[operation.output], *factors, out=adjoints[target])
+
+    def query(self, variables, evidence=None):
+        """
+        Computes the posterior distribution of each of `variables` given the evidence,
+        with one upward and one downward pass through the circuit.
+
+        Parameters
+        ----------
+        variables: list
+            list of variables for which you want to compute the probability
+        evidence: dict
+            a dict key, value pair as {var: state_of_var_observed}
+            None if no evidence
+
+        Returns
+        -------
+        dict: {var: DiscreteFactor} with the normalized marginal of each variable.
+
+        Examples
+        --------
+        >>> from pgmpy.inference import ArithmeticCircuit
+        >>> from pgmpy.models import BayesianModel
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> values = pd.DataFrame(np.random.randint(low=0, high=2, size=(1000, 5)),
+        ...                       columns=['A', 'B', 'C', 'D', 'E'])
+        >>> model = BayesianModel([('A', 'B'), ('C', 'B'), ('C', 'D'), ('B', 'E')])
+        >>> model.fit(values)
+        >>> circuit = ArithmeticCircuit(model)
+        >>> phi_query = circuit.query(['A', 'B'], evidence={'E': 1})
+        """
+        if isinstance(variables, string_types):
+            raise TypeError("variables must be a list of strings")
+
+        self._set_evidence(evidence=evidence)
+        probability = self._upward_pass()
+        if probability <= 0:
+            raise ValueError("The evidence has zero probability.")
+        self._downward_pass()
+
+        query_var_factor = {}
+        for var in variables:
+            indicator = self._indicators[var]
+            marginal = self._adjoints[indicator] * self._values[indicator] / probability
+            query_var_factor[var] = DiscreteFactor([var], [self.cardinality[var]], marginal)
+        return query_var_factor
+
+    @StateNameDecorator(argument=None, return_val=True)
+    def map_query(self, variables=None, evidence=None):
+        """
+        Computes the most probable joint state of all variables that are not observed,
+        given the evidence, with one max-product pass through the circuit and a traceback
+        of the maximizing states. Unlike `VariableElimination.map_query`, the variables
+        that are not in `variables` are maximized jointly as well, not summed out.
+
+        Parameters
+        ----------
+        variables: list (optional)
+            list of variables whose states are returned; all variables that are
+            not in the evidence if unspecified.
+        evidence: dict
+            a dict key, value pair as {var: state_of_var_observed}
+            None if no evidence
+
+        Returns
+        -------
+        dict: {var: state} with the most probable state of each variable.
+
+        Examples
+        --------
+        >>> from pgmpy.inference import ArithmeticCircuit
+        >>> from pgmpy.models import BayesianModel
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> values = pd.DataFrame(np.random.randint(low=0, high=2, size=(1000, 5)),
+        ...                       columns=['A', 'B', 'C', 'D', 'E'])
+        >>> model = BayesianModel([('A', 'B'), ('C', 'B'), ('C', 'D'), ('B', 'E')])
+        >>> model.fit(values)
+        >>> circuit = ArithmeticCircuit(model)
+        >>> phi_query = circuit.map_query(['A', 'B'], evidence={'E': 1})
+        """
+        if isinstance(variables, string_types):
+            raise TypeError("variables must be a list of strings")
+
+        self._set_evidence(evidence=evidence)
+        values = self._values
+        for operation in self._operations:
+            inputs = [values[index] for index in operation.max_inputs]
+            if operation.variable is None:
+                np.einsum(operation.subscripts, *inputs, out=values[operation.max_output])
+            else:
+                np.einsum(operation.product_subscripts, *inputs, out=operation.product)
+                operation.product.argmax(axis=-1, out=operation.argmax)
+                operation.product.max(axis=-1, out=values[operation.max_output])
+        if values[self._max_outputs[self._root]] <= 0:
+            raise ValueError("The evidence has zero probability.")
+
+        assignment = {}
+        for operation in reversed(self._operations):
+            if operation.variable is not None:
+                scope_states = tuple(assignment[var] for var in operation.scope)
+                assignment[operation.variable] = int(operation.argmax[scope_states])
+
+        if variables is None:
+            variables = [var for var in self.variables if var not in self._evidence]
+        return {var: assignment[var] for var in variables}
+
+    def _model_updated(self, nodes):
+        """
+        Called by `BayesianModel.update`; copies the values of the updated CPDs into the
+        leaves of the circuit, which does not have to be compiled again.
+        """
+        old_factors = {node: [factor for factor in self.factors[node] if factor.scope()[0] == node][0]
+                       for node in nodes}
+        super(ArithmeticCircuit, self)._model_updated(nodes)
+        for node in nodes:
+            new_factor = [factor for factor in self.factors[node] if factor.scope()[0] == node][0]
+            leaf = self._factor_leaves.pop(id(old_factors[node]))
+            self._factor_leaves[id(new_factor)] = leaf
+            old_scope = old_factors[node].scope()
+            self._values[leaf][...] = np.transpose(new_factor.values,
+                                                   [new_factor.scope().index(var) for var in old_scope])
+
+
+def _elimination_order(variables, scopes, cardinality):
+    """
+    Returns a greedy elimination order of `variables` for factors with the given scopes,
+    which eliminates the variable with the smallest product of the cardinalities of its
+    neighbors (the size of the intermediate result) first.
+    """
+    neighbors = {var: set() for var in variables}
+    for scope in scopes:
+        for var in scope:
+            neighbors[var].update(scope)
+    for var in variables:
+        neighbors[var].discard(var)
+
+    order = []
+    remaining = list(variables)
+    while remaining:
+        var = min(remaining, key=lambda v: np.prod([cardinality[u] for u in neighbors[v]]))
+        remaining.remove(var)
+        order.append(var)
+        for neighbor in neighbors[var]:
+            neighbors[neighbor].update(neighbors[var])
+            neighbors[neighbor].discard(neighbor)
+            neighbors[neighbor].discard(var)
+    return order
@@ -330,6 +330,13 @@ class BeliefPropagation(Inference):
         self.clique_beliefs = {}
         self.sepset_beliefs = {}
 
+    def _model_updated(self, nodes):
+        super(BeliefPropagation, self)._model_updated(nodes)
+        # The factors of the junction tree are products of the CPDs, so it is built again
+        self.junction_tree = self.model.to_junction_tree()
+        self.clique_beliefs = {}
+        self.sepset_beliefs = {}
+
     def get_cliques(self):
         """
         Returns cliques used for belief propagation.
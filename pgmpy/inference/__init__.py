@@ -1,13 +1,17 @@
 from .base import Inference
 from .ExactInference import BeliefPropagation
 from .ExactInference import VariableElimination
+from .ArithmeticCircuit import ArithmeticCircuit
 from .dbn_inference import DBNInference
 from .mplp import Mplp
+from .ApproxInference import LikelihoodWeighting
 
 __all__ = ['Inference',
            'VariableElimination',
            'DBNInference',
            'BeliefPropagation',
+           'ArithmeticCircuit',
+           'LikelihoodWeighting',
            'BayesianModelSampling',
            'GibbsSampling',
            'Mplp',
@@ -76,6 +76,7 @@ class Inference(object):
                     cpd = cpd.to_factor()
                 for var in cpd.scope():
                     self.factors[var].append(cpd)
+            model._add_update_listener(self)
 
         elif isinstance(model, (MarkovModel, FactorGraph, JunctionTree)):
             self.cardinality = model.get_cardinality()
@@ -91,3 +92,15 @@ class Inference(object):
             self.interface_nodes = model.get_interface_nodes(0)
             self.one_and_half_model = BayesianModel(model.get_inter_edges() + model.get_intra_edges(1))
             self.one_and_half_model.add_cpds(*(model.get_cpds(time_slice=1) + cpd_inter))
+
+    def _model_updated(self, nodes):
+        """
+        Called by `BayesianModel.update` after the CPDs of `nodes` were updated in
+        place, to replace the factors of these CPDs. Subclasses holding results
+        derived from the factors should extend this to discard them.
+        """
+        for node in nodes:
+            factor = self.model.get_cpds(node).to_factor()
+            for var in factor.scope():
+                self.factors[var] = [factor if old_factor.scope()[0] == node else old_factor
+                                     for old_factor in self.factors[var]]
@@ -4,6 +4,7 @@ import itertools
 from collections import defaultdict
 import logging
 from operator import mul
+import weakref
 
 import networkx as nx
 import numpy as np
@@ -17,6 +18,9 @@ from pgmpy.extern import six
 from pgmpy.extern.six.moves import range, reduce
 from pgmpy.models.MarkovModel import MarkovModel
 
+# Objects (inference instances) to notify when CPDs are updated in place, by model
+_update_listeners = weakref.WeakKeyDictionary()
+
 
 class BayesianModel(DirectedGraph):
     """
@@ -91,6 +95,7 @@ class BayesianModel(DirectedGraph):
             self.add_edges_from(ebunch)
         self.cpds = []
         self.cardinalities = defaultdict(int)
+        self._sufficient_statistics = None
 
     def add_edge(self, u, v, **kwargs):
         """
@@ -670,7 +675,7 @@ class BayesianModel(DirectedGraph):
         mm = self.to_markov_model()
         return mm.to_junction_tree()
 
-    def fit(self, data, estimator=None, state_names=[], complete_samples_only=True, **kwargs):
+    def fit(self, data, estimator=None, state_names=[], complete_samples_only=True, chunksize=100000, **kwargs):
         """
         Estimates the CPD for each variable based on a given data set.
 
@@ -680,6 +685,9 @@ class BayesianModel(DirectedGraph):
             DataFrame object with column names identical to the variable names of the network.
             (If some values in the data are missing the data cells should be set to `numpy.NaN`.
             Note that pandas converts each column containing `numpy.NaN`s to dtype `float`.)
+            Data that does not fit in memory can also be given as an iterator of DataFrames,
+            the path of a CSV (or Parquet) file or a (memory-mapped) numpy array, which is then
+            counted in chunks. See `ParameterEstimator` for details.
 
         estimator: Estimator class
             One of:
@@ -698,6 +706,9 @@ class BayesianModel(DirectedGraph):
             that contain `np.Nan` somewhere are ignored. If `False` then, for each variable,
             every row where neither the variable nor its parents are `np.NaN` is used.
 
+        chunksize: int (default 100000)
+            Number of rows read at a time if `data` is a file or an array.
+
         Examples
         --------
         >>> import pandas as pd
@@ -712,7 +723,7 @@ class BayesianModel(DirectedGraph):
         <TabularCPD representing P(C:2 | A:2, B:2) at 0x7fb98a7b1f98>]
         """
 
-        from pgmpy.estimators import MaximumLikelihoodEstimator, BayesianEstimator, BaseEstimator
+        from pgmpy.estimators import MaximumLikelihoodEstimator, BaseEstimator, ParameterEstimator
 
         if estimator is None:
             estimator = MaximumLikelihoodEstimator
@@ -720,11 +731,119 @@ class BayesianModel(DirectedGraph):
             if not issubclass(estimator, BaseEstimator):
                 raise TypeError("Estimator object should be a valid pgmpy estimator.")
 
+        if not isinstance(data, pd.DataFrame):
+            kwargs_estimator = {'chunksize': chunksize}
+        else:
+            kwargs_estimator = {}
         _estimator = estimator(self, data, state_names=state_names,
-                               complete_samples_only=complete_samples_only)
+                               complete_samples_only=complete_samples_only, **kwargs_estimator)
+
+        if isinstance(_estimator, ParameterEstimator) and _estimator._uses_state_counts:
+            # Keep the state counts of each family as sufficient statistics for `update`
+            families = self._families()
+            counts = [np.array(family_counts, dtype=float)
+                      for family_counts in _estimator._joint_state_counts_many(families)]
+            _estimator._family_counts = dict(zip(families, counts))
+            self._sufficient_statistics = {
+                'estimator': estimator,
+                'state_names': {node: _estimator.state_names[node] for node in self.nodes()},
+                'complete_samples_only': complete_samples_only,
+                'kwargs': kwargs,
+                'counts': dict(zip(families, counts))}
+        else:
+            self._sufficient_statistics = None
+
         cpds_list = _estimator.get_parameters(**kwargs)
         self.add_cpds(*cpds_list)
 
+    def update(self, data, decay=None, chunksize=100000):
+        """
+        Updates the CPDs of a fitted model with new observations, without the data
+        it has been fitted to. The state counts of each variable and its parents are
+        kept by `fit` as sufficient statistics; the counts of `data` are added to them
+        and the CPDs are estimated again with the estimator and arguments used by `fit`.
+        The values of the CPDs are updated in place, and inference objects created for
+        the model are notified to refresh their factors.
+
+        Parameters
+        ----------
+        data: pandas DataFrame object
+            DataFrame object with column names identical to the variable names of the network,
+            or any other source of data accepted by `fit`. It may only contain the states
+            that the variables had in the data the model was fitted to (or the
+            `state_names` given to `fit`).
+
+        decay: float (optional)
+            If given, the counts so far are multiplied by `decay` (0 < decay <= 1) before
+            the counts of `data` are added, so that old observations are forgotten
+            exponentially for data that changes over time. With `decay=None` all
+            observations are weighted equally, as if the model was fitted to all of them.
+
+        chunksize: int (default 100000)
+            Number of rows read at a time if `data` is a file or an array.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> from pgmpy.models import BayesianModel
+        >>> model = BayesianModel([('A', 'B')])
+        >>> model.fit(pd.DataFrame(data={'A': [0, 0, 1, 1], 'B': [0, 1, 1, 1]}))
+        >>> model.update(pd.DataFrame(data={'A': [1, 1], 'B': [0, 0]}))
+        >>> model.get_cpds('B').values
+        array([[ 0.5,  0.5],
+               [ 0.5,  0.5]])
+        >>> model.update(pd.DataFrame(data={'A': [0, 0], 'B': [0, 0]}), decay=0.5)
+        >>> model.get_cpds('B').values
+        array([[ 0.83333333,  0.5       ],
+               [ 0.16666667,  0.5       ]])
+        """
+        if self._sufficient_statistics is None:
+            raise ValueError("The model has to be fitted to data, with an estimator using state counts, "
+                             "before it can be updated.")
+        if decay is not None and not 0 < decay <= 1:
+            raise ValueError("decay should be in the interval (0, 1], got: {decay}".format(decay=decay))
+
+        statistics = self._sufficient_statistics
+        families = self._families()
+        if set(families) != set(statistics['counts']):
+            raise ValueError("The structure of the model has changed since it was fitted.")
+
+        kwargs_estimator = {} if isinstance(data, pd.DataFrame) else {'chunksize': chunksize}
+        _estimator = statistics['estimator'](self, data, state_names=statistics['state_names'],
+                                             complete_samples_only=statistics['complete_samples_only'],
+                                             **kwargs_estimator)
+        for family, family_counts in zip(families, _estimator._joint_state_counts_many(families)):
+            counts = statistics['counts'][family]
+            statistics['counts'][family] = (counts if decay is None else decay * counts) + family_counts
+        _estimator._family_counts = dict(statistics['counts'])
+
+        for cpd in _estimator.get_parameters(**statistics['kwargs']):
+            old_cpd = self.get_cpds(cpd.variable)
+            if (isinstance(old_cpd, TabularCPD) and old_cpd.variables == cpd.variables and
+                    old_cpd.values.shape == cpd.values.shape):
+                old_cpd.values[...] = cpd.values
+            else:
+                self.add_cpds(cpd)
+
+        updated_nodes = [family[0] for family in families]
+        for listener in list(_update_listeners.get(self, ())):
+            listener._model_updated(updated_nodes)
+
+    def _families(self):
+        """
+        Returns the families of the model, i.e. tuples of each variable and its sorted parents.
+        """
+        return [tuple([node] + sorted(self.get_parents(node))) for node in self.nodes()]
+
+    def _add_update_listener(self, listener):
+        """
+        Registers `listener` to be notified by `update`, through `listener._model_updated(nodes)`,
+        when the CPDs of `nodes` are updated in place. Only a weak reference to `listener` is kept.
+        """
+        if self not in _update_listeners:
+            _update_listeners[self] = weakref.WeakSet()
+        _update_listeners[self].add(listener)
+
     def predict(self, data):
         """
         Predicts states of all the missing variables.
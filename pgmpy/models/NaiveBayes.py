@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+
+from pgmpy.factors.discrete import TabularCPD
 from pgmpy.independencies import Independencies
 from pgmpy.models import BayesianModel
 
@@ -167,10 +171,12 @@ class NaiveBayes(BayesianModel):
                         set(self.children_nodes) - set(variable)), self.parent_node])
         return independencies
 
-    def fit(self, data, parent_node=None, estimator=None):
+    def fit(self, data, parent_node=None, estimator=None, **kwargs):
         """
         Computes the CPD for each node from a given data in the form of a pandas dataframe.
         If a variable from the data is not present in the model, it adds that node into the model.
+        The state counts of all features and the parent node are computed in a single scan
+        over the data, see `BayesianModel.fit`.
 
         Parameters
         ----------
@@ -185,6 +191,9 @@ class NaiveBayes(BayesianModel):
             Any pgmpy estimator. If nothing is specified, the default ``MaximumLikelihoodEstimator``
             would be used.
 
+        **kwargs:
+            Additional arguments of `BayesianModel.fit`, such as `state_names`.
+
         Examples
         --------
         >>> import numpy as np
@@ -213,4 +222,101 @@ class NaiveBayes(BayesianModel):
         for child_node in data.columns:
             if child_node != parent_node:
                 self.add_edge(parent_node, child_node)
-        super(NaiveBayes, self).fit(data, estimator)
+        super(NaiveBayes, self).fit(data, estimator, **kwargs)
+
+    def predict(self, data):
+        """
+        Predicts the most probable state of the parent node for each row of `data`.
+        If only the parent node is missing in `data`, its posterior is computed for all
+        rows at once from the CPDs of the features, see `predict_probability`; otherwise
+        all missing variables are predicted by `BayesianModel.predict`.
+
+        Parameters
+        ----------
+        data : pandas DataFrame object
+            A DataFrame object with column names same as the variables in the model.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> import pandas as pd
+        >>> from pgmpy.models import NaiveBayes
+        >>> values = pd.DataFrame(np.random.randint(low=0, high=2, size=(1000, 5)),
+        ...                       columns=['A', 'B', 'C', 'D', 'E'])
+        >>> model = NaiveBayes()
+        >>> model.fit(values[:800], 'A')
+        >>> y_pred = model.predict(values[800:].drop('A', axis=1))
+        """
+        if not self._predicts_parent_node(data):
+            return super(NaiveBayes, self).predict(data)
+
+        states = self.get_cpds(self.parent_node).state_names[self.parent_node]
+        prediction = np.asarray(states)[self._log_posterior(data).argmax(axis=1)]
+        return pd.DataFrame({self.parent_node: prediction}, index=data.index)
+
+    def predict_probability(self, data):
+        """
+        Predicts the probabilities of the states of the parent node for each row of `data`.
+        If only the parent node is missing in `data`, the log-posterior of each row is the
+        log-probability of the parent node plus the log-probabilities of the observed
+        features given the parent node, which are looked up in the log-CPDs of the features
+        for all rows at once, and normalized. Missing values (`numpy.NaN`) of the features
+        are ignored. Otherwise all missing variables are predicted by
+        `BayesianModel.predict_probability`.
+
+        Parameters
+        ----------
+        data : pandas DataFrame object
+            A DataFrame object with column names same as the variables in the model.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> from pgmpy.models import NaiveBayes
+        >>> values = pd.DataFrame(data={'A': [0, 0, 0, 1, 1], 'B': [0, 0, 1, 1, 1], 'C': [0, 1, 1, 1, 1]})
+        >>> model = NaiveBayes()
+        >>> model.fit(values, 'A')
+        >>> model.predict_probability(pd.DataFrame(data={'B': [0, 1], 'C': [1, 1]}))
+            A_0   A_1
+        0  1.00  0.00
+        1  0.25  0.75
+        """
+        if not self._predicts_parent_node(data):
+            return super(NaiveBayes, self).predict_probability(data)
+
+        states = self.get_cpds(self.parent_node).state_names[self.parent_node]
+        probabilities = np.exp(self._log_posterior(data))
+        return pd.DataFrame(probabilities, index=data.index,
+                            columns=[str(self.parent_node) + '_' + str(state) for state in states])
+
+    def _predicts_parent_node(self, data):
+        """
+        Checks whether the parent node is the only variable missing in `data`, and all
+        CPDs are tabular, so that its posterior can be computed in a vectorized way.
+        """
+        return (self.parent_node is not None and set(self.nodes()) - set(data.columns) == {self.parent_node} and
+                not set(data.columns) - set(self.nodes()) and
+                all(isinstance(cpd, TabularCPD) for cpd in self.get_cpds()))
+
+    def _log_posterior(self, data):
+        """
+        Returns an array of shape (number of rows of `data`, cardinality of the parent node)
+        with the normalized log-posterior of the parent node given the features in each row.
+        """
+        parent_cpd = self.get_cpds(self.parent_node)
+        with np.errstate(divide='ignore'):
+            log_posterior = np.tile(np.log(parent_cpd.get_values()[:, 0]), (len(data), 1))
+            for feature in data.columns:
+                cpd = self.get_cpds(feature)
+                column = data[feature]
+                codes = pd.Categorical(column, categories=cpd.state_names[feature]).codes
+                if ((codes < 0) & column.notnull().values).any():
+                    raise ValueError("Data contains unexpected states for variable '{0}'.".format(str(feature)))
+                # the last row of the table, selected by the code -1 of missing values, is zero
+                log_table = np.vstack([np.log(cpd.get_values()), np.zeros((1, parent_cpd.variable_card))])
+                log_posterior += log_table[codes]
+
+        # normalization with the log-sum-exp of each row
+        log_posterior -= log_posterior.max(axis=1)[:, np.newaxis]
+        log_posterior -= np.log(np.exp(log_posterior).sum(axis=1))[:, np.newaxis]
+        return log_posterior
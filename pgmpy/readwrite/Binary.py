@@ -0,0 +1,322 @@
+import json
+import struct
+
+import networkx as nx
+import numpy as np
+
+from pgmpy.models import BayesianModel, JunctionTree
+from pgmpy.factors.discrete import TabularCPD, DiscreteFactor
+from pgmpy.extern import six
+
+# File layout: magic, format version, length of the JSON header, the header, and the
+# CPD (and belief) values as one blob of little-endian float64, aligned to _ALIGNMENT bytes.
+_MAGIC = b'PGMPYBIN'
+_VERSION = 1
+_PREFIX = struct.Struct('<8sIQ')
+_ALIGNMENT = 64
+_DTYPE = np.dtype('<f8')
+
+
+class BinaryWriter(object):
+
+    """
+    Base class for writing models in the pgmpy binary format
+    """
+
+    def __init__(self, model, belief_propagation=None):
+        """
+        Initialise a BinaryWriter object.
+
+        The binary format consists of a JSON header with the variables, their cardinalities
+        and state names, the edges and the position of each CPD, followed by the values of
+        all CPDs as one contiguous blob of float64, which `BinaryReader` maps into memory
+        instead of parsing it. Variable names and states have to be strings or numbers.
+
+        Parameters
+        ----------
+        model: BayesianModel instance
+            A model with a TabularCPD for each variable.
+
+        belief_propagation: BeliefPropagation instance (optional)
+            A calibrated BeliefPropagation object of `model`, whose clique and sepset
+            beliefs are stored as well.
+
+        Examples
+        --------
+        >>> from pgmpy.readwrite import BinaryWriter
+        >>> writer = BinaryWriter(model)
+        >>> writer.write_binary('model.pgmb')
+        """
+        if not isinstance(model, BayesianModel):
+            raise TypeError("model must be an instance of BayesianModel")
+        cpds = model.get_cpds()
+        if not all(isinstance(cpd, TabularCPD) for cpd in cpds):
+            raise ValueError("Only models with TabularCPDs can be written in the binary format.")
+        if sorted((cpd.variable for cpd in cpds), key=str) != sorted(model.nodes(), key=str):
+            raise ValueError("The model should have one CPD for each variable.")
+
+        self.model = model
+        self.variables = list(model.nodes())
+        for var in self.variables:
+            _json_value(var)
+        index = {var: position for position, var in enumerate(self.variables)}
+
+        # CPD values, and the variable indices of their scopes
+        self.arrays = []
+        self.cpds = []
+        state_names = {}
+        for cpd in cpds:
+            self.cpds.append([index[var] for var in cpd.variables])
+            self.arrays.append(cpd.values)
+            if cpd.state_names and cpd.variable in cpd.state_names:
+                state_names[cpd.variable] = [_json_value(state) for state in cpd.state_names[cpd.variable]]
+
+        cardinality = model.get_cardinality()
+        self.header = {'name': model.name or None,
+                       'variables': self.variables,
+                       'cardinality': [int(cardinality[var]) for var in self.variables],
+                       'state_names': [state_names.get(var) for var in self.variables],
+                       'edges': [[index[u], index[v]] for u, v in model.edges()],
+                       'cpds': self.cpds,
+                       'beliefs': None}
+
+        if belief_propagation is not None:
+            clique_beliefs = belief_propagation.get_clique_beliefs()
+            if not clique_beliefs:
+                raise ValueError("The BeliefPropagation object is not calibrated.")
+            cliques = list(clique_beliefs)
+            clique_index = {clique: position for position, clique in enumerate(cliques)}
+            beliefs = {'cliques': [], 'sepsets': []}
+            for clique in cliques:
+                factor = clique_beliefs[clique]
+                beliefs['cliques'].append([[index[var] for var in clique], [index[var] for var in factor.variables]])
+                self.arrays.append(factor.values)
+            for sepset_key, factor in belief_propagation.get_sepset_beliefs().items():
+                if factor is None:
+                    raise ValueError("The BeliefPropagation object is not calibrated.")
+                beliefs['sepsets'].append([sorted(clique_index[clique] for clique in sepset_key),
+                                           [index[var] for var in factor.variables]])
+                self.arrays.append(factor.values)
+            self.header['beliefs'] = beliefs
+
+    def write_binary(self, filename):
+        """
+        Writes the model into a file in the pgmpy binary format.
+
+        Parameters
+        ----------
+        filename: Name of the file
+
+        Examples
+        --------
+        >>> from pgmpy.readwrite import BinaryWriter
+        >>> writer = BinaryWriter(model)
+        >>> writer.write_binary('model.pgmb')
+        """
+        header = json.dumps(self.header, separators=(',', ':')).encode('utf-8')
+        with open(filename, 'wb') as fout:
+            fout.write(_PREFIX.pack(_MAGIC, _VERSION, len(header)))
+            fout.write(header)
+            fout.write(b'\0' * (_blob_offset(len(header)) - _PREFIX.size - len(header)))
+            for values in self.arrays:
+                fout.write(np.ascontiguousarray(values, dtype=_DTYPE).tobytes())
+
+
+class BinaryReader(object):
+
+    """
+    Base class for reading models in the pgmpy binary format
+    """
+
+    def __init__(self, path, mmap=True):
+        """
+        Initialise a BinaryReader object. Only the header of the file is parsed; the values
+        of the CPDs are memory-mapped (copy-on-write, so the file is never modified) and the
+        CPDs of the model are views of the mapped blob, without copying.
+
+        Parameters
+        ----------
+        path: str
+            File in the pgmpy binary format, see `BinaryWriter`.
+
+        mmap: bool (default True)
+            Whether to memory-map the values, or to read them into memory.
+
+        Examples
+        --------
+        >>> from pgmpy.readwrite import BinaryReader
+        >>> reader = BinaryReader('model.pgmb')
+        >>> model = reader.get_model()
+        """
+        with open(path, 'rb') as network:
+            prefix = network.read(_PREFIX.size)
+            if len(prefix) != _PREFIX.size:
+                raise ValueError("{path} is not a file in the pgmpy binary format.".format(path=path))
+            magic, version, header_length = _PREFIX.unpack(prefix)
+            if magic != _MAGIC:
+                raise ValueError("{path} is not a file in the pgmpy binary format.".format(path=path))
+            if version > _VERSION:
+                raise ValueError("Version {version} of the pgmpy binary format is not supported.".format(
+                    version=version))
+            self.header = json.loads(network.read(header_length).decode('utf-8'))
+
+            offset = _blob_offset(header_length)
+            if mmap:
+                # slices of a plain ndarray view of the memmap are cheaper to create
+                self.blob = np.memmap(path, dtype=_DTYPE, mode='c', offset=offset).view(np.ndarray)
+            else:
+                network.seek(offset)
+                self.blob = np.fromfile(network, dtype=_DTYPE)
+
+        self.variables = self.header['variables']
+        self.cardinality = self.header['cardinality']
+        self._position = 0
+
+    def _next_array(self, shape):
+        "Returns a view of the next `shape` values in the blob."
+        size = 1
+        for dimension in shape:
+            size *= dimension
+        if self._position + size > len(self.blob):
+            raise ValueError("The file is truncated.")
+        values = self.blob[self._position:self._position + size].reshape(shape)
+        self._position += size
+        return values
+
+    def get_model(self):
+        """
+        Returns the BayesianModel stored in the file. The CPDs share memory with the blob
+        of values of the reader; `update` them in place without affecting the file.
+
+        Examples
+        --------
+        >>> from pgmpy.readwrite import BinaryReader
+        >>> reader = BinaryReader('model.pgmb')
+        >>> reader.get_model()
+        <pgmpy.models.BayesianModel.BayesianModel object at 0x7f20af154320>
+        """
+        variables, cardinality = self.variables, self.cardinality
+        state_names = self.header['state_names']
+
+        model = BayesianModel()
+        # The file has been written from a model, so the edges are added without checking
+        # each of them for cycles, and the graph is checked to be acyclic once instead
+        nx.DiGraph.add_nodes_from(model, variables)
+        nx.DiGraph.add_edges_from(model, [(variables[u], variables[v]) for u, v in self.header['edges']])
+        if not nx.is_directed_acyclic_graph(model):
+            raise ValueError("The edges in the file contain a cycle.")
+        if self.header['name']:
+            model.name = self.header['name']
+
+        self._position = 0
+        cpds = []
+        for scope in self.header['cpds']:
+            cpd_variables = [variables[var] for var in scope]
+            if set(cpd_variables[1:]) != set(model.pred[cpd_variables[0]]):
+                raise ValueError("The CPD of {var} does not match its parents.".format(var=cpd_variables[0]))
+            shape = [cardinality[var] for var in scope]
+            cpd_state_names = [state_names[var] for var in scope]
+            cpds.append(_tabular_cpd(cpd_variables, shape, self._next_array(shape),
+                                     None if None in cpd_state_names else dict(zip(cpd_variables, cpd_state_names))))
+        if len(cpds) != len(variables) or len(set(cpd.variable for cpd in cpds)) != len(variables):
+            raise ValueError("The file should contain one CPD for each variable.")
+        model.cpds = cpds
+        return model
+
+    def get_beliefs(self):
+        """
+        Returns the calibrated clique and sepset beliefs stored with the model, in the
+        format of `BeliefPropagation.get_clique_beliefs` and `get_sepset_beliefs`.
+
+        Returns
+        -------
+        tuple: (dict {clique: DiscreteFactor}, dict {frozenset of two cliques: DiscreteFactor})
+
+        Examples
+        --------
+        >>> from pgmpy.readwrite import BinaryReader
+        >>> clique_beliefs, sepset_beliefs = BinaryReader('model.pgmb').get_beliefs()
+        """
+        beliefs = self.header['beliefs']
+        if beliefs is None:
+            raise ValueError("The file does not contain beliefs.")
+        variables, cardinality = self.variables, self.cardinality
+
+        # the beliefs are stored after the CPDs
+        self._position = sum(int(np.prod([cardinality[var] for var in scope])) for scope in self.header['cpds'])
+        cliques = []
+        clique_beliefs = {}
+        for clique, scope in beliefs['cliques']:
+            clique = tuple(variables[var] for var in clique)
+            cliques.append(clique)
+            clique_beliefs[clique] = _discrete_factor([variables[var] for var in scope],
+                                                      [cardinality[var] for var in scope],
+                                                      self._next_array([cardinality[var] for var in scope]))
+        sepset_beliefs = {}
+        for clique_pair, scope in beliefs['sepsets']:
+            sepset_beliefs[frozenset(cliques[clique] for clique in clique_pair)] = _discrete_factor(
+                [variables[var] for var in scope], [cardinality[var] for var in scope],
+                self._next_array([cardinality[var] for var in scope]))
+        return clique_beliefs, sepset_beliefs
+
+    def get_junction_tree(self):
+        """
+        Returns the calibrated junction tree stored with the model, with the clique
+        beliefs as its factors.
+
+        Examples
+        --------
+        >>> from pgmpy.readwrite import BinaryReader
+        >>> junction_tree = BinaryReader('model.pgmb').get_junction_tree()
+        """
+        clique_beliefs, sepset_beliefs = self.get_beliefs()
+        junction_tree = JunctionTree()
+        junction_tree.add_nodes_from(clique_beliefs)
+        junction_tree.add_edges_from([tuple(clique_pair) for clique_pair in sepset_beliefs])
+        junction_tree.add_factors(*clique_beliefs.values())
+        return junction_tree
+
+
+def _blob_offset(header_length):
+    "Returns the position of the blob of values, after the header, aligned to _ALIGNMENT bytes."
+    end = _PREFIX.size + header_length
+    return (end + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _json_value(value):
+    """
+    Returns `value` as it is stored in the JSON header, converting numpy scalars, and raises
+    a ValueError for variable names and states that can't be stored.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if not isinstance(value, six.string_types + six.integer_types + (float, bool)):
+        raise ValueError("Variable names and states have to be strings or numbers, got: {value}".format(
+            value=repr(value)))
+    return value
+
+
+def _tabular_cpd(variables, cardinality, values, state_names):
+    """
+    Returns a TabularCPD with `values` as its values array, without copying them. The
+    constructor is bypassed, as it copies and validates the values, which dominates the
+    time to read large models; the shapes have been checked against the header.
+    """
+    cpd = TabularCPD.__new__(TabularCPD)
+    cpd.variable = variables[0]
+    cpd.variable_card = cardinality[0]
+    cpd.variables = variables
+    cpd.cardinality = np.array(cardinality, dtype=int)
+    cpd.values = values
+    cpd.state_names = state_names
+    return cpd
+
+
+def _discrete_factor(variables, cardinality, values):
+    "Returns a DiscreteFactor with `values` as its values array, without copying them."
+    factor = DiscreteFactor.__new__(DiscreteFactor)
+    factor.variables = variables
+    factor.cardinality = np.array(cardinality, dtype=int)
+    factor.values = values
+    factor.state_names = None
+    return factor
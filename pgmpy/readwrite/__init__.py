@@ -5,6 +5,7 @@ from .PomdpX import PomdpXReader, PomdpXWriter
 from .XMLBeliefNetwork import XBNReader, XBNWriter
 from .UAI import UAIReader, UAIWriter
 from .BIF import BIFReader, BIFWriter
+from .Binary import BinaryReader, BinaryWriter
 
 __all__ = ['ProbModelXMLReader',
            'ProbModelXMLWriter',
@@ -22,4 +23,6 @@ __all__ = ['ProbModelXMLReader',
            'UAIReader',
            'UAIWriter',
            'BIFReader',
-           'BIFWriter']
+           'BIFWriter',
+           'BinaryReader',
+           'BinaryWriter']
@@ -9,6 +9,7 @@ import numpy as np
 
 from pgmpy.utils import _check_1d_array_object, _check_length_equal
 from pgmpy.sampling import LeapFrog, BaseSimulateHamiltonianDynamics, BaseGradLogPDF, _return_samples
+from pgmpy.sampling.base import _get_velocity
 
 
 class HamiltonianMC(object):
@@ -84,6 +85,61 @@ class HamiltonianMC(object):
         self.simulate_dynamics = simulate_dynamics
         self.accepted_proposals = 0.0
         self.acceptance_rate = 0
+        # Inverse mass matrix of the kinetic energy, None stands for identity
+        self.inverse_mass_matrix = None
+        self._mass_matrix_cholesky = None
+
+    def _set_inverse_mass_matrix(self, inverse_mass_matrix):
+        """
+        Sets the diagonal (1d) or dense (2d) inverse mass matrix used for
+        drawing momentum, kinetic energy and simulating dynamics
+        """
+        self.inverse_mass_matrix = inverse_mass_matrix
+
+        if inverse_mass_matrix is None or inverse_mass_matrix.ndim == 1:
+            self._mass_matrix_cholesky = None
+        else:
+            self._mass_matrix_cholesky = np.linalg.cholesky(np.linalg.inv(inverse_mass_matrix))
+
+    def _sample_momentum(self, position):
+        """
+        Draws momentum from N(0, M), where M is the mass matrix
+        """
+        momentum = np.reshape(np.random.normal(0, 1, len(position)), position.shape)
+
+        if self.inverse_mass_matrix is None:
+            return momentum
+        elif self.inverse_mass_matrix.ndim == 1:
+            return momentum / np.sqrt(self.inverse_mass_matrix)
+        else:
+            return np.dot(self._mass_matrix_cholesky, momentum)
+
+    def _kinetic_energy(self, momentum):
+        """
+        Returns the kinetic energy 0.5 * momentum.T * inverse_mass_matrix * momentum
+        """
+        return 0.5 * np.dot(momentum, _get_velocity(momentum, self.inverse_mass_matrix))
+
+    def _simulate_dynamics(self, position, momentum, stepsize, grad_log_position=None, return_log_pdf=False):
+        """
+        Proposes new values of position and momentum using simulate_dynamics. If `return_log_pdf`
+        is True, the log of the distribution at the new position is returned as well, taken from
+        the gradient evaluation of simulate_dynamics where it is available.
+        """
+        if self.inverse_mass_matrix is None:
+            dynamics = self.simulate_dynamics(self.model, position, momentum, stepsize,
+                                              self.grad_log_pdf, grad_log_position)
+        else:
+            dynamics = self.simulate_dynamics(self.model, position, momentum, stepsize, self.grad_log_pdf,
+                                              grad_log_position, inverse_mass_matrix=self.inverse_mass_matrix)
+
+        if not return_log_pdf:
+            return dynamics.get_proposed_values()
+        position_bar, momentum_bar, grad_log = dynamics.get_proposed_values()
+        log_pdf = getattr(dynamics, 'new_log_pdf', None)
+        if log_pdf is None:
+            _, log_pdf = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
+        return position_bar, momentum_bar, grad_log, log_pdf
 
     def _acceptance_prob(self, position, position_bar, momentum, momentum_bar):
         """
@@ -96,7 +152,7 @@ class HamiltonianMC(object):
 
         # acceptance_prob = P(position_bar, momentum_bar)/ P(position, momentum)
         potential_change = logp_bar - logp  # Negative change
-        kinetic_change = 0.5 * np.float(np.dot(momentum_bar.T, momentum_bar) - np.dot(momentum.T, momentum))
+        kinetic_change = self._kinetic_energy(momentum_bar) - self._kinetic_energy(momentum)
 
         # acceptance probability
         return np.exp(potential_change - kinetic_change)
@@ -121,13 +177,11 @@ class HamiltonianMC(object):
         Machine Learning Research 15 (2014) 1351-1381
         Algorithm 4 : Heuristic for choosing an initial value of epsilon
         """
-        # momentum = N(0, I)
-        momentum = np.reshape(np.random.normal(0, 1, len(position)), position.shape)
+        # momentum = N(0, M)
+        momentum = self._sample_momentum(position)
 
         # Take a single step in time
-        position_bar, momentum_bar, _ =\
-            self.simulate_dynamics(self.model, position, momentum,
-                                   stepsize_app, self.grad_log_pdf).get_proposed_values()
+        position_bar, momentum_bar, _ = self._simulate_dynamics(position, momentum, stepsize_app)
 
         acceptance_prob = self._acceptance_prob(position, position_bar, momentum, momentum_bar)
 
@@ -139,9 +193,7 @@ class HamiltonianMC(object):
         while condition:
             stepsize_app = (2 ** a) * stepsize_app
 
-            position_bar, momentum_bar, _ =\
-                self.simulate_dynamics(self.model, position, momentum,
-                                       stepsize_app, self.grad_log_pdf).get_proposed_values()
+            position_bar, momentum_bar, _ = self._simulate_dynamics(position, momentum, stepsize_app)
 
             acceptance_prob = self._acceptance_prob(position, position_bar, momentum, momentum_bar)
 
@@ -154,7 +206,7 @@ class HamiltonianMC(object):
         Runs a single sampling iteration to return a sample
         """
         # Resampling momentum
-        momentum = np.reshape(np.random.normal(0, 1, len(position)), position.shape)
+        momentum = self._sample_momentum(position)
 
         # position_m here will be the previous sampled value of position
         position_bar, momentum_bar = position.copy(), momentum
@@ -166,9 +218,8 @@ class HamiltonianMC(object):
         grad_bar, _ = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
 
         for _ in range(lsteps):
-            position_bar, momentum_bar, grad_bar =\
-                self.simulate_dynamics(self.model, position_bar, momentum_bar,
-                                       stepsize, self.grad_log_pdf, grad_bar).get_proposed_values()
+            position_bar, momentum_bar, grad_bar = self._simulate_dynamics(position_bar, momentum_bar,
+                                                                           stepsize, grad_bar)
 
         acceptance_prob = self._acceptance_prob(position, position_bar, momentum, momentum_bar)
 
@@ -362,6 +413,11 @@ class HamiltonianMCDA(HamiltonianMC):
     delta: float (in between 0 and 1), defaults to 0.65
         The target HMC acceptance probability
 
+    adapt_mass_matrix: None, 'diagonal' or 'dense', defaults to None
+        If not None, a diagonal or dense inverse mass matrix is estimated from the samples
+        drawn during adaptation, in windows of doubling size as done in Stan.
+        If None, identity mass matrix is used
+
     Public Methods:
     ---------------
     sample()
@@ -392,19 +448,28 @@ class HamiltonianMCDA(HamiltonianMC):
     Setting Path Lengths in Hamiltonian Monte Carlo. Journal of
     Machine Learning Research 15 (2014) 1351-1381
     Algorithm 5 : Hamiltonian Monte Carlo with dual averaging
+
+    Stan Development Team, Stan Reference Manual,
+    HMC Algorithm Parameters : Automatic Parameter Tuning
     """
 
-    def __init__(self, model, grad_log_pdf=None, simulate_dynamics=LeapFrog, delta=0.65):
+    def __init__(self, model, grad_log_pdf=None, simulate_dynamics=LeapFrog, delta=0.65, adapt_mass_matrix=None):
 
         if not isinstance(delta, float) or delta > 1.0 or delta < 0.0:
             raise ValueError(
                 "delta should be a floating value in between 0 and 1")
 
-        self.delta = delta
+        if adapt_mass_matrix not in (None, 'diagonal', 'dense'):
+            raise ValueError("adapt_mass_matrix should be either of None, 'diagonal' or 'dense'")
 
         super(HamiltonianMCDA, self).__init__(model=model, grad_log_pdf=grad_log_pdf,
                                               simulate_dynamics=simulate_dynamics)
 
+        self.delta = delta
+        self.adapt_mass_matrix = adapt_mass_matrix
+        # The stepsize obtained at the end of adaptation
+        self.adapted_stepsize = None
+
     def _adapt_params(self, stepsize, stepsize_bar, h_bar, mu, index_i, alpha, n_alpha=1):
         """
         Run tha adaptation for stepsize for better proposals of position
@@ -423,6 +488,66 @@ class HamiltonianMCDA(HamiltonianMC):
 
         return stepsize, stepsize_bar, h_bar
 
+    def _mass_matrix_windows(self, num_adapt):
+        """
+        Returns a list of (start, end) iterations of the slow adaptation windows in which samples
+        are collected for estimating the inverse mass matrix. Same as Stan, the windows are
+        preceded by an initial fast interval of 75 iterations and followed by a terminal fast
+        interval of 50 iterations, and the size of windows doubles starting from 25.
+        """
+        if self.adapt_mass_matrix is None or num_adapt < 20:
+            return []
+
+        init_buffer, term_buffer, base_window = 75, 50, 25
+        if init_buffer + term_buffer + base_window > num_adapt:
+            init_buffer = int(0.15 * num_adapt)
+            term_buffer = int(0.1 * num_adapt)
+            base_window = num_adapt - init_buffer - term_buffer
+
+        windows = []
+        start, window_size = init_buffer, base_window
+        end_slow = num_adapt - term_buffer
+        while start < end_slow:
+            end = start + window_size
+            # Stretch the window to the end of slow adaptation if the next one won't fit
+            if end + 2 * window_size > end_slow:
+                end = end_slow
+            windows.append((start, end))
+            start, window_size = end, 2 * window_size
+
+        return windows
+
+    def _update_inverse_mass_matrix(self, position, index_i, windows, window_samples):
+        """
+        Collects position into window_samples if index_i lies in one of the windows, and at the end
+        of a window sets the inverse mass matrix to the regularized covariance of the collected samples.
+        Returns True if the inverse mass matrix was updated.
+        """
+        for start, end in windows:
+            if start < index_i <= end:
+                window_samples.append(position)
+                if index_i < end:
+                    return False
+
+                samples = np.array(window_samples)
+                num_window = len(samples)
+                del window_samples[:]
+
+                # Shrink the estimate towards 1e-3 times identity as done in Stan
+                if self.adapt_mass_matrix == 'diagonal':
+                    covariance = np.var(samples, axis=0, ddof=1)
+                    regularizer = 1e-3
+                else:
+                    covariance = np.atleast_2d(np.cov(samples, rowvar=False))
+                    regularizer = 1e-3 * np.eye(len(position))
+                inverse_mass_matrix = (num_window / (num_window + 5.0)) * covariance +\
+                    (5.0 / (num_window + 5.0)) * regularizer
+
+                self._set_inverse_mass_matrix(inverse_mass_matrix)
+                return True
+
+        return False
+
     def sample(self, initial_pos, num_adapt, num_samples, trajectory_length, stepsize=None, return_type='dataframe'):
         """
         Method to return samples using Hamiltonian Monte Carlo
@@ -479,6 +604,9 @@ class HamiltonianMCDA(HamiltonianMC):
         initial_pos = _check_1d_array_object(initial_pos, 'initial_pos')
         _check_length_equal(initial_pos, self.model.variables, 'initial_pos', 'model.variables')
 
+        if self.adapt_mass_matrix is not None and num_adapt > 1:
+            self._set_inverse_mass_matrix(None)
+
         if stepsize is None:
             stepsize = self._find_reasonable_stepsize(initial_pos)
 
@@ -494,6 +622,11 @@ class HamiltonianMCDA(HamiltonianMC):
         h_bar = 0.0
         # See equation (6) section 3.2.1 for details
 
+        # Iteration at which dual averaging was last restarted, and windows for mass matrix adaptation
+        adapt_start = 0
+        windows = self._mass_matrix_windows(num_adapt)
+        window_samples = []
+
         types = [(var_name, 'float') for var_name in self.model.variables]
         samples = np.zeros(num_samples, dtype=types).view(np.recarray)
         samples[0] = tuple(initial_pos)
@@ -507,10 +640,17 @@ class HamiltonianMCDA(HamiltonianMC):
 
             # Adaptation of stepsize till num_adapt iterations
             if i <= num_adapt:
-                stepsize, stepsize_bar, h_bar = self._adapt_params(stepsize, stepsize_bar, h_bar, mu, i, alpha)
+                stepsize, stepsize_bar, h_bar = self._adapt_params(stepsize, stepsize_bar, h_bar, mu,
+                                                                   i - adapt_start, alpha)
+                # Restart stepsize adaptation for the new mass matrix
+                if self._update_inverse_mass_matrix(position_m, i, windows, window_samples):
+                    stepsize = self._find_reasonable_stepsize(position_m, stepsize)
+                    mu = np.log(10.0 * stepsize)
+                    stepsize_bar, h_bar, adapt_start = 1.0, 0.0, i
             else:
                 stepsize = stepsize_bar
 
+        self.adapted_stepsize = stepsize_bar
         self.acceptance_rate = self.accepted_proposals / num_samples
 
         return _return_samples(return_type, samples)
@@ -565,6 +705,9 @@ class HamiltonianMCDA(HamiltonianMC):
         initial_pos = _check_1d_array_object(initial_pos, 'initial_pos')
         _check_length_equal(initial_pos, self.model.variables, 'initial_pos', 'model.variables')
 
+        if self.adapt_mass_matrix is not None and num_adapt > 1:
+            self._set_inverse_mass_matrix(None)
+
         if stepsize is None:
             stepsize = self._find_reasonable_stepsize(initial_pos)
 
@@ -577,6 +720,10 @@ class HamiltonianMCDA(HamiltonianMC):
         stepsize_bar = 1.0
         h_bar = 0.0
 
+        adapt_start = 0
+        windows = self._mass_matrix_windows(num_adapt)
+        window_samples = []
+
         position_m = initial_pos.copy()
         num_adapt += 1
 
@@ -585,10 +732,16 @@ class HamiltonianMCDA(HamiltonianMC):
             position_m, alpha = self._sample(position_m, trajectory_length, stepsize)
 
             if i <= num_adapt:
-                stepsize, stepsize_bar, h_bar = self._adapt_params(stepsize, stepsize_bar, h_bar, mu, i, alpha)
+                stepsize, stepsize_bar, h_bar = self._adapt_params(stepsize, stepsize_bar, h_bar, mu,
+                                                                   i - adapt_start, alpha)
+                if self._update_inverse_mass_matrix(position_m, i, windows, window_samples):
+                    stepsize = self._find_reasonable_stepsize(position_m, stepsize)
+                    mu = np.log(10.0 * stepsize)
+                    stepsize_bar, h_bar, adapt_start = 1.0, 0.0, i
             else:
                 stepsize = stepsize_bar
 
             yield position_m
 
+        self.adapted_stepsize = stepsize_bar
         self.acceptance_rate = self.accepted_proposals / num_samples
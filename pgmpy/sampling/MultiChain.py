@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from multiprocessing import Pool, cpu_count
+import numbers
+
+import numpy as np
+
+from pgmpy.sampling import HamiltonianMC, HamiltonianMCDA, NoUTurnSampler, NoUTurnSamplerDA
+from pgmpy.utils import _check_length_equal
+
+
+class MultiChainSampler(object):
+    """
+    Class for running multiple independent chains of a Hamiltonian Monte Carlo
+    sampler in parallel on a process pool.
+
+    All the chains are first adapted independently, starting from dispersed
+    initial positions, and the adapted stepsizes (and inverse mass matrices, if
+    any) are then pooled and shared by all the chains for drawing samples.
+
+    Parameters:
+    -----------
+    sampler: An instance of HamiltonianMC, HamiltonianMCDA, NoUTurnSampler or NoUTurnSamplerDA
+        The sampler whose chains are to be run. When n_jobs is not 1, the sampler (and so
+        its model) should be picklable.
+
+    num_chains: int, defaults to 4
+        Number of chains to run
+
+    n_jobs: int, defaults to -1
+        Number of worker processes. If -1, then all the available CPUs are used.
+        If 1, then all the chains are run in the current process.
+
+    Public Methods:
+    ---------------
+    sample()
+    generate_sample()
+
+    Example:
+    --------
+    >>> from pgmpy.sampling import NoUTurnSamplerDA as NUTSda, GradLogPDFGaussian, MultiChainSampler
+    >>> from pgmpy.factors.distributions import GaussianDistribution as JGD
+    >>> import numpy as np
+    >>> mean = np.array([-1, 1])
+    >>> covariance = np.array([[3, 0.4], [0.4, 2]])
+    >>> model = JGD(['x', 'y'], mean, covariance)
+    >>> sampler = NUTSda(model=model, grad_log_pdf=GradLogPDFGaussian, adapt_mass_matrix='diagonal')
+    >>> chains = MultiChainSampler(sampler, num_chains=4)
+    >>> samples = chains.sample(initial_pos=np.array([0, 0]), num_adapt=500, num_samples=1000, seed=42)
+    >>> samples.shape
+    (4, 1000, 2)
+    >>> np.cov(samples.reshape(-1, 2).T)
+    array([[ 3.0214473 ,  0.36104498],
+           [ 0.36104498,  2.05361693]])
+    """
+
+    def __init__(self, sampler, num_chains=4, n_jobs=-1):
+
+        if not isinstance(sampler, HamiltonianMC):
+            raise TypeError("sampler must be an instance of pgmpy.sampling.HamiltonianMC")
+
+        if not isinstance(num_chains, numbers.Integral) or num_chains < 1:
+            raise ValueError("num_chains should be a positive integer")
+
+        if not isinstance(n_jobs, numbers.Integral) or n_jobs == 0 or n_jobs < -1:
+            raise ValueError("n_jobs should be either -1 or a positive integer")
+
+        self.sampler = sampler
+        self.num_chains = num_chains
+        self.n_jobs = n_jobs
+
+        # Pooled values of stepsize and inverse mass matrix shared by all the chains after adaptation
+        self.stepsize = None
+        self.inverse_mass_matrix = None
+
+    def _initial_positions(self, initial_pos, random_state, dispersion):
+        """
+        Returns a (num_chains, number of variables) array of initial positions. A single
+        initial position is dispersed uniformly in [-dispersion, dispersion] along each variable
+        """
+        initial_pos = np.array(initial_pos, dtype=float)
+
+        if initial_pos.ndim == 1:
+            _check_length_equal(initial_pos, self.sampler.model.variables, 'initial_pos', 'model.variables')
+            return initial_pos + random_state.uniform(-dispersion, dispersion,
+                                                      (self.num_chains, len(initial_pos)))
+        elif initial_pos.ndim == 2:
+            if len(initial_pos) != self.num_chains:
+                raise ValueError("initial_pos should have an initial position for each of the chains")
+            _check_length_equal(initial_pos[0], self.sampler.model.variables, 'initial_pos[0]', 'model.variables')
+            return initial_pos
+        else:
+            raise TypeError("initial_pos should be a 1d or 2d array type object")
+
+    def _get_pool(self):
+        """
+        Returns a process pool with n_jobs workers (at most num_chains), or None if n_jobs is 1
+        """
+        n_jobs = cpu_count() if self.n_jobs == -1 else self.n_jobs
+        n_jobs = min(n_jobs, self.num_chains)
+
+        return Pool(n_jobs) if n_jobs > 1 else None
+
+    def generate_sample(self, initial_pos, num_adapt, num_samples, stepsize=None, block_size=100,
+                        dispersion=2.0, seed=None, **kwargs):
+        """
+        Returns a generator type object which yields blocks of samples of each chain
+
+        Parameters
+        ----------
+        initial_pos: A 1d or 2d array like object
+            Either a single position which is dispersed to get the initial position
+            of each chain, or a (num_chains, number of variables) array of initial positions.
+
+        num_adapt: int
+            The number of iterations to run the adaptation in each chain. Ignored
+            if sampler doesn't use dual averaging.
+
+        num_samples: int
+            Number of samples to be generated per chain after adaptation
+
+        stepsize: float , defaults to None
+            The stepsize for proposing new values of position and momentum in simulate_dynamics
+            If None, then will be choosen suitably
+
+        block_size: int, defaults to 100
+            Number of samples in each yielded block
+
+        dispersion: float, defaults to 2.0
+            Half width of the uniform interval used for dispersing a single initial_pos
+
+        seed: int, defaults to None
+            Seed from which the independent random streams of each chain are derived
+
+        kwargs:
+            Extra arguments to sampler, e.g. trajectory_length for HamiltonianMC
+
+        Returns
+        -------
+        generator: yielding a tuple of chain index and a 2d numpy.array of shape
+            (block_size, number of variables) having the next samples of that chain
+
+        Examples
+        --------
+        >>> from pgmpy.sampling import HamiltonianMCDA as HMCda, GradLogPDFGaussian, MultiChainSampler
+        >>> from pgmpy.factors.distributions import GaussianDistribution as JGD
+        >>> import numpy as np
+        >>> mean = np.array([1, 2])
+        >>> covariance = np.array([[1, 0.3], [0.3, 4]])
+        >>> model = JGD(['x', 'y'], mean, covariance)
+        >>> chains = MultiChainSampler(HMCda(model, GradLogPDFGaussian), num_chains=2, n_jobs=2)
+        >>> for chain, block in chains.generate_sample([0, 0], num_adapt=200, num_samples=300,
+        ...                                            block_size=100, seed=1, trajectory_length=2):
+        ...     print(chain, block.shape)
+        0 (100, 2)
+        1 (100, 2)
+        0 (100, 2)
+        1 (100, 2)
+        0 (100, 2)
+        1 (100, 2)
+        """
+        random_state = np.random.RandomState(seed)
+        positions = list(self._initial_positions(initial_pos, random_state, dispersion))
+        rng_states = [int(chain_seed) for chain_seed in random_state.randint(0, 2 ** 31 - 1, self.num_chains)]
+
+        pool = self._get_pool()
+        map_function = pool.imap if pool is not None else map
+
+        try:
+            warmup_tasks = [(self.sampler, rng_states[chain], positions[chain], num_adapt, stepsize, kwargs)
+                            for chain in range(self.num_chains)]
+            positions, stepsizes, inverse_mass_matrices, rng_states =\
+                [list(values) for values in zip(*map_function(_warmup_chain, warmup_tasks))]
+
+            # Pool the adapted stepsizes by their geometric mean, which needn't round-trip a common stepsize
+            if all(chain_stepsize == stepsizes[0] for chain_stepsize in stepsizes):
+                self.stepsize = float(stepsizes[0])
+            else:
+                self.stepsize = float(np.exp(np.mean(np.log(stepsizes))))
+            if inverse_mass_matrices[0] is None:
+                self.inverse_mass_matrix = None
+            else:
+                self.inverse_mass_matrix = np.mean(inverse_mass_matrices, axis=0)
+
+            num_remaining = num_samples
+            while num_remaining > 0:
+                num_block = min(block_size, num_remaining)
+                sample_tasks = [(self.sampler, rng_states[chain], positions[chain], num_block, self.stepsize,
+                                 self.inverse_mass_matrix, kwargs) for chain in range(self.num_chains)]
+
+                for chain, (block, rng_state) in enumerate(map_function(_sample_chain, sample_tasks)):
+                    positions[chain] = block[-1]
+                    rng_states[chain] = rng_state
+                    yield chain, block
+
+                num_remaining -= num_block
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+    def sample(self, initial_pos, num_adapt, num_samples, stepsize=None, dispersion=2.0, seed=None, **kwargs):
+        """
+        Returns samples of all the chains drawn after adaptation
+
+        Parameters
+        ----------
+        initial_pos: A 1d or 2d array like object
+            Either a single position which is dispersed to get the initial position
+            of each chain, or a (num_chains, number of variables) array of initial positions.
+
+        num_adapt: int
+            The number of iterations to run the adaptation in each chain. Ignored
+            if sampler doesn't use dual averaging.
+
+        num_samples: int
+            Number of samples to be generated per chain after adaptation
+
+        stepsize: float , defaults to None
+            The stepsize for proposing new values of position and momentum in simulate_dynamics
+            If None, then will be choosen suitably
+
+        dispersion: float, defaults to 2.0
+            Half width of the uniform interval used for dispersing a single initial_pos
+
+        seed: int, defaults to None
+            Seed from which the independent random streams of each chain are derived
+
+        kwargs:
+            Extra arguments to sampler, e.g. trajectory_length for HamiltonianMC
+
+        Returns
+        -------
+        numpy.array: A 3d array of shape (num_chains, num_samples, number of variables)
+
+        Examples
+        --------
+        >>> from pgmpy.sampling import HamiltonianMC as HMC, GradLogPDFGaussian, MultiChainSampler
+        >>> from pgmpy.factors.distributions import GaussianDistribution as JGD
+        >>> import numpy as np
+        >>> mean = np.array([1, 2])
+        >>> covariance = np.array([[1, 0.3], [0.3, 4]])
+        >>> model = JGD(['x', 'y'], mean, covariance)
+        >>> chains = MultiChainSampler(HMC(model, GradLogPDFGaussian), num_chains=3, n_jobs=1)
+        >>> samples = chains.sample([0, 0], num_adapt=0, num_samples=500, stepsize=0.3, trajectory_length=2)
+        >>> samples.shape
+        (3, 500, 2)
+        """
+        samples = np.empty((self.num_chains, num_samples, len(self.sampler.model.variables)))
+        num_filled = [0] * self.num_chains
+
+        for chain, block in self.generate_sample(initial_pos, num_adapt, num_samples, stepsize=stepsize,
+                                                 block_size=max(num_samples, 1), dispersion=dispersion,
+                                                 seed=seed, **kwargs):
+            samples[chain, num_filled[chain]:num_filled[chain] + len(block)] = block
+            num_filled[chain] += len(block)
+
+        return samples
+
+
+def _is_adaptive(sampler):
+    """
+    Returns True if sampler adapts stepsize using dual averaging
+    """
+    return isinstance(sampler, NoUTurnSamplerDA) or (isinstance(sampler, HamiltonianMCDA) and
+                                                     not isinstance(sampler, NoUTurnSampler))
+
+
+def _set_random_state(rng_state):
+    """
+    Sets the global numpy random state either from a seed or a state returned by np.random.get_state
+    """
+    if isinstance(rng_state, tuple):
+        np.random.set_state(rng_state)
+    else:
+        np.random.seed(rng_state)
+
+
+def _warmup_chain(args):
+    """
+    Runs adaptation for a single chain, returns the last position, adapted stepsize,
+    inverse mass matrix and the random state of the chain
+    """
+    sampler, rng_state, position, num_adapt, stepsize, kwargs = args
+
+    caller_state = np.random.get_state()
+    _set_random_state(rng_state)
+    try:
+        if _is_adaptive(sampler) and num_adapt > 1:
+            samples = sampler.sample(position, num_adapt=num_adapt, num_samples=num_adapt + 1, stepsize=stepsize,
+                                     return_type='recarray', **kwargs)
+            position = np.array(samples[-1].tolist())
+            stepsize = sampler.adapted_stepsize
+        elif stepsize is None:
+            stepsize = sampler._find_reasonable_stepsize(position)
+
+        return position, stepsize, sampler.inverse_mass_matrix, np.random.get_state()
+    finally:
+        np.random.set_state(caller_state)
+
+
+def _sample_chain(args):
+    """
+    Draws a block of samples for a single chain, returns the samples and the random state of the chain
+    """
+    sampler, rng_state, position, num_samples, stepsize, inverse_mass_matrix, kwargs = args
+
+    caller_state = np.random.get_state()
+    _set_random_state(rng_state)
+    try:
+        sampler._set_inverse_mass_matrix(inverse_mass_matrix)
+        if _is_adaptive(sampler):
+            generator = sampler.generate_sample(position, num_adapt=0, num_samples=num_samples,
+                                                stepsize=stepsize, **kwargs)
+        else:
+            generator = sampler.generate_sample(position, num_samples=num_samples, stepsize=stepsize, **kwargs)
+
+        block = np.empty((num_samples, len(position)))
+        for index, sample in enumerate(generator):
+            block[index] = sample
+
+        return block, np.random.get_state()
+    finally:
+        np.random.set_state(caller_state)
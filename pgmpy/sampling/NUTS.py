@@ -2,12 +2,22 @@
 
 from __future__ import division
 
+import numbers
+
 import numpy as np
 
 from pgmpy.sampling import HamiltonianMCDA, LeapFrog, _return_samples
+from pgmpy.sampling.base import _get_velocity
 from pgmpy.utils import _check_1d_array_object, _check_length_equal
 
 
+def _bit_count(number):
+    """
+    Returns the number of set bits in the binary representation of a non-negative integer
+    """
+    return bin(number).count('1')
+
+
 class NoUTurnSampler(HamiltonianMCDA):
     """
     Class for performing sampling in Continuous model
@@ -25,6 +35,10 @@ class NoUTurnSampler(HamiltonianMCDA):
         Class to propose future states of position and momentum in time by simulating
         HamiltonianDynamics
 
+    max_tree_depth: int, defaults to 10
+        The maximum depth of the binary tree built in a single iteration, i.e. at most
+        2 ** max_tree_depth - 1 leapfrog steps are taken per sample
+
     Public Methods:
     ---------------
     sample()
@@ -56,128 +70,153 @@ class NoUTurnSampler(HamiltonianMCDA):
     Setting Path Lengths in Hamiltonian Monte Carlo. Journal of
     Machine Learning Research 15 (2014) 1351-1381
     Algorithm 3 : Efficient No-U-Turn Sampler
+
+    Michael Betancourt, A Conceptual Introduction to Hamiltonian Monte Carlo.
+    arXiv:1701.02434 (2017), Appendix A.3 : Multinomial sampling of trajectories
     """
 
-    def __init__(self, model, grad_log_pdf, simulate_dynamics=LeapFrog):
+    def __init__(self, model, grad_log_pdf, simulate_dynamics=LeapFrog, max_tree_depth=10):
+
+        if not isinstance(max_tree_depth, numbers.Integral) or max_tree_depth < 1:
+            raise ValueError("max_tree_depth should be a positive integer")
+
+        self.max_tree_depth = max_tree_depth
 
         super(NoUTurnSampler, self).__init__(model=model, grad_log_pdf=grad_log_pdf,
                                              simulate_dynamics=simulate_dynamics)
 
-    def _initalize_tree(self, position, momentum, slice_var, stepsize):
+    def _update_acceptance_criteria(self, position_forward, position_backward, momentum_forward, momentum_backward):
         """
-        Initalizes root node of the tree, i.e depth = 0
+        Returns True if the trajectory between position_backward and position_forward
+        has not started to make a U-turn
         """
-
-        position_bar, momentum_bar, _ = self.simulate_dynamics(self.model, position, momentum, stepsize,
-                                                               self.grad_log_pdf).get_proposed_values()
-
-        _, logp_bar = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
-
-        hamiltonian = logp_bar - 0.5 * np.dot(momentum_bar, momentum_bar)
-
-        candidate_set_size = slice_var < np.exp(hamiltonian)
-        accept_set_bool = hamiltonian > np.log(slice_var) - 10000  # delta_max = 10000
-
-        return position_bar, momentum_bar, candidate_set_size, accept_set_bool
-
-    def _update_acceptance_criteria(self, position_forward, position_backward, momentum_forward, momentum_backward,
-                                    accept_set_bool, candidate_set_size, candidate_set_size2):
+        # Momentum is replaced by velocity (inverse_mass_matrix * momentum) for non identity mass matrix
+        velocity_forward = _get_velocity(momentum_forward, self.inverse_mass_matrix)
+        velocity_backward = _get_velocity(momentum_backward, self.inverse_mass_matrix)
 
         # criteria1 = I[(θ+ − θ−)·r− ≥ 0]
-        criteria1 = np.dot((position_forward - position_backward), momentum_backward) >= 0
+        criteria1 = np.dot((position_forward - position_backward), velocity_backward) >= 0
 
         # criteira2 = I[(θ+ − θ− )·r+ ≥ 0]
-        criteria2 = np.dot((position_forward - position_backward), momentum_forward) >= 0
+        criteria2 = np.dot((position_forward - position_backward), velocity_forward) >= 0
 
-        accept_set_bool = accept_set_bool and criteria1 and criteria2
-        candidate_set_size += candidate_set_size2
+        return criteria1 and criteria2
 
-        return accept_set_bool, candidate_set_size
-
-    def _build_tree(self, position, momentum, slice_var, direction, depth, stepsize):
+    def _build_tree(self, position, momentum, grad_log, direction, depth, stepsize, hamiltonian0, checkpoints):
         """
-        Recursively builds a tree for proposing new position and momentum
+        Iteratively builds a tree of 2 ** depth leapfrog steps in the given direction
+        for proposing new position and momentum.
+
+        The U-turn criteria of every balanced subtree are checked against the leftmost
+        leaf of that subtree, whose position and velocity are kept in `checkpoints`, a preallocated
+        buffer of max_tree_depth rows, so memory stays proportional to the tree depth.
         """
 
         # Parameter names in algorithm (here -> representation in algorithm)
-        # position -> theta, momentum -> r, slice_var -> u, direction -> v, depth ->j, stepsize -> epsilon
-        # candidate_set_size -> n, accept_set_bool -> s
-        if depth == 0:
+        # position -> theta, momentum -> r, direction -> v, depth ->j, stepsize -> epsilon
+        # accept_set_bool -> s
+        checkpoint_position, checkpoint_velocity = checkpoints
+        position_bar = position
+        log_sum_weight = -np.inf
+        alpha = 0.0
+        num_leaves = 2 ** depth
+
+        for leaf in range(num_leaves):
             # Take single leapfrog step in the given direction (direction * stepsize)
-            position_bar, momentum_bar, candidate_set_size, accept_set_bool =\
-                self._initalize_tree(position, momentum, slice_var, direction * stepsize)
-
-            return (position_bar, momentum_bar, position_bar, momentum_bar, position_bar,
-                    candidate_set_size, accept_set_bool)
-
-        else:
-            # Build left and right subtrees
-            (position_backward, momentum_backward, position_forward, momentum_forward, position_bar,
-             candidate_set_size, accept_set_bool) = self._build_tree(position, momentum,
-                                                                     slice_var, direction, depth - 1, stepsize)
-            if accept_set_bool == 1:
-                if direction == -1:
-                    # Build tree in backward direction
-                    (position_backward, momentum_backward, _, _, position_bar2, candidate_set_size2,
-                     accept_set_bool2) = self._build_tree(position_backward, momentum_backward,
-                                                          slice_var, direction, depth - 1, stepsize)
-                else:
-                    # Build tree in forward direction
-                    (_, _, position_forward, momentum_forward, position_bar2, candidate_set_size2,
-                     accept_set_bool2) = self._build_tree(position_forward, momentum_forward,
-                                                          slice_var, direction, depth - 1, stepsize)
-
-                if np.random.rand() < candidate_set_size2 / (candidate_set_size2 + candidate_set_size):
-                    position_bar = position_bar2
-
-                accept_set_bool, candidate_set_size =\
-                    self._update_acceptance_criteria(position_forward, position_backward, momentum_forward,
-                                                     momentum_backward, accept_set_bool2, candidate_set_size,
-                                                     candidate_set_size2)
-
-            return (position_backward, momentum_backward, position_forward, momentum_forward,
-                    position_bar, candidate_set_size, accept_set_bool)
+            position, momentum, grad_log, log_pdf = self._simulate_dynamics(position, momentum, direction * stepsize,
+                                                                            grad_log, return_log_pdf=True)
+            velocity = _get_velocity(momentum, self.inverse_mass_matrix)
 
-    def _sample(self, position, stepsize):
+            hamiltonian = log_pdf - 0.5 * np.dot(momentum, velocity)
+
+            if not hamiltonian > hamiltonian0 - 10000:  # delta_max = 10000
+                return position, momentum, grad_log, position_bar, log_sum_weight, False, alpha, leaf + 1
+
+            alpha += min(1.0, np.exp(hamiltonian - hamiltonian0))
+
+            # Multinomial sampling of the proposal in proportion to exp(hamiltonian)
+            log_sum_weight = np.logaddexp(log_sum_weight, hamiltonian)
+            if np.log(np.random.rand()) < hamiltonian - log_sum_weight:
+                position_bar = position
+
+            if leaf % 2 == 0:
+                # leaf is the leftmost leaf of one or more subtrees
+                index = _bit_count(leaf >> 1)
+                checkpoint_position[index] = position
+                checkpoint_velocity[index] = velocity
+            else:
+                # leaf is the rightmost leaf of the subtrees stored at indices (min_index..max_index)
+                max_index = _bit_count(leaf >> 1)
+                min_index = max_index - _bit_count((~leaf & (leaf + 1)) - 1) + 1
+                for index in range(max_index, min_index - 1, -1):
+                    position_diff = direction * (position - checkpoint_position[index])
+                    if not (np.dot(position_diff, checkpoint_velocity[index]) >= 0 and
+                            np.dot(position_diff, velocity) >= 0):
+                        return position, momentum, grad_log, position_bar, log_sum_weight, False, alpha, leaf + 1
+
+        return position, momentum, grad_log, position_bar, log_sum_weight, True, alpha, num_leaves
+
+    def _build_trajectory(self, position, stepsize):
         """
-        Returns a sample using a single iteration of NUTS
+        Runs a single iteration of NUTS, doubling the trajectory till it makes a U-turn
+        or reaches max_tree_depth. Returns the sample along with the acceptance statistics
         """
 
         # Re-sampling momentum
-        momentum = np.random.normal(0, 1, len(position))
+        momentum = self._sample_momentum(position)
 
         # Initializations
         depth = 0
         position_backward, position_forward = position, position
         momentum_backward, momentum_forward = momentum, momentum
-        candidate_set_size = accept_set_bool = 1
-        _, log_pdf = self.grad_log_pdf(position, self.model).get_gradient_log_pdf()
-
-        # Resample slice variable `u`
-        slice_var = np.random.uniform(0, np.exp(log_pdf - 0.5 * np.dot(momentum, momentum)))
-
-        while accept_set_bool == 1:
+        grad_log, log_pdf = self.grad_log_pdf(position, self.model).get_gradient_log_pdf()
+        grad_backward, grad_forward = grad_log, grad_log
+        hamiltonian0 = log_pdf - self._kinetic_energy(momentum)
+        log_sum_weight = hamiltonian0
+        accept_set_bool = True
+        alpha = 0.0
+        n_alpha = 0
+
+        checkpoints = (np.empty((self.max_tree_depth, len(position))),
+                       np.empty((self.max_tree_depth, len(position))))
+
+        while accept_set_bool and depth < self.max_tree_depth:
             direction = np.random.choice([-1, 1], p=[0.5, 0.5])
             if direction == -1:
                 # Build a tree in backward direction
-                (position_backward, momentum_backward, _, _, position_bar,
-                 candidate_set_size2, accept_set_bool2) = self._build_tree(position_backward, momentum_backward,
-                                                                           slice_var, direction, depth, stepsize)
+                (position_backward, momentum_backward, grad_backward, position_bar, log_sum_weight2,
+                 accept_set_bool2, alpha2, n_alpha2) = self._build_tree(position_backward, momentum_backward,
+                                                                        grad_backward, direction, depth, stepsize,
+                                                                        hamiltonian0, checkpoints)
             else:
                 # Build tree in forward direction
-                (_, _, position_forward, momentum_forward, position_bar,
-                 candidate_set_size2, accept_set_bool2) = self._build_tree(position_forward, momentum_forward,
-                                                                           slice_var, direction, depth, stepsize)
-            if accept_set_bool2 == 1:
-                if np.random.rand() < candidate_set_size2 / candidate_set_size:
-                    position = position_bar.copy()
-
-            accept_set_bool, candidate_set_size = self._update_acceptance_criteria(position_forward, position_backward,
-                                                                                   momentum_forward, momentum_backward,
-                                                                                   accept_set_bool2, candidate_set_size,
-                                                                                   candidate_set_size2)
+                (position_forward, momentum_forward, grad_forward, position_bar, log_sum_weight2,
+                 accept_set_bool2, alpha2, n_alpha2) = self._build_tree(position_forward, momentum_forward,
+                                                                        grad_forward, direction, depth, stepsize,
+                                                                        hamiltonian0, checkpoints)
+            alpha += alpha2
+            n_alpha += n_alpha2
+
+            if not accept_set_bool2:
+                break
+
+            # Biased progressive sampling, favours the newly built subtree
+            if np.random.rand() < np.exp(log_sum_weight2 - log_sum_weight):
+                position = position_bar.copy()
+            log_sum_weight = np.logaddexp(log_sum_weight, log_sum_weight2)
+
+            accept_set_bool = self._update_acceptance_criteria(position_forward, position_backward,
+                                                               momentum_forward, momentum_backward)
             depth += 1
 
+        return position, alpha, n_alpha
+
+    def _sample(self, position, stepsize):
+        """
+        Returns a sample using a single iteration of NUTS
+        """
+        position, _, _ = self._build_trajectory(position, stepsize)
+
         return position
 
     def sample(self, initial_pos, num_samples, stepsize=None, return_type='dataframe'):
@@ -329,6 +368,15 @@ class NoUTurnSamplerDA(NoUTurnSampler):
     delta: float (in between 0 and 1), defaults to 0.65
         The target HMC acceptance probability
 
+    max_tree_depth: int, defaults to 10
+        The maximum depth of the binary tree built in a single iteration, i.e. at most
+        2 ** max_tree_depth - 1 leapfrog steps are taken per sample
+
+    adapt_mass_matrix: None, 'diagonal' or 'dense', defaults to None
+        If not None, a diagonal or dense inverse mass matrix is estimated from the samples
+        drawn during adaptation, in windows of doubling size as done in Stan.
+        If None, identity mass matrix is used
+
     Public Methods:
     ---------------
     sample()
@@ -366,106 +414,27 @@ class NoUTurnSamplerDA(NoUTurnSampler):
     Algorithm 6 : No-U-Turn Sampler with Dual Averaging
     """
 
-    def __init__(self, model, grad_log_pdf, simulate_dynamics=LeapFrog, delta=0.65):
+    def __init__(self, model, grad_log_pdf, simulate_dynamics=LeapFrog, delta=0.65, max_tree_depth=10,
+                 adapt_mass_matrix=None):
 
         if not isinstance(delta, float) or delta > 1.0 or delta < 0.0:
             raise ValueError(
                 "delta should be a floating value in between 0 and 1")
 
-        self.delta = delta
+        if adapt_mass_matrix not in (None, 'diagonal', 'dense'):
+            raise ValueError("adapt_mass_matrix should be either of None, 'diagonal' or 'dense'")
 
         super(NoUTurnSamplerDA, self).__init__(model=model, grad_log_pdf=grad_log_pdf,
-                                               simulate_dynamics=simulate_dynamics)
+                                               simulate_dynamics=simulate_dynamics, max_tree_depth=max_tree_depth)
 
-    def _build_tree(self, position, momentum, slice_var, direction, depth, stepsize, position0, momentum0):
-        """
-        Recursively builds a tree for proposing new position and momentum
-        """
-        if depth == 0:
-
-            position_bar, momentum_bar, candidate_set_size, accept_set_bool =\
-                self._initalize_tree(position, momentum, slice_var, direction * stepsize)
-
-            alpha = min(1, self._acceptance_prob(position, position_bar, momentum, momentum_bar))
-
-            return (position_bar, momentum_bar, position_bar, momentum_bar, position_bar,
-                    candidate_set_size, accept_set_bool, alpha, 1)
-
-        else:
-            (position_backward, momentum_backward, position_forward, momentum_forward, position_bar,
-             candidate_set_size, accept_set_bool, alpha, n_alpha) =\
-                self._build_tree(position, momentum, slice_var,
-                                 direction, depth - 1, stepsize, position0, momentum0)
-
-            if accept_set_bool == 1:
-                if direction == -1:
-                    # Build tree in backward direction
-                    (position_backward, momentum_backward, _, _, position_bar2, candidate_set_size2, accept_set_bool2,
-                     alpha2, n_alpha2) = self._build_tree(position_backward, momentum_backward, slice_var, direction,
-                                                          depth - 1, stepsize, position0, momentum0)
-                else:
-                    # Build tree in forward direction
-                    (_, _, position_forward, momentum_forward, position_bar2, candidate_set_size2, accept_set_bool2,
-                     alpha2, n_alpha2) = self._build_tree(position_forward, momentum_forward, slice_var, direction,
-                                                          depth - 1, stepsize, position0, momentum0)
-
-                if np.random.rand() < candidate_set_size2 / (candidate_set_size2 + candidate_set_size):
-                    position_bar = position_bar2
-
-                alpha += alpha2
-                n_alpha += n_alpha2
-                accept_set_bool, candidate_set_size =\
-                    self._update_acceptance_criteria(position_forward, position_backward, momentum_forward,
-                                                     momentum_backward, accept_set_bool2, candidate_set_size,
-                                                     candidate_set_size2)
-
-            return (position_backward, momentum_backward, position_forward, momentum_forward, position_bar,
-                    candidate_set_size, accept_set_bool, alpha, n_alpha)
+        self.delta = delta
+        self.adapt_mass_matrix = adapt_mass_matrix
 
     def _sample(self, position, stepsize):
         """
         Returns a sample using a single iteration of NUTS with dual averaging
         """
-
-        # Re-sampling momentum
-        momentum = np.random.normal(0, 1, len(position))
-
-        # Initializations
-        depth = 0
-        position_backward, position_forward = position, position
-        momentum_backward, momentum_forward = momentum, momentum
-        candidate_set_size = accept_set_bool = 1
-        position_m_1 = position
-        _, log_pdf = self.grad_log_pdf(position, self.model).get_gradient_log_pdf()
-
-        # Resample slice variable `u`
-        slice_var = np.random.uniform(0, np.exp(log_pdf - 0.5 * np.dot(momentum, momentum)))
-
-        while accept_set_bool == 1:
-            direction = np.random.choice([-1, 1], p=[0.5, 0.5])
-            if direction == -1:
-                # Build a tree in backward direction
-                (position_backward, momentum_backward, _, _, position_bar, candidate_set_size2, accept_set_bool2,
-                 alpha, n_alpha) = self._build_tree(position_backward, momentum_backward, slice_var, direction,
-                                                    depth, stepsize, position_m_1, momentum)
-            else:
-                # Build tree in forward direction
-                (_, _, position_forward, momentum_forward, position_bar, candidate_set_size2, accept_set_bool2,
-                 alpha, n_alpha) = self._build_tree(position_forward, momentum_forward, slice_var, direction,
-                                                    depth, stepsize, position_m_1, momentum)
-
-            if accept_set_bool2 == 1:
-                if np.random.rand() < candidate_set_size2 / candidate_set_size:
-                    position = position_bar
-
-            accept_set_bool, candidate_set_size = self._update_acceptance_criteria(position_forward, position_backward,
-                                                                                   momentum_forward, momentum_backward,
-                                                                                   accept_set_bool2, candidate_set_size,
-                                                                                   candidate_set_size2)
-
-            depth += 1
-
-        return position, alpha, n_alpha
+        return self._build_trajectory(position, stepsize)
 
     def sample(self, initial_pos, num_adapt, num_samples, stepsize=None, return_type='dataframe'):
         """
@@ -523,17 +492,26 @@ class NoUTurnSamplerDA(NoUTurnSampler):
         initial_pos = _check_1d_array_object(initial_pos, 'initial_pos')
         _check_length_equal(initial_pos, self.model.variables, 'initial_pos', 'model.variables')
 
+        if self.adapt_mass_matrix is not None and num_adapt > 1:
+            self._set_inverse_mass_matrix(None)
+
         if stepsize is None:
             stepsize = self._find_reasonable_stepsize(initial_pos)
 
         if num_adapt <= 1:
-            return NoUTurnSampler(self.model, self.grad_log_pdf,
-                                  self.simulate_dynamics).sample(initial_pos, num_samples, stepsize)
+            sampler = NoUTurnSampler(self.model, self.grad_log_pdf, self.simulate_dynamics, self.max_tree_depth)
+            sampler._set_inverse_mass_matrix(self.inverse_mass_matrix)
+            return sampler.sample(initial_pos, num_samples, stepsize, return_type)
 
         mu = np.log(10.0 * stepsize)
         stepsize_bar = 1.0
         h_bar = 0.0
 
+        # Iteration at which dual averaging was last restarted, and windows for mass matrix adaptation
+        adapt_start = 0
+        windows = self._mass_matrix_windows(num_adapt)
+        window_samples = []
+
         types = [(var_name, 'float') for var_name in self.model.variables]
         samples = np.zeros(num_samples, dtype=types).view(np.recarray)
         samples[0] = tuple(initial_pos)
@@ -546,10 +524,17 @@ class NoUTurnSamplerDA(NoUTurnSampler):
 
             if i <= num_adapt:
                 stepsize, stepsize_bar, h_bar = self._adapt_params(stepsize, stepsize_bar, h_bar, mu,
-                                                                   i, alpha, n_alpha)
+                                                                   i - adapt_start, alpha, n_alpha)
+                # Restart stepsize adaptation for the new mass matrix
+                if self._update_inverse_mass_matrix(position_m, i, windows, window_samples):
+                    stepsize = self._find_reasonable_stepsize(position_m, stepsize)
+                    mu = np.log(10.0 * stepsize)
+                    stepsize_bar, h_bar, adapt_start = 1.0, 0.0, i
             else:
                 stepsize = stepsize_bar
 
+        self.adapted_stepsize = stepsize_bar
+
         return _return_samples(return_type, samples)
 
     def generate_sample(self, initial_pos, num_adapt, num_samples, stepsize=None):
@@ -605,12 +590,16 @@ class NoUTurnSamplerDA(NoUTurnSampler):
         initial_pos = _check_1d_array_object(initial_pos, 'initial_pos')
         _check_length_equal(initial_pos, self.model.variables, 'initial_pos', 'model.variables')
 
+        if self.adapt_mass_matrix is not None and num_adapt > 1:
+            self._set_inverse_mass_matrix(None)
+
         if stepsize is None:
             stepsize = self._find_reasonable_stepsize(initial_pos)
 
         if num_adapt <= 1:  # return sample generated using Simple HMC algorithm
-            for sample in NoUTurnSampler(self.model, self.grad_log_pdf,
-                                         self.simulate_dynamics).generate_sample(initial_pos, num_samples, stepsize):
+            sampler = NoUTurnSampler(self.model, self.grad_log_pdf, self.simulate_dynamics, self.max_tree_depth)
+            sampler._set_inverse_mass_matrix(self.inverse_mass_matrix)
+            for sample in sampler.generate_sample(initial_pos, num_samples, stepsize):
                 yield sample
             return
         mu = np.log(10.0 * stepsize)
@@ -618,6 +607,10 @@ class NoUTurnSamplerDA(NoUTurnSampler):
         stepsize_bar = 1.0
         h_bar = 0.0
 
+        adapt_start = 0
+        windows = self._mass_matrix_windows(num_adapt)
+        window_samples = []
+
         position_m = initial_pos.copy()
         num_adapt += 1
 
@@ -627,8 +620,14 @@ class NoUTurnSamplerDA(NoUTurnSampler):
 
             if i <= num_adapt:
                 stepsize, stepsize_bar, h_bar = self._adapt_params(stepsize, stepsize_bar, h_bar, mu,
-                                                                   i, alpha, n_alpha)
+                                                                   i - adapt_start, alpha, n_alpha)
+                if self._update_inverse_mass_matrix(position_m, i, windows, window_samples):
+                    stepsize = self._find_reasonable_stepsize(position_m, stepsize)
+                    mu = np.log(10.0 * stepsize)
+                    stepsize_bar, h_bar, adapt_start = 1.0, 0.0, i
             else:
                 stepsize = stepsize_bar
 
             yield position_m
+
+        self.adapted_stepsize = stepsize_bar
@@ -15,6 +15,16 @@ from pgmpy.sampling import _return_samples
 State = namedtuple('State', ['var', 'state'])
 
 
+def _sample_rows(probabilities):
+    """
+    Draws one state index for every row of a 2-D array of (unnormalized)
+    probabilities using inverse transform sampling.
+    """
+    cumulative = np.cumsum(probabilities, axis=1)
+    uniform = np.random.rand(cumulative.shape[0], 1) * cumulative[:, -1:]
+    return np.minimum((uniform >= cumulative).sum(axis=1), cumulative.shape[1] - 1)
+
+
 class BayesianModelSampling(Inference):
     """
     Class for sampling methods specific to Bayesian Models
@@ -205,30 +215,21 @@ class BayesianModelSampling(Inference):
         types.append(('_weight', 'float'))
         sampled = np.zeros(size, dtype=types).view(np.recarray)
         sampled['_weight'] = np.ones(size)
-        evidence_dict = {var: st for var, st in evidence}
+        evidence_dict = {var: st for var, st in evidence} if evidence else {}
 
         for node in self.topological_order:
             cpd = self.model.get_cpds(node)
-            states = range(self.cardinality[node])
-            evidence = cpd.get_evidence()
-
-            if evidence:
-                evidence_values = np.vstack([sampled[i] for i in evidence])
-                cached_values = self.pre_compute_reduce(node)
-                weights = list(map(lambda t: cached_values[tuple(t)], evidence_values.T))
-                if node in evidence_dict:
-                    sampled[node] = evidence_dict[node]
-                    for i in range(size):
-                        sampled['_weight'][i] *= weights[i][evidence_dict[node]]
-                else:
-                    sampled[node] = sample_discrete(states, weights)
+            # cpd.values is indexed as [node, parent_1, parent_2, ...], so the sampled
+            # parent columns select the relevant conditional distribution of every row.
+            parent_states = tuple(sampled[var] for var in cpd.variables[1:])
+
+            if node in evidence_dict:
+                sampled[node] = evidence_dict[node]
+                sampled['_weight'] *= cpd.values[(evidence_dict[node],) + parent_states]
+            elif parent_states:
+                sampled[node] = _sample_rows(cpd.values[(slice(None),) + parent_states].T)
             else:
-                if node in evidence_dict:
-                    sampled[node] = evidence_dict[node]
-                    for i in range(size):
-                        sampled['_weight'][i] *= cpd.values[evidence_dict[node]]
-                else:
-                    sampled[node] = sample_discrete(states, cpd.values, size)
+                sampled[node] = sample_discrete(range(self.cardinality[node]), cpd.values, size)
 
         return _return_samples(return_type, sampled)
 
@@ -1,18 +1,21 @@
-from .base import (BaseGradLogPDF, GradLogPDFGaussian, LeapFrog,
+from .base import (BaseGradLogPDF, GradLogPDFGaussian, GradLogPDFCustom, LeapFrog,
                    ModifiedEuler, BaseSimulateHamiltonianDynamics, _return_samples)
 from .HMC import HamiltonianMC, HamiltonianMCDA
 from .NUTS import NoUTurnSampler, NoUTurnSamplerDA
 from .Sampling import GibbsSampling, BayesianModelSampling
+from .MultiChain import MultiChainSampler
 
 __all__ = ['LeapFrog',
            'ModifiedEuler',
            'BaseSimulateHamiltonianDynamics',
            'BaseGradLogPDF',
            'GradLogPDFGaussian',
+           'GradLogPDFCustom',
            '_return_samples',
            'HamiltonianMC',
            'HamiltonianMCDA',
            'NoUTurnSampler',
            'NoUTurnSamplerDA',
+           'MultiChainSampler',
            'BayesianModelSampling',
            'GibbsSampling']
@@ -1,4 +1,7 @@
+from __future__ import division
+from collections import OrderedDict
 from warnings import warn
+import weakref
 
 import numpy as np
 
@@ -138,6 +141,137 @@ class GradLogPDFGaussian(BaseGradLogPDF):
         return grad, log_pdf
 
 
+class GradLogPDFCustom(BaseGradLogPDF):
+    """
+    Class for finding gradient and log of any distribution having a probability
+    density function, e.g. CustomDistribution or ContinuousFactor.
+    Inherits pgmpy.sampling.base.BaseGradLogPDF
+
+    The gradient of log of pdf is approximated by central differences, with all
+    the 2 * n + 1 points evaluated by a single call to pdf when pdf works on arrays.
+    Recently computed values are cached for each model by position, so that
+    repeated positions (as in NUTS trajectories) are not recomputed.
+
+    An analytic gradient can be used instead of central differences by
+    subclassing and defining a static method `gradient` which takes the values
+    of the variables, in the same order as pdf, and returns the gradient of log of pdf.
+
+    Parameters
+    ----------
+    variable_assignments : A 1d array like object (numpy.ndarray or list)
+        Vector representing values of variables at which we want to find gradient and log
+
+    model : An instance of pgmpy.factors.distributions.CustomDistribution
+        or pgmpy.factors.continuous.ContinuousFactor
+
+    Example
+    -------
+    >>> from pgmpy.sampling import GradLogPDFCustom
+    >>> from pgmpy.factors.distributions import CustomDistribution
+    >>> import numpy as np
+    >>> def banana_pdf(x, y):
+    ...     return np.exp(-0.5 * x ** 2 - 0.5 * (y - x ** 2) ** 2)
+    >>> model = CustomDistribution(['x', 'y'], banana_pdf)
+    >>> grad_logp, logp = GradLogPDFCustom([1, 2], model).get_gradient_log_pdf()
+    >>> logp
+    -1.0
+    >>> grad_logp
+    array([ 1., -1.])
+    >>> # Using analytic gradient
+    >>> class GradLogPDFBanana(GradLogPDFCustom):
+    ...     @staticmethod
+    ...     def gradient(x, y):
+    ...         return np.array([-x + 2 * x * (y - x ** 2), -(y - x ** 2)])
+    >>> grad_logp, logp = GradLogPDFBanana([1, 2], model).get_gradient_log_pdf()
+    >>> grad_logp
+    array([ 1., -1.])
+    """
+
+    # Analytic gradient of log of pdf, if None central differences are used
+    gradient = None
+
+    # Maximum number of positions cached for each model
+    cache_size = 512
+
+    def __init__(self, variable_assignments, model):
+        BaseGradLogPDF.__init__(self, variable_assignments, model)
+        self.grad_log, self.log_pdf = self._get_gradient_log_pdf()
+
+    @classmethod
+    def _get_model_state(cls, model):
+        """
+        Returns a dict having the cache of positions of model and whether its pdf works on arrays.
+        The state is reset if the pdf of model has changed since.
+        """
+        # Each subclass gets its own caches as they may define different gradients
+        if '_model_states' not in cls.__dict__:
+            cls._model_states = weakref.WeakKeyDictionary()
+
+        try:
+            state = cls._model_states.get(model)
+            if state is None or state['pdf'] is not model.pdf:
+                state = {'pdf': model.pdf, 'positions': OrderedDict(), 'vectorized': None}
+                cls._model_states[model] = state
+        except TypeError:
+            # model isn't hashable, so nothing is cached
+            state = {'pdf': model.pdf, 'positions': OrderedDict(), 'vectorized': None}
+
+        return state
+
+    def _evaluate_pdf(self, points, state):
+        """
+        Returns the pdf at each of the rows of points, using a single call to pdf if it works on arrays
+        """
+        pdf = self.model.pdf
+        if state['vectorized'] is not False:
+            try:
+                values = np.asarray(pdf(*points.T), dtype=float)
+                if state['vectorized'] is None:
+                    # Check once for each model that pdf broadcasts as expected
+                    state['vectorized'] = (values.shape == (len(points),) and
+                                           np.allclose(values[0], pdf(*points[0]), equal_nan=True))
+            except (TypeError, ValueError):
+                state['vectorized'] = False
+
+            if state['vectorized']:
+                return values
+
+        return np.array([pdf(*point) for point in points], dtype=float)
+
+    def _get_gradient_log_pdf(self):
+        """
+        Method that finds gradient and its log at position
+        """
+        position = self.variable_assignments.astype(float)
+        state = self._get_model_state(self.model)
+        cache = state['positions']
+        key = position.tobytes()
+
+        if key in cache:
+            grad, log_pdf = cache.pop(key)
+        elif self.gradient is not None:
+            grad = np.asarray(self.gradient(*position))
+            log_pdf = np.log(self.model.pdf(*position))
+        else:
+            # Points are position, followed by position + h_i * e_i and position - h_i * e_i for each variable
+            stepsizes = np.finfo(float).eps ** (1 / 3) * np.maximum(1.0, np.abs(position))
+            shifts = np.diag(stepsizes)
+            points = np.vstack([position, position + shifts, position - shifts])
+
+            num_variables = len(position)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_values = np.log(self._evaluate_pdf(points, state))
+                grad = (log_values[1:num_variables + 1] - log_values[num_variables + 1:]) / (2 * stepsizes)
+            log_pdf = log_values[0]
+
+        # Most recently used positions are at the end of cache
+        cache[key] = (grad, log_pdf)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        return grad, log_pdf
+
+
 class BaseSimulateHamiltonianDynamics(object):
     """
     Base class for proposing new values of position and momentum by simulating Hamiltonian Dynamics.
@@ -166,22 +300,28 @@ class BaseSimulateHamiltonianDynamics(object):
         Vector representing gradient log at given position
         If None, then will be calculated
 
+    inverse_mass_matrix: A 1d or 2d numpy.array, defaults to None
+        Diagonal (1d) or dense (2d) inverse mass matrix of the kinetic energy.
+        If None, then identity mass matrix is used
+
     Examples
     --------
     >>> from pgmpy.sampling import BaseSimulateHamiltonianDynamics
     >>> from pgmpy.factors.continuous import GaussianDistribution
     >>> from pgmpy.sampling import GradLogPDFGaussian
+    >>> from pgmpy.sampling.base import _get_velocity
     >>> import numpy as np
     >>> # Class should initalize self.new_position, self.new_momentum and self.new_grad_logp
     >>> # self.new_grad_logp represents gradient log at new proposed value of position
     >>> class ModifiedEuler(BaseSimulateHamiltonianDynamics):
-    ...     def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None):
-    ...         BaseSimulateHamiltonianDynamics.__init__(self, model, position, momentum,
-    ...                                                  stepsize, grad_log_pdf, grad_log_position)
+    ...     def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None,
+    ...                  inverse_mass_matrix=None):
+    ...         BaseSimulateHamiltonianDynamics.__init__(self, model, position, momentum, stepsize,
+    ...                                                  grad_log_pdf, grad_log_position, inverse_mass_matrix)
     ...         self.new_position, self.new_momentum, self.new_grad_logp = self._get_proposed_values()
     ...     def _get_proposed_values(self):
     ...         momentum_bar = self.momentum + self.stepsize * self.grad_log_position
-    ...         position_bar = self.position + self.stepsize * momentum_bar
+    ...         position_bar = self.position + self.stepsize * _get_velocity(momentum_bar, self.inverse_mass_matrix)
     ...         grad_log_position, _ = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
     ...         return position_bar, momentum_bar, grad_log_position
     >>> pos = np.array([1, 2])
@@ -199,7 +339,8 @@ class BaseSimulateHamiltonianDynamics(object):
     array([-0.9375, -1.875])
     """
 
-    def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None):
+    def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None,
+                 inverse_mass_matrix=None):
 
         position = _check_1d_array_object(position, 'position')
 
@@ -225,10 +366,13 @@ class BaseSimulateHamiltonianDynamics(object):
         self.model = model
         self.grad_log_pdf = grad_log_pdf
         self.grad_log_position = grad_log_position
+        self.inverse_mass_matrix = inverse_mass_matrix
 
         # new_position is the new proposed position, new_momentum is the new proposed momentum, new_grad_lop
         # is the value of grad log at new_position
         self.new_position = self.new_momentum = self.new_grad_logp = None
+        # new_log_pdf is the value of log of the distribution at new_position, if the method computes it
+        self.new_log_pdf = None
 
     def get_proposed_values(self):
         """
@@ -293,6 +437,10 @@ class LeapFrog(BaseSimulateHamiltonianDynamics):
         Vector representing gradient log at given position
         If None, then will be calculated
 
+    inverse_mass_matrix: A 1d or 2d numpy.array, defaults to None
+        Diagonal (1d) or dense (2d) inverse mass matrix of the kinetic energy.
+        If None, then identity mass matrix is used
+
     Example
     --------
     >>> from pgmpy.factors.continuous import GaussianDistribution
@@ -312,10 +460,11 @@ class LeapFrog(BaseSimulateHamiltonianDynamics):
     array([ 41., -58.])
     """
 
-    def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None):
+    def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None,
+                 inverse_mass_matrix=None):
 
-        BaseSimulateHamiltonianDynamics.__init__(self, model, position, momentum,
-                                                 stepsize, grad_log_pdf, grad_log_position)
+        BaseSimulateHamiltonianDynamics.__init__(self, model, position, momentum, stepsize,
+                                                 grad_log_pdf, grad_log_position, inverse_mass_matrix)
 
         self.new_position, self.new_momentum, self.new_grad_logp = self._get_proposed_values()
 
@@ -327,9 +476,9 @@ class LeapFrog(BaseSimulateHamiltonianDynamics):
         momentum_bar = self.momentum + 0.5 * self.stepsize * self.grad_log_position
 
         # Take full step in time for updating position position
-        position_bar = self.position + self.stepsize * momentum_bar
+        position_bar = self.position + self.stepsize * _get_velocity(momentum_bar, self.inverse_mass_matrix)
 
-        grad_log, _ = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
+        grad_log, self.new_log_pdf = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
 
         # Take remaining half step in time for updating momentum
         momentum_bar = momentum_bar + 0.5 * self.stepsize * grad_log
@@ -364,6 +513,10 @@ class ModifiedEuler(BaseSimulateHamiltonianDynamics):
         Vector representing gradient log at given position
         If None, then will be calculated
 
+    inverse_mass_matrix: A 1d or 2d numpy.array, defaults to None
+        Diagonal (1d) or dense (2d) inverse mass matrix of the kinetic energy.
+        If None, then identity mass matrix is used
+
     Example
     --------
     >>> from pgmpy.factors.continuous import GaussianDistribution
@@ -384,10 +537,11 @@ class ModifiedEuler(BaseSimulateHamiltonianDynamics):
     array([-2.125, -1.1875])
     """
 
-    def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None):
+    def __init__(self, model, position, momentum, stepsize, grad_log_pdf, grad_log_position=None,
+                 inverse_mass_matrix=None):
 
-        BaseSimulateHamiltonianDynamics.__init__(self, model, position, momentum,
-                                                 stepsize, grad_log_pdf, grad_log_position)
+        BaseSimulateHamiltonianDynamics.__init__(self, model, position, momentum, stepsize,
+                                                 grad_log_pdf, grad_log_position, inverse_mass_matrix)
 
         self.new_position, self.new_momentum, self.new_grad_logp = self._get_proposed_values()
 
@@ -399,9 +553,9 @@ class ModifiedEuler(BaseSimulateHamiltonianDynamics):
         momentum_bar = self.momentum + self.stepsize * self.grad_log_position
 
         # Take full step in time and update position
-        position_bar = self.position + self.stepsize * momentum_bar
+        position_bar = self.position + self.stepsize * _get_velocity(momentum_bar, self.inverse_mass_matrix)
 
-        grad_log, _ = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
+        grad_log, self.new_log_pdf = self.grad_log_pdf(position_bar, self.model).get_gradient_log_pdf()
 
         return position_bar, momentum_bar, grad_log
 
@@ -418,3 +572,16 @@ def _return_samples(return_type, samples):
             return samples
     else:
         return samples
+
+
+def _get_velocity(momentum, inverse_mass_matrix=None):
+    """
+    Returns the velocity, i.e. the product of the inverse mass matrix and momentum.
+    inverse_mass_matrix can either be None (identity), a 1d array (diagonal) or a 2d array (dense).
+    """
+    if inverse_mass_matrix is None:
+        return momentum
+    elif inverse_mass_matrix.ndim == 1:
+        return inverse_mass_matrix * momentum
+    else:
+        return np.dot(inverse_mass_matrix, momentum)
@@ -2,6 +2,8 @@ import unittest
 
 import pandas as pd
 import numpy as np
+from mock import MagicMock
+from scipy.stats import chi2, chi2_contingency
 
 from pgmpy.estimators import BaseEstimator
 
@@ -34,6 +36,67 @@ class TestBaseEstimator(unittest.TestCase):
         self.assertEqual(e.state_counts('C', parents=['A', 'B']).values.tolist(),
                          [[0, 0, 0, 0], [1, 0, 0, 0]])
 
+    def test_state_count_encoding(self):
+        e = BaseEstimator(self.d1, state_names={'D': ['X', 'Y', 'Z', 'W']})
+        self.assertEqual(e.dataset.codes.dtype, np.uint8)
+        self.assertEqual(e.state_counts('D').values.tolist(), [[0], [1], [1], [1]])
+        self.assertEqual(e.state_counts('D').index.tolist(), ['W', 'X', 'Y', 'Z'])
+        self.assertEqual(e.state_counts('D', ['C']).columns.tolist(), [(0,), (1,)])
+        self.assertEqual(e.state_counts('D', ['C']).index.name, 'D')
+
+    def test_state_count_random(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(500, 3)), columns=list('ABC'), dtype=float)
+        data.loc[np.random.rand(500) < 0.1, 'B'] = np.NaN
+        e = BaseEstimator(data, complete_samples_only=False)
+        expected = data.groupby(['C', 'A', 'B']).size().unstack(['A', 'B']).fillna(0)
+        self.assertEqual(e.state_counts('C', ['A', 'B']).values.tolist(), expected.values.tolist())
+
+    def test_state_count_cache(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(500, 4)), columns=list('ABCD'))
+        e = BaseEstimator(data)
+        e_cached = BaseEstimator(data, count_cache_size=10 ** 6)
+        self.assertIs(BaseEstimator(data, count_cache_size=10)._state_count_cache,
+                      e_cached._state_count_cache)
+        self.assertIsNot(BaseEstimator(data.copy(), count_cache_size=10 ** 6)._state_count_cache,
+                         e_cached._state_count_cache)
+
+        count_states = e_cached._count_states
+        e_cached._count_states = MagicMock(side_effect=count_states)
+        np.testing.assert_array_equal(e_cached.state_counts('A', ['B', 'C']), e.state_counts('A', ['B', 'C']))
+        # subsets are marginalized from the cached counts of ('A', 'B', 'C')
+        np.testing.assert_array_equal(e_cached.state_counts('C', ['A']), e.state_counts('C', ['A']))
+        np.testing.assert_array_equal(e_cached.state_counts('B'), e.state_counts('B'))
+        self.assertEqual(e_cached.test_conditional_independence('A', 'C', 'B'),
+                         e.test_conditional_independence('A', 'C', 'B'))
+        self.assertEqual(e_cached._count_states.call_count, 1)
+        np.testing.assert_array_equal(e_cached.state_counts('D', ['A']), e.state_counts('D', ['A']))
+        self.assertEqual(e_cached._count_states.call_count, 2)
+
+    def test_state_count_cache_missing_data(self):
+        e = BaseEstimator(self.d2, state_names={'C': [0, 1]}, complete_samples_only=False, count_cache_size=10 ** 6)
+        self.assertEqual(e.state_counts('C', parents=['A', 'B']).values.tolist(), [[0, 0, 0, 0], [1, 0, 0, 0]])
+        # B has no missing values, but A has, so its counts can't be marginalized from those of ('A', 'B', 'C')
+        self.assertEqual(e.state_counts('B').values.tolist(), [[2], [1]])
+        self.assertEqual(e.state_counts('C', parents=['B']).values.tolist(), [[0, 0], [1, 1]])
+        self.assertEqual(e.state_counts('C', parents=['A', 'B'], complete_samples_only=True).values.tolist(),
+                         [[0, 0, 0, 0], [0, 0, 0, 0]])
+
+    def test_state_count_cache_size(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(100, 3)), columns=list('ABC'))
+        e = BaseEstimator(data, count_cache_size=3 * 8 * 2)
+        state_counts = e.state_counts('A').values.tolist()
+        e.state_counts('B')
+        e.state_counts('C')
+        self.assertEqual(len(e._state_count_cache._entries), 2)
+        self.assertLessEqual(e._state_count_cache.nbytes, 3 * 8 * 2)
+        # counts larger than the budget are not cached
+        e.state_counts('A', ['B'])
+        self.assertEqual(len(e._state_count_cache._entries), 2)
+        # returned DataFrames do not share memory with the cached counts
+        e.state_counts('C').iloc[:, :] = 0
+        self.assertEqual(e.state_counts('A').values.tolist(), state_counts)
+        self.assertTrue(e.state_counts('C').values.any())
+
     def test_test_conditional_independence(self):
         data = pd.DataFrame(np.random.randint(0, 2, size=(1000, 4)), columns=list('ABCD'))
         data['E'] = data['A'] + data['B'] + data['C']
@@ -47,14 +110,50 @@ class TestBaseEstimator(unittest.TestCase):
         est = BaseEstimator(self.titanic_data)
 
         np.testing.assert_almost_equal(est.test_conditional_independence('Embarked', 'Sex'),
-                                       (13.355630515001746, 0.020264556044311655, True))
+                                       (13.355630515001746, 0.0012585245232290144, True))
         np.testing.assert_almost_equal(est.test_conditional_independence('Pclass', 'Survived', ['Embarked']),
-                                       (96.403283942888635, 4.1082315854166553e-13, True))
+                                       (96.403283942888635, 1.4105920580678556e-18, True))
         np.testing.assert_almost_equal(est.test_conditional_independence('Embarked', 'Survived', ["Sex", "Pclass"]),
-                                       (21.537481934494085, 0.96380273702382602, True))
+                                       (21.537481934494085, 0.043042545736520985, True))
         # insufficient data test commented out, because generates warning
         # self.assertEqual(est.test_conditional_independence('Sex', 'Survived', ["Age", "Embarked"]),
         #                 (235.51133052530713, 0.99999999683394869, False))
 
+    def test_test_conditional_independence_statistics(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(1000, 3)), columns=list('XYZ'))
+        data['Y'] = (data['Y'] + data['Z']) % 3
+        # X has a structural zero in the stratum Z=0
+        data.loc[(data['Z'] == 0) & (data['X'] == 2), 'X'] = 1
+        est = BaseEstimator(data)
+
+        for method, lambda_ in [('chi_square', 'pearson'), ('g_test', 'log-likelihood')]:
+            statistic, p_value, sufficient_data = est.test_conditional_independence('X', 'Y', method=method)
+            table = pd.crosstab(data['X'], data['Y']).values
+            ref_statistic, ref_p_value, ref_dof, _ = chi2_contingency(table, correction=False, lambda_=lambda_)
+            self.assertAlmostEqual(statistic, ref_statistic)
+            self.assertAlmostEqual(p_value, ref_p_value)
+
+            # statistics and degrees of freedom are summed over the strata
+            statistic, p_value, sufficient_data = est.test_conditional_independence('X', 'Y', ['Z'], method=method)
+            strata = [chi2_contingency(pd.crosstab(stratum['X'], stratum['Y']).values, correction=False,
+                                       lambda_=lambda_) for z, stratum in data.groupby('Z')]
+            self.assertEqual([ref[2] for ref in strata], [2, 4, 4])
+            self.assertAlmostEqual(statistic, sum(ref[0] for ref in strata))
+            self.assertAlmostEqual(p_value, chi2.sf(statistic, 10))
+
+        self.assertRaises(ValueError, est.test_conditional_independence, 'X', 'Y', method='t_test')
+
+    def test_test_conditional_independences(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(1000, 4)), columns=list('ABCD'))
+        data['E'] = data['A'] + data['B']
+        data.loc[::10, 'C'] = np.nan
+        pairs = [('A', 'B'), ('A', 'C'), ('C', 'D')]
+        for est in [BaseEstimator(data), BaseEstimator(data, count_cache_size=10 ** 6)]:
+            for method in ['chi_square', 'g_test']:
+                results = est.test_conditional_independences(pairs, ['E'], method=method)
+                for (X, Y), result in zip(pairs, results):
+                    np.testing.assert_almost_equal(result, est.test_conditional_independence(X, Y, 'E', method))
+        self.assertLess(results[0][1], 0.01)
+
     def tearDown(self):
         del self.d1
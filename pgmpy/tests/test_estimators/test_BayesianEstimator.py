@@ -74,6 +74,18 @@ class TestBayesianEstimator(unittest.TestCase):
         self.assertSetEqual(set(self.est3.get_parameters(prior_type="dirichlet",
                                                          pseudo_counts=pseudo_counts)), cpds)
 
+    def test_get_parameters_equivalent_sample_size(self):
+        equivalent_sample_size = {'A': 3, 'B': 1, 'C': 12}
+        cpds = set([self.est2.estimate_cpd(node, prior_type='BDeu', equivalent_sample_size=size)
+                    for node, size in equivalent_sample_size.items()])
+        self.assertSetEqual(set(self.est2.get_parameters(prior_type='BDeu',
+                                                         equivalent_sample_size=equivalent_sample_size)), cpds)
+
+        cpd_A = TabularCPD('A', 3, [[3.0 / 6], [2.0 / 6], [1.0 / 6]])
+        self.assertIn(cpd_A, cpds)
+        self.assertRaises(ValueError, self.est2.get_parameters, prior_type='dirichlet',
+                          pseudo_counts={'A': [[1], [1]], 'B': [[1], [1]], 'C': [[1] * 6] * 3})
+
     def tearDown(self):
         del self.m1
         del self.d1
@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 
 from pgmpy.models import BayesianModel
@@ -28,6 +29,15 @@ class TestBdeuScore(unittest.TestCase):
         titanic2.add_nodes_from(["Sex", "Survived", "Pclass"])
         self.assertLess(scorer.score(titanic2), scorer.score(titanic))
 
+    def test_local_scores(self):
+        scorer = BdeuScore(self.titanic_data2)
+        parents_list = [[], ['Sex'], ['Sex', 'Pclass'], ('Pclass',)]
+        np.testing.assert_almost_equal(scorer.local_scores('Survived', parents_list),
+                                       [-595.8498376725368, -464.95364097195505,
+                                        -414.5831184357039, -548.8222111387591])
+        self.assertAlmostEqual(scorer.local_score('Survived', ['Sex', 'Pclass']), -414.5831184357039)
+        self.assertEqual(len(scorer.local_scores('Survived', [])), 0)
+
     def tearDown(self):
         del self.d1
         del self.m1
@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 
 from pgmpy.models import BayesianModel
@@ -28,6 +29,15 @@ class TestBicScore(unittest.TestCase):
         titanic2.add_nodes_from(["Sex", "Survived", "Pclass"])
         self.assertLess(scorer.score(titanic2), scorer.score(titanic))
 
+    def test_local_scores(self):
+        scorer = BicScore(self.titanic_data2)
+        parents_list = [[], ['Sex'], ['Sex', 'Pclass'], ('Pclass',)]
+        np.testing.assert_almost_equal(scorer.local_scores('Survived', parents_list),
+                                       [-596.7237406260831, -465.69430691612473,
+                                        -419.42548244713805, -551.7425229064759])
+        self.assertAlmostEqual(scorer.local_score('Survived', ['Sex', 'Pclass']), -419.42548244713805)
+        self.assertEqual(len(scorer.local_scores('Survived', [])), 0)
+
     def tearDown(self):
         del self.d1
         del self.m1
@@ -1,10 +1,14 @@
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
 
 import pandas as pd
 import numpy as np
 
 from pgmpy.estimators import ConstraintBasedEstimator
-from pgmpy.independencies import Independencies
+from pgmpy.independencies import Independencies, IndependenceAssertion
 from pgmpy.models import BayesianModel
 from pgmpy.base import DirectedGraph, UndirectedGraph
 
@@ -34,6 +38,59 @@ class TestConstraintBasedEstimator(unittest.TestCase):
         self.assertEqual([len(v) for v in sorted(sep_sets2.values())],
                          [len(v) for v in sorted(sep_sets_ref2.values())])
 
+    def test_build_skeleton_stable(self):
+        model = BayesianModel([('A', 'C'), ('B', 'C'), ('B', 'D'), ('C', 'E')])
+        ind = model.get_independencies()
+        skel, sep_sets = ConstraintBasedEstimator.build_skeleton(model.nodes(), ind, stable=True)
+        self.assertTrue(self._edge_list_equal(skel.edges(), [('D', 'B'), ('A', 'C'), ('B', 'C'), ('C', 'E')]))
+        self.assertEqual(set(sep_sets.keys()), set([frozenset('DC'), frozenset('EB'), frozenset('AD'),
+                                                    frozenset('ED'), frozenset('EA'), frozenset('AB')]))
+        for separating_set in sep_sets.values():
+            self.assertIsInstance(separating_set, tuple)
+
+        # the result doesn't depend on the order of the nodes or on the number of workers
+        for nodes, n_jobs in [(sorted(model.nodes(), reverse=True), 1), (model.nodes(), 2)]:
+            skel2, sep_sets2 = ConstraintBasedEstimator.build_skeleton(nodes, ind, stable=True, n_jobs=n_jobs)
+            self.assertEqual(set(map(frozenset, skel2.edges())), set(map(frozenset, skel.edges())))
+            self.assertEqual(sep_sets2.keys(), sep_sets.keys())
+            if n_jobs != 1:
+                self.assertEqual(sep_sets2, sep_sets)
+
+    def test_build_skeleton_checkpoint(self):
+        model = BayesianModel([('A', 'C'), ('B', 'C'), ('B', 'D'), ('C', 'E')])
+        ind = model.get_independencies()
+        directory = tempfile.mkdtemp()
+        checkpoint = os.path.join(directory, 'skeleton.pkl')
+        try:
+            skel, sep_sets = ConstraintBasedEstimator.build_skeleton(model.nodes(), ind, stable=True,
+                                                                     checkpoint=checkpoint)
+            with open(checkpoint, 'rb') as f:
+                self.assertEqual(pickle.load(f)['separating_sets'], sep_sets)
+
+            os.remove(checkpoint)
+
+            # interrupt the search in the second level, then resume it without repeating the first level
+            def interrupted(X, Y, Zs):
+                if Zs:
+                    raise KeyboardInterrupt
+                return IndependenceAssertion(X, Y, Zs) in ind
+
+            self.assertRaises(KeyboardInterrupt, ConstraintBasedEstimator.build_skeleton, model.nodes(), interrupted,
+                              stable=True, checkpoint=checkpoint)
+
+            def is_independent(X, Y, Zs):
+                self.assertTrue(Zs)
+                return IndependenceAssertion(X, Y, Zs) in ind
+
+            skel2, sep_sets2 = ConstraintBasedEstimator.build_skeleton(model.nodes(), is_independent, stable=True,
+                                                                       checkpoint=checkpoint)
+            self.assertEqual(set(map(frozenset, skel2.edges())), set(map(frozenset, skel.edges())))
+            self.assertEqual(sep_sets2, sep_sets)
+
+            self.assertRaises(ValueError, ConstraintBasedEstimator.build_skeleton, 'ABC', ind, checkpoint=checkpoint)
+        finally:
+            shutil.rmtree(directory)
+
     def test_skeleton_to_pdag(self):
         data = pd.DataFrame(np.random.randint(0, 3, size=(1000, 3)), columns=list('ABD'))
         data['C'] = data['A'] - data['B']
@@ -118,6 +175,15 @@ class TestConstraintBasedEstimator(unittest.TestCase):
         self.assertTrue(self._edge_list_equal(skel.edges(), [('X', 'Z'), ('Y', 'Z')]))
         self.assertEqual(sep_sets, {frozenset(('X', 'Y')): ('Z',)})
 
+    def test_estimate_skeleton_stable(self):
+        data = pd.DataFrame(np.random.randint(0, 2, size=(1000, 5)), columns=list('ABCDE'))
+        data['F'] = data['A'] + data['B'] + data['C']
+        skel, sep_sets = ConstraintBasedEstimator(data).estimate_skeleton(stable=True)
+        skel2, sep_sets2 = ConstraintBasedEstimator(data, n_jobs=2).estimate_skeleton(stable=True)
+        self.assertTrue(self._edge_list_equal(skel.edges(), [('A', 'F'), ('B', 'F'), ('C', 'F')]))
+        self.assertEqual(set(map(frozenset, skel2.edges())), set(map(frozenset, skel.edges())))
+        self.assertEqual(sep_sets2, sep_sets)
+
     def test_estimate(self):
         data = pd.DataFrame(np.random.randint(0, 3, size=(1000, 3)), columns=list('XYZ'))
         data['sum'] = data.sum(axis=1)
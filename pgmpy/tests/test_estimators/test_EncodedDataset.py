@@ -0,0 +1,122 @@
+import pickle
+import unittest
+
+import pandas as pd
+import numpy as np
+
+from pgmpy.models import BayesianModel
+from pgmpy.estimators import (EncodedDataset, BaseEstimator, MaximumLikelihoodEstimator, BayesianEstimator,
+                              ExpectationMaximization, K2Score, BdeuScore, BicScore, ConstraintBasedEstimator)
+
+
+class TestEncodedDataset(unittest.TestCase):
+    def setUp(self):
+        self.d1 = pd.DataFrame(data={'A': [0, np.NaN, 1, 1],
+                                     'B': ['X', 'Y', 'X', np.NaN],
+                                     'C': [1, 1, 0, 0]})
+        self.d2 = pd.DataFrame(np.random.randint(0, 3, size=(1000, 4)), columns=list('ABCD'))
+        self.d2['E'] = self.d2['A'] + self.d2['B']
+
+    def test_encoding(self):
+        dataset = EncodedDataset(self.d1, state_names={'C': [1, 0, 2]})
+        self.assertEqual(dataset.variables, ['A', 'B', 'C'])
+        self.assertEqual(dataset.state_names, {'A': [0, 1], 'B': ['X', 'Y'], 'C': [0, 1, 2]})
+        self.assertEqual(dataset.codes.tolist(), [[0, 0, 1], [2, 1, 1], [1, 0, 0], [1, 2, 0]])
+        self.assertEqual(dataset.missing.tolist(), [[False, False, False], [True, False, False],
+                                                    [False, False, False], [False, True, False]])
+        self.assertEqual(dataset.complete_rows.tolist(), [True, False, True, False])
+        self.assertIsNone(dataset.weights)
+        self.assertEqual(len(dataset), 4)
+
+        self.assertRaises(ValueError, EncodedDataset, self.d1, state_names={'B': ['X']})
+        self.assertRaises(ValueError, EncodedDataset, self.d1, weights=[1, 1, 1])
+        self.assertRaises(ValueError, EncodedDataset, self.d1, weights=[1, 1, -1, 1])
+        self.assertRaises(ValueError, EncodedDataset, self.d1, weights='D')
+
+        weighted = EncodedDataset(self.d1, weights='C')
+        self.assertEqual(weighted.variables, ['A', 'B'])
+        self.assertEqual(weighted.weights.tolist(), [1, 1, 0, 0])
+        self.assertEqual(weighted.sample_size, 2)
+
+    def test_pickle(self):
+        dataset = EncodedDataset(self.d1, weights=[1, 2, 3, 4])
+        state = dataset.__getstate__()
+        self.assertSetEqual(set(state), set(['variables', 'state_names', 'codes', 'weights']))
+
+        unpickled = pickle.loads(pickle.dumps(dataset))
+        self.assertEqual(unpickled.codes.tolist(), dataset.codes.tolist())
+        self.assertEqual(unpickled.missing.tolist(), dataset.missing.tolist())
+        self.assertEqual(unpickled.weights.tolist(), [1, 2, 3, 4])
+        self.assertEqual(unpickled.fingerprint(), dataset.fingerprint())
+        self.assertNotEqual(EncodedDataset(self.d1).fingerprint(), dataset.fingerprint())
+
+    def test_estimators(self):
+        dataset = EncodedDataset(self.d2)
+        model = BayesianModel([('A', 'E'), ('B', 'E'), ('C', 'D')])
+        self.assertSetEqual(set(MaximumLikelihoodEstimator(model, dataset).get_parameters()),
+                            set(MaximumLikelihoodEstimator(model, self.d2).get_parameters()))
+        self.assertSetEqual(set(BayesianEstimator(model, dataset).get_parameters()),
+                            set(BayesianEstimator(model, self.d2).get_parameters()))
+        self.assertEqual(BicScore(dataset).score(model), BicScore(self.d2).score(model))
+        self.assertEqual(BicScore(dataset)._data_fingerprint(), BicScore(self.d2)._data_fingerprint())
+
+        skeleton, _ = ConstraintBasedEstimator(dataset).estimate_skeleton()
+        self.assertSetEqual(set(map(frozenset, skeleton.edges())), set([frozenset(('A', 'E')),
+                                                                        frozenset(('B', 'E'))]))
+
+        self.assertIs(BaseEstimator(dataset, count_cache_size=10 ** 6)._state_count_cache,
+                      BaseEstimator(dataset, count_cache_size=10 ** 6)._state_count_cache)
+        self.assertRaises(ValueError, BaseEstimator, dataset, state_names={'A': [0, 1]})
+        self.assertRaises(ValueError, MaximumLikelihoodEstimator, BayesianModel([('A', 'F')]), dataset)
+
+        # only the encoded data set is pickled with an estimator
+        estimator = BaseEstimator(self.d2)
+        self.assertIsNone(pickle.loads(pickle.dumps(estimator)).data)
+
+    def test_deduplicate(self):
+        dataset = EncodedDataset(self.d1, weights=[1, 2, 3, 4])
+        d1 = pd.concat([self.d1, self.d1]).reset_index(drop=True)
+        deduplicated = EncodedDataset(d1).deduplicate()
+        self.assertEqual(deduplicated.codes.tolist(), dataset.codes[[0, 2, 3, 1]].tolist())
+        self.assertEqual(deduplicated.weights.tolist(), [2, 2, 2, 2])
+        self.assertEqual(deduplicated.sample_size, 8)
+        self.assertEqual(dataset.deduplicate().weights.tolist(), [1, 3, 4, 2])
+
+    def test_weighted_estimators(self):
+        d2 = self.d2[['A', 'B', 'C', 'E']].mask(np.random.uniform(size=(1000, 4)) < 0.05)
+        deduplicated = EncodedDataset(d2).deduplicate()
+        weighted = pd.DataFrame(deduplicated.codes, columns=deduplicated.variables).astype(float)
+        for var, states in deduplicated.state_names.items():
+            weighted[var] = weighted[var].map(dict(enumerate(states)))
+        weighted['count'] = deduplicated.weights
+        model = BayesianModel([('A', 'E'), ('B', 'E'), ('C', 'E')])
+
+        for data, kwargs in [(deduplicated, {}), (weighted, {'weights': 'count'})]:
+            self.assertTrue(len(data) < len(d2))
+            for estimator in [MaximumLikelihoodEstimator, BayesianEstimator]:
+                self.assertSetEqual(set(estimator(model, data, **kwargs).get_parameters()),
+                                    set(estimator(model, d2).get_parameters()))
+            for score in [K2Score, BdeuScore, BicScore]:
+                self.assertAlmostEqual(score(data, **kwargs).score(model), score(d2).score(model))
+
+            c = ConstraintBasedEstimator(data, **kwargs)
+            for statistic, expected in zip(c.test_conditional_independence('A', 'B', ['E']),
+                                           ConstraintBasedEstimator(d2).test_conditional_independence('A', 'B', ['E'])):
+                self.assertAlmostEqual(statistic, expected)
+
+            em = ExpectationMaximization(model, data, **kwargs)
+            em_raw = ExpectationMaximization(model, d2)
+            for cpd, expected in zip(em.get_parameters(seed=0), em_raw.get_parameters(seed=0)):
+                np.testing.assert_allclose(cpd.values, expected.values)
+            self.assertAlmostEqual(em.log_likelihoods[-1], em_raw.log_likelihoods[-1])
+
+        # chunks of data with a weights column
+        chunks = [weighted[:len(weighted) // 2], weighted[len(weighted) // 2:]]
+        self.assertSetEqual(set(MaximumLikelihoodEstimator(model, iter(chunks), state_names=deduplicated.state_names,
+                                                           weights='count').get_parameters()),
+                            set(MaximumLikelihoodEstimator(model, d2).get_parameters()))
+        self.assertRaises(ValueError, BaseEstimator, deduplicated, weights='count')
+
+    def tearDown(self):
+        del self.d1
+        del self.d2
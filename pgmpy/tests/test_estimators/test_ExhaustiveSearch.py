@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 import pandas as pd
@@ -48,6 +51,9 @@ class TestBaseEstimator(unittest.TestCase):
         est_bic = self.est_rand.estimate()
         self.assertTrue(est_bic.edges() == [('B', 'C')] or est_bic.edges() == [('C', 'B')])
 
+        empty = ExhaustiveSearch(pd.DataFrame()).estimate()
+        self.assertListEqual(empty.nodes(), [])
+
     def test_estimate_titanic(self):
         e1 = self.est_titanic.estimate()
         self.assertSetEqual(set(e1.edges()), set([('Survived', 'Pclass'), ('Sex', 'Pclass'), ('Sex', 'Survived')]))
@@ -87,6 +93,37 @@ class TestBaseEstimator(unittest.TestCase):
                       [score for score, model in scores],
                       [score for score, edges in scores_ref])
 
+    def test_estimate_optimal(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(300, 4)), columns=list('ABCD'))
+        data['B'] = (data['A'] + np.random.randint(0, 2, size=300)) % 3
+        data['D'] = (data['B'] * data['C'] + np.random.randint(0, 2, size=300)) % 3
+        scorer = BicScore(data)
+        est = ExhaustiveSearch(data, scoring_method=scorer)
+        directory = tempfile.mkdtemp()
+        try:
+            for max_indegree in [None, 2, 1, 0]:
+                best_score = max(scorer.score(dag) for dag in est.all_dags()
+                                 if max_indegree is None or max(dag.in_degree().values()) <= max_indegree)
+                for memmap_dir in [None, directory]:
+                    model = est.estimate(max_indegree=max_indegree, memmap_dir=memmap_dir)
+                    self.assertSetEqual(set(model.nodes()), set('ABCD'))
+                    self.assertAlmostEqual(scorer.score(model), best_score)
+                    if max_indegree is not None:
+                        self.assertLessEqual(max(model.in_degree().values()), max_indegree)
+            self.assertEqual(os.listdir(directory), [])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_estimate_parallel(self):
+        est_parallel = ExhaustiveSearch(self.titanic_data2, n_jobs=2)
+        self.assertEqual(sorted(est_parallel.estimate().edges()), sorted(self.est_titanic.estimate().edges()))
+        self.assertEqual([(score, sorted(dag.edges())) for score, dag in est_parallel.all_scores()],
+                         [(score, sorted(dag.edges())) for score, dag in self.est_titanic.all_scores()])
+
+    def test_all_scores_match_score(self):
+        for score, dag in self.est_titanic.all_scores():
+            self.assertAlmostEqual(score, self.est_titanic.scoring_method.score(dag))
+
     def tearDown(self):
         del self.rand_data
         del self.est_rand
@@ -0,0 +1,94 @@
+import itertools
+import unittest
+
+import pandas as pd
+import numpy as np
+
+from pgmpy.models import BayesianModel
+from pgmpy.estimators import ExpectationMaximization, MaximumLikelihoodEstimator
+from pgmpy.factors.discrete import TabularCPD
+
+
+class TestExpectationMaximization(unittest.TestCase):
+    def setUp(self):
+        self.m1 = BayesianModel([('A', 'C'), ('B', 'C'), ('C', 'D'), ('B', 'D')])
+        self.cardinalities = {'A': 2, 'B': 3, 'C': 2, 'D': 2}
+        self.state_names = {var: list(range(card)) for var, card in self.cardinalities.items()}
+        random_state = np.random.RandomState(0)
+        self.d1 = pd.DataFrame({var: random_state.randint(0, card, size=200)
+                                for var, card in self.cardinalities.items()}).astype(float)
+        self.d2 = self.d1.mask(random_state.uniform(size=self.d1.shape) < 0.3)
+
+    def brute_force_cpds(self, cpds, data):
+        "Returns the CPDs of one EM iteration computed by enumerating the states of the missing values."
+        values = {cpd.variable: cpd for cpd in cpds}
+        counts = {cpd.variable: np.zeros(cpd.values.shape) for cpd in cpds}
+        for _, row in data.iterrows():
+            hidden = [var for var in row.index if np.isnan(row[var])]
+            assignments, probabilities = [], []
+            for states in itertools.product(*[range(self.cardinalities[var]) for var in hidden]):
+                assignment = {var: int(row[var]) for var in row.index if var not in hidden}
+                assignment.update(zip(hidden, states))
+                assignments.append(assignment)
+                probabilities.append(np.prod([values[var].values[tuple(assignment[v] for v in values[var].variables)]
+                                              for var in values]))
+            for assignment, probability in zip(assignments, probabilities):
+                for var in counts:
+                    index = tuple(assignment[v] for v in values[var].variables)
+                    counts[var][index] += probability / sum(probabilities)
+        return [TabularCPD(var, self.cardinalities[var], (counts[var] / counts[var].sum(axis=0)).reshape(
+                    self.cardinalities[var], -1), evidence=values[var].variables[1:],
+                    evidence_card=[self.cardinalities[v] for v in values[var].variables[1:]])
+                for var in counts]
+
+    def test_get_parameters_complete_data(self):
+        em = ExpectationMaximization(self.m1, self.d1)
+        cpds = em.get_parameters()
+        self.assertSetEqual(set(cpds), set(MaximumLikelihoodEstimator(self.m1, self.d1).get_parameters()))
+        self.assertTrue(em.converged)
+        # the first iteration already gives the MLE, the next two check convergence
+        self.assertEqual(len(em.log_likelihoods), 3)
+
+    def test_get_parameters_iteration(self):
+        init_em = ExpectationMaximization(self.m1, self.d2, state_names=self.state_names)
+        init_cpds = init_em.get_parameters(max_iter=1, seed=1)
+        em = ExpectationMaximization(self.m1, self.d2, state_names=self.state_names)
+        cpds = em.get_parameters(max_iter=1, init_cpds=init_cpds)
+        self.assertSetEqual(set(cpds), set(self.brute_force_cpds(init_cpds, self.d2)))
+        self.assertFalse(em.converged)
+
+    def test_get_parameters_convergence(self):
+        em = ExpectationMaximization(self.m1, self.d2, state_names=self.state_names)
+        cpds = em.get_parameters(seed=1, tol=1e-8)
+        self.assertTrue(em.converged)
+        self.assertTrue(np.all(np.diff(em.log_likelihoods) > -1e-9))
+
+        em_parallel = ExpectationMaximization(self.m1, self.d2, state_names=self.state_names)
+        self.assertListEqual(em_parallel.get_parameters(seed=1, tol=1e-8, n_jobs=2), cpds)
+        self.assertListEqual(em_parallel.log_likelihoods, em.log_likelihoods)
+
+    def test_latent_variable(self):
+        model = BayesianModel([('H', 'A'), ('H', 'B'), ('H', 'C')])
+        random_state = np.random.RandomState(3)
+        latent = random_state.uniform(size=5000) < 0.3
+        probabilities = {'A': (0.1, 0.9), 'B': (0.2, 0.8), 'C': (0.15, 0.7)}
+        data = pd.DataFrame({var: (random_state.uniform(size=5000) < np.where(latent, p1, p0)).astype(int)
+                             for var, (p0, p1) in probabilities.items()})
+
+        self.assertRaises(ValueError, ExpectationMaximization, model, data)
+        em = ExpectationMaximization(model, data, state_names={'H': [0, 1]})
+        cpds = {cpd.variable: cpd for cpd in em.get_parameters(seed=0)}
+        # the states of the latent variable are only identified up to permutation
+        latent_state = int(np.argmin(cpds['H'].values))
+        self.assertAlmostEqual(cpds['H'].values[latent_state], 0.3, delta=0.05)
+        for var, (p0, p1) in probabilities.items():
+            self.assertAlmostEqual(cpds[var].values[1, latent_state], p1, delta=0.05)
+            self.assertAlmostEqual(cpds[var].values[1, 1 - latent_state], p0, delta=0.05)
+
+        model.fit(data, estimator=ExpectationMaximization, state_names={'H': [0, 1]}, seed=0)
+        self.assertSetEqual(set(model.get_cpds()), set(cpds.values()))
+
+    def tearDown(self):
+        del self.m1
+        del self.d1
+        del self.d2
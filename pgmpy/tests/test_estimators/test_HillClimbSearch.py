@@ -3,7 +3,8 @@ import unittest
 import pandas as pd
 import numpy as np
 
-from pgmpy.estimators import HillClimbSearch, K2Score
+from pgmpy.estimators import HillClimbSearch, K2Score, BicScore
+from pgmpy.estimators.HillClimbSearch import _transitive_closure, _add_reachability
 from pgmpy.models import BayesianModel
 
 
@@ -63,7 +64,10 @@ class TestBaseEstimator(unittest.TestCase):
                               (('-', ('Pclass', 'Embarked')), -32.171482832532774),
                               (('flip', ('Pclass', 'Embarked')), 3.3563814191281836),
                               (('flip', ('Survived', 'Sex')), 0.039737027979640516)]
-        self.assertSetEqual(set(legal_ops_both), set(legal_ops_both_ref))
+        legal_ops_both = dict(legal_ops_both)
+        self.assertSetEqual(set(legal_ops_both), set(op for op, score in legal_ops_both_ref))
+        for op, score in legal_ops_both_ref:
+            self.assertAlmostEqual(legal_ops_both[op], score)
 
     def test_estimate_rand(self):
         est1 = self.est_rand.estimate()
@@ -77,6 +81,74 @@ class TestBaseEstimator(unittest.TestCase):
         self.assertSetEqual(set(self.est_titanic2.estimate().edges()),
                             set([('Survived', 'Pclass'), ('Sex', 'Pclass'), ('Sex', 'Survived')]))
 
+    def test_estimate_matches_legal_operations(self):
+        # `estimate` only rescores nodes whose parents changed; it has to take the same
+        # steps as a search that rescores all legal operations in every iteration
+        np.random.seed(0)
+        data = pd.DataFrame(np.random.randint(0, 3, size=(2000, 6)), columns=list('ABCDEF'))
+        data['G'] = (data['A'] + data['B']) % 3
+        data['H'] = np.where(np.random.rand(2000) < 0.8, data['G'], data['C'])
+        est = HillClimbSearch(data, scoring_method=BicScore(data))
+
+        for tabu_length, max_indegree in [(0, None), (3, 1)]:
+            model = BayesianModel()
+            model.add_nodes_from(data.columns)
+            tabu_list = []
+            while True:
+                operations = list(est._legal_operations(model, tabu_list, max_indegree))
+                operation, score_delta = max(operations, key=lambda op: op[1]) if operations else (None, 0)
+                if score_delta < 1e-8:
+                    break
+                X, Y = operation[1]
+                if operation[0] == '+':
+                    model.add_edge(X, Y)
+                    tabu_list = ([('-', (X, Y))] + tabu_list)[:tabu_length]
+                elif operation[0] == '-':
+                    model.remove_edge(X, Y)
+                    tabu_list = ([('+', (X, Y))] + tabu_list)[:tabu_length]
+                else:
+                    model.remove_edge(X, Y)
+                    model.add_edge(Y, X)
+                    tabu_list = ([operation] + tabu_list)[:tabu_length]
+
+            estimated = est.estimate(tabu_length=tabu_length, max_indegree=max_indegree)
+            self.assertSetEqual(set(estimated.edges()), set(model.edges()))
+
+    def test_reachability(self):
+        model = BayesianModel([('A', 'B'), ('B', 'C'), ('D', 'C')])
+        nodes = ['A', 'B', 'C', 'D', 'E']
+        reachable = _transitive_closure(model, nodes)
+        np.testing.assert_array_equal(reachable, [[0, 1, 1, 0, 0], [0, 0, 1, 0, 0], [0, 0, 0, 0, 0],
+                                                  [0, 0, 1, 0, 0], [0, 0, 0, 0, 0]])
+
+        model.add_edge('E', 'A')
+        _add_reachability(reachable, 4, 0)
+        np.testing.assert_array_equal(reachable, _transitive_closure(model, nodes))
+        model.add_edge('D', 'E')
+        _add_reachability(reachable, 3, 4)
+        np.testing.assert_array_equal(reachable, _transitive_closure(model, nodes))
+        self.assertTrue(reachable[3, 0] and reachable[3, 1])
+
+    def test_estimate_parallel(self):
+        est_parallel = HillClimbSearch(self.titanic_data1, n_jobs=2)
+        self.assertEqual(sorted(est_parallel.estimate().edges()), sorted(self.est_titanic1.estimate().edges()))
+        self.assertEqual(sorted(est_parallel.estimate(max_indegree=1).edges()),
+                         sorted(self.est_titanic1.estimate(max_indegree=1).edges()))
+
+        tasks = [('Age', [[], ['Sex'], ['Sex', 'Pclass']]), ('Survived', [['Embarked']])]
+        pool = est_parallel._get_pool()
+        try:
+            for parallel, serial in zip(est_parallel._batch_local_scores(tasks, pool),
+                                        est_parallel._batch_local_scores(tasks)):
+                np.testing.assert_array_equal(parallel, serial)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.assertRaises(ValueError, HillClimbSearch, self.titanic_data1, n_jobs=0)
+        self.assertRaises(ValueError, HillClimbSearch, self.titanic_data1, n_jobs=-2)
+        self.assertEqual(HillClimbSearch(self.titanic_data1, n_jobs=np.int64(2)).n_jobs, 2)
+
     def tearDown(self):
         del self.rand_data
         del self.est_rand
@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 
 from pgmpy.models import BayesianModel
@@ -28,6 +29,15 @@ class TestK2Score(unittest.TestCase):
         titanic2.add_nodes_from(["Sex", "Survived", "Pclass"])
         self.assertLess(scorer.score(titanic2), scorer.score(titanic))
 
+    def test_local_scores(self):
+        scorer = K2Score(self.titanic_data2)
+        parents_list = [[], ['Sex'], ['Sex', 'Pclass'], ('Pclass',)]
+        np.testing.assert_almost_equal(scorer.local_scores('Survived', parents_list),
+                                       [-596.5265117082738, -464.8852784391937,
+                                        -414.676342628405, -549.4692054951099])
+        self.assertAlmostEqual(scorer.local_score('Survived', ['Sex', 'Pclass']), -414.676342628405)
+        self.assertEqual(len(scorer.local_scores('Survived', [])), 0)
+
     def tearDown(self):
         del self.d1
         del self.m1
@@ -1,7 +1,10 @@
+import os
+import tempfile
 import unittest
 
 import pandas as pd
 import numpy as np
+from mock import patch
 
 from pgmpy.models import BayesianModel
 from pgmpy.estimators import MaximumLikelihoodEstimator
@@ -83,6 +86,62 @@ class TestMLE(unittest.TestCase):
                                 evidence=['A', 'B'], evidence_card=[2, 2])])
         self.assertSetEqual(cpds2, set(e2.get_parameters()))
 
+    def test_get_parameters_single_scan(self):
+        model = BayesianModel([('A', 'C'), ('B', 'C'), ('C', 'D'), ('A', 'D')])
+        data = pd.DataFrame(np.random.randint(0, 3, size=(1000, 4)), columns=list('ABCD'))
+        data = data.astype(float)
+        data.loc[::7, 'B'] = np.NaN
+        for complete_samples_only in [True, False]:
+            mle = MaximumLikelihoodEstimator(model, data, complete_samples_only=complete_samples_only)
+            cpds = set([mle.estimate_cpd(node) for node in model.nodes()])
+            self.assertSetEqual(set(mle.get_parameters()), cpds)
+
+            # counting in blocks of rows gives the same counts
+            with patch('pgmpy.estimators.base._COUNT_BLOCK_SIZE', 64):
+                self.assertSetEqual(set(mle.get_parameters()), cpds)
+
+            state_counts = mle.state_counts('D')
+            np.testing.assert_allclose(mle.estimate_cpd('D').values.reshape(3, -1),
+                                       state_counts / state_counts.sum())
+
+    def test_get_parameters_chunks(self):
+        model = BayesianModel([('A', 'C'), ('B', 'C'), ('C', 'D')])
+        data = pd.DataFrame(np.random.randint(0, 3, size=(500, 4)), columns=list('ABCD'))
+        data = data.astype(float)
+        data.loc[::7, 'B'] = np.NaN
+        state_names = {var: [0, 1, 2] for var in 'ABCD'}
+        for complete_samples_only in [True, False]:
+            cpds = set(MaximumLikelihoodEstimator(model, data, state_names=state_names,
+                                                  complete_samples_only=complete_samples_only).get_parameters())
+            chunks = (data.iloc[start:start + 64] for start in range(0, len(data), 64))
+            mle = MaximumLikelihoodEstimator(model, chunks, state_names=state_names,
+                                             complete_samples_only=complete_samples_only)
+            self.assertSetEqual(set(mle.get_parameters()), cpds)
+
+        # only the state counts of the families of the model are kept
+        self.assertRaises(ValueError, mle._joint_state_counts, ['C', 'A'])
+        self.assertRaises(ValueError, mle.state_counts, 'D', complete_samples_only=True)
+        self.assertRaises(ValueError, MaximumLikelihoodEstimator, model, iter([data]))
+
+    def test_get_parameters_file_and_array(self):
+        data = self.d1.iloc[[0, 1, 2, 2, 0]]
+        cpds = set(MaximumLikelihoodEstimator(self.m1, data).get_parameters())
+
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            data.to_csv(path, index=False)
+            mle = MaximumLikelihoodEstimator(self.m1, path, chunksize=2)
+            self.assertSetEqual(set(mle.get_parameters()), cpds)
+        finally:
+            os.remove(path)
+
+        mle = MaximumLikelihoodEstimator(self.m1, data.to_records(index=False), chunksize=2)
+        self.assertSetEqual(set(mle.get_parameters()), cpds)
+        mle = MaximumLikelihoodEstimator(self.m1, data[['A', 'B', 'C']].values, chunksize=2)
+        self.assertSetEqual(set(mle.get_parameters()), cpds)
+        self.assertEqual(mle.state_names, {'A': [0, 1], 'B': [0, 1], 'C': [0, 1]})
+
     def tearDown(self):
         del self.m1
         del self.d1
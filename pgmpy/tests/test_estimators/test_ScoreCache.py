@@ -1,7 +1,12 @@
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
 from mock import Mock, MagicMock, call
-from pgmpy.estimators.ScoreCache import LRUCache, ScoreCache
-from pgmpy.estimators import BicScore
+from pgmpy.estimators.ScoreCache import LRUCache, ScoreCache, ScoreStore
+from pgmpy.estimators import BicScore, BdeuScore, HillClimbSearch
+import numpy as np
 import pandas as pd
 
 
@@ -46,6 +51,34 @@ class TestScoreCache(unittest.TestCase):
         expected_function_calls = [call("key1"), call("key2"), call("key3"), call("key1")]
         function_mock.assert_has_calls(expected_function_calls, any_order=False)
 
+    def test_stats(self):
+        function_mock = Mock(side_effect=lambda key: {"key1": 1, "key2": 2, "key3": 3}[key])
+        cache = LRUCache(function_mock, max_size=2)
+
+        cache("key1")
+        cache("key2")
+        cache("key1")  # cached
+        cache("key3")  # kicks out 'key2'
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['size']), (1, 3, 1, 2))
+        self.assertEqual(stats['nbytes'], cache._element_size(cache.mapping[("key1",)]) +
+                         cache._element_size(cache.mapping[("key3",)]))
+
+    def test_max_bytes(self):
+        function_mock = Mock(side_effect=lambda key: key * 2)
+        cache = LRUCache(function_mock, max_size=100)
+        cache(1)
+        element_size = cache.nbytes
+
+        cache = LRUCache(function_mock, max_size=100, max_bytes=3 * element_size)
+        for key in range(10):
+            cache(key)
+        self.assertEqual(len(cache), 3)
+        self.assertLessEqual(cache.nbytes, 3 * element_size)
+        self.assertEqual(cache.evictions, 7)
+        self.assertIn((9,), cache)
+        self.assertNotIn((6,), cache)
+
     def test_score_cache_invalid_scorer(self):
         with self.assertRaises(AssertionError) as e:
             ScoreCache("invalid_scorer", None)
@@ -72,3 +105,87 @@ class TestScoreCache(unittest.TestCase):
 
         expected_function_calls = [call("key1", ["key2", "key3"]), call("key2", ["key3"])]
         base_scorer.local_score.assert_has_calls(expected_function_calls, any_order=False)
+
+    def test_score_cache_parent_order(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(100, 4)), columns=list('ABCD'))
+        scorer = BicScore(data)
+        cache = ScoreCache(scorer, data)
+
+        score = cache.local_score('A', ['D', 'B', 'C'])
+        self.assertAlmostEqual(score, scorer.local_score('A', ['B', 'C', 'D']))
+        self.assertEqual(cache.local_score('A', ('C', 'B', 'D')), score)
+        self.assertEqual(cache.local_score('A', set(['B', 'C', 'D'])), score)
+        np.testing.assert_array_equal(cache.local_scores('A', [['B', 'D', 'C'], [], ['C', 'B', 'D']]),
+                                      [score, scorer.local_score('A', []), score])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (4, 2, 2))
+
+    def test_estimate_stats(self):
+        data = pd.DataFrame(np.random.randint(0, 3, size=(100, 4)), columns=list('ABCD'))
+        data['E'] = data['A'] + data['B']
+        est = HillClimbSearch(data, scoring_method=ScoreCache(BicScore(data), data))
+        est.estimate()
+        stats = est.score_cache_stats
+        self.assertGreater(stats['hits'], 0)
+        self.assertEqual((stats['evictions'], stats['size']), (0, stats['misses']))
+
+        est = HillClimbSearch(data, scoring_method=ScoreCache(BicScore(data), data, max_size=5))
+        est.estimate()
+        stats = est.score_cache_stats
+        self.assertEqual((stats['evictions'], stats['size']), (stats['misses'] - 5, 5))
+        self.assertIsNone(HillClimbSearch(data).score_cache_stats)
+
+
+class TestScoreStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'scores.sqlite')
+        self.data = pd.DataFrame(np.random.randint(0, 3, size=(1000, 4)), columns=list('ABCD'))
+        self.data['E'] = self.data['A'] + self.data['B']
+
+    def test_scores_persist(self):
+        parents_list = [(), ('A',), ('A', 'B'), ('C', 'D')]
+        scorer = BdeuScore(self.data)
+        cache = ScoreCache(scorer, self.data, store=self.path)
+        scores = cache.local_scores('E', parents_list)
+        np.testing.assert_allclose(scores, scorer.local_scores('E', parents_list))
+        self.assertAlmostEqual(cache.local_score('E', ['D']), scorer.local_score('E', ['D']))
+        cache.store.close()
+
+        # a new cache on the same data reads all scores from the database file
+        base_scorer = BdeuScore(self.data)
+        base_scorer.local_score = Mock(side_effect=AssertionError)
+        base_scorer.local_scores = Mock(side_effect=AssertionError)
+        cache = ScoreCache(base_scorer, self.data, store=ScoreStore(self.path))
+        np.testing.assert_array_equal(cache.local_scores('E', parents_list), scores)
+        self.assertAlmostEqual(cache.local_score('E', ('D',)), scorer.local_score('E', ['D']))
+
+    def test_scores_kept_apart(self):
+        store = ScoreStore(self.path)
+        cache = ScoreCache(BdeuScore(self.data), self.data, store=store)
+        cache.local_score('E', ['A', 'B'])
+
+        for scorer, data in [(BdeuScore(self.data, equivalent_sample_size=5), self.data),
+                             (BicScore(self.data), self.data),
+                             (BdeuScore(self.data.iloc[:500]), self.data.iloc[:500])]:
+            self.assertEqual(ScoreCache(scorer, data, store=store).local_score('E', ['A', 'B']),
+                             scorer.local_score('E', ['A', 'B']))
+
+    def test_pickle(self):
+        store = ScoreStore(self.path)
+        store.put('context', 'A', {('B',): -1.5})
+        unpickled = pickle.loads(pickle.dumps(store))
+        self.assertEqual(unpickled.get('context', 'A', [('B',), ('C',)]), {('B',): -1.5})
+        unpickled.close()
+        store.close()
+
+    def test_estimate(self):
+        scorer = ScoreCache(BdeuScore(self.data), self.data, store=self.path)
+        model = HillClimbSearch(self.data, scoring_method=scorer).estimate()
+        scorer = ScoreCache(BdeuScore(self.data), self.data, store=self.path)
+        self.assertEqual(sorted(HillClimbSearch(self.data, scoring_method=scorer).estimate().edges()),
+                         sorted(model.edges()))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+import numpy.testing as np_test
+
+from pgmpy.inference import LikelihoodWeighting, VariableElimination
+from pgmpy.models import BayesianModel, MarkovModel
+from pgmpy.factors.discrete import TabularCPD
+
+
+class TestLikelihoodWeighting(unittest.TestCase):
+    def setUp(self):
+        self.bayesian_model = BayesianModel([('A', 'J'), ('R', 'J'), ('J', 'Q'),
+                                             ('J', 'L'), ('G', 'L')])
+        cpd_a = TabularCPD('A', 2, values=[[0.2], [0.8]])
+        cpd_r = TabularCPD('R', 2, values=[[0.4], [0.6]])
+        cpd_j = TabularCPD('J', 2, values=[[0.9, 0.6, 0.7, 0.1],
+                                           [0.1, 0.4, 0.3, 0.9]],
+                           evidence=['A', 'R'], evidence_card=[2, 2])
+        cpd_q = TabularCPD('Q', 2, values=[[0.9, 0.2], [0.1, 0.8]],
+                           evidence=['J'], evidence_card=[2])
+        cpd_l = TabularCPD('L', 2, values=[[0.9, 0.45, 0.8, 0.1],
+                                           [0.1, 0.55, 0.2, 0.9]],
+                           evidence=['J', 'G'], evidence_card=[2, 2])
+        cpd_g = TabularCPD('G', 2, values=[[0.6], [0.4]])
+        self.bayesian_model.add_cpds(cpd_a, cpd_g, cpd_j, cpd_l, cpd_q, cpd_r)
+        self.inference = LikelihoodWeighting(self.bayesian_model)
+        self.exact_inference = VariableElimination(self.bayesian_model)
+        np.random.seed(42)
+
+    def test_init(self):
+        self.assertRaises(TypeError, LikelihoodWeighting, MarkovModel())
+
+    def test_query_no_evidence(self):
+        query = self.inference.query(['J', 'G'], n_samples=5000)
+        exact = self.exact_inference.query(['J', 'G'])
+        for var in ['J', 'G']:
+            np_test.assert_almost_equal(query[var].values, exact[var].values, decimal=2)
+            self.assertEqual(query[var].variables, [var])
+        self.assertEqual(self.inference.num_samples, 5000)
+        # Without evidence all the weights are equal
+        self.assertAlmostEqual(self.inference.effective_sample_size, 5000)
+
+    def test_query_evidence(self):
+        evidence = {'Q': 1, 'L': 0}
+        for rao_blackwellize in [True, False]:
+            query = self.inference.query(['A', 'J', 'G'], evidence=evidence,
+                                         n_samples=20000, rao_blackwellize=rao_blackwellize)
+            exact = self.exact_inference.query(['A', 'J', 'G'], evidence=evidence)
+            for var in ['A', 'J', 'G']:
+                np_test.assert_almost_equal(query[var].values, exact[var].values, decimal=1)
+                np_test.assert_almost_equal(query[var].values.sum(), 1)
+                intervals = self.inference.confidence_intervals[var]
+                self.assertEqual(intervals.shape, (2, 2))
+                self.assertTrue(np.all(intervals[:, 0] <= query[var].values))
+                self.assertTrue(np.all(query[var].values <= intervals[:, 1]))
+            self.assertLess(self.inference.effective_sample_size, 20000)
+
+    def test_query_rao_blackwellized_variance(self):
+        evidence = {'Q': 1, 'L': 0}
+        self.inference.query(['J'], evidence=evidence, n_samples=5000, rao_blackwellize=False)
+        width_indicator = np.diff(self.inference.confidence_intervals['J']).sum()
+        self.inference.query(['J'], evidence=evidence, n_samples=5000, rao_blackwellize=True)
+        width_rao_blackwell = np.diff(self.inference.confidence_intervals['J']).sum()
+        self.assertLess(width_rao_blackwell, width_indicator)
+
+    def test_query_ess_target(self):
+        self.inference.query(['J'], evidence={'Q': 1}, n_samples=100000, ess_target=500, batch_size=100)
+        self.assertGreaterEqual(self.inference.effective_sample_size, 500)
+        self.assertLess(self.inference.num_samples, 100000)
+        self.assertEqual(self.inference.num_samples % 100, 0)
+
+        self.inference.query(['J'], evidence={'Q': 1}, n_samples=250, ess_target=10 ** 6, batch_size=100)
+        self.assertEqual(self.inference.num_samples, 250)
+
+    def test_query_errors(self):
+        self.assertRaises(ValueError, self.inference.query, ['J'], {'J': 0})
+        self.assertRaises(ValueError, self.inference.query, ['J'], None, 0)
+        self.assertRaises(ValueError, self.inference.query, ['J'], confidence=1)
+        self.assertRaises(TypeError, self.inference.query, 'J')
+
+    def test_query_impossible_evidence(self):
+        model = BayesianModel([('A', 'B')])
+        model.add_cpds(TabularCPD('A', 2, [[1.0], [0.0]]),
+                       TabularCPD('B', 2, [[1.0, 0.5], [0.0, 0.5]], ['A'], [2]))
+        inference = LikelihoodWeighting(model)
+        self.assertRaises(ValueError, inference.query, ['A'], {'B': 1}, 100)
+
+    def test_query_isolated_node(self):
+        model = BayesianModel()
+        model.add_node('a')
+        model.add_cpds(TabularCPD('a', 2, [[0.3], [0.7]]))
+        inference = LikelihoodWeighting(model)
+        np_test.assert_array_almost_equal(inference.query(['a'], n_samples=100)['a'].values, [0.3, 0.7])
+        self.assertAlmostEqual(inference.query(['a'], n_samples=100, rao_blackwellize=False)['a'].values.sum(), 1)
+
+    def tearDown(self):
+        del self.inference
+        del self.exact_inference
+        del self.bayesian_model
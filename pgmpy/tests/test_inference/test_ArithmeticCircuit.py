@@ -0,0 +1,103 @@
+import itertools
+import unittest
+
+import numpy as np
+import numpy.testing as np_test
+import pandas as pd
+
+from pgmpy.inference import ArithmeticCircuit, VariableElimination
+from pgmpy.models import BayesianModel, MarkovModel
+from pgmpy.factors.discrete import TabularCPD, DiscreteFactor
+
+
+class TestArithmeticCircuit(unittest.TestCase):
+    def setUp(self):
+        self.bayesian_model = BayesianModel([('A', 'J'), ('R', 'J'), ('J', 'Q'),
+                                             ('J', 'L'), ('G', 'L')])
+        cpd_a = TabularCPD('A', 2, values=[[0.2], [0.8]])
+        cpd_r = TabularCPD('R', 2, values=[[0.4], [0.6]])
+        cpd_j = TabularCPD('J', 2, values=[[0.9, 0.6, 0.7, 0.1],
+                                           [0.1, 0.4, 0.3, 0.9]],
+                           evidence=['A', 'R'], evidence_card=[2, 2])
+        cpd_q = TabularCPD('Q', 2, values=[[0.9, 0.2], [0.1, 0.8]],
+                           evidence=['J'], evidence_card=[2])
+        cpd_l = TabularCPD('L', 2, values=[[0.9, 0.45, 0.8, 0.1],
+                                           [0.1, 0.55, 0.2, 0.9]],
+                           evidence=['J', 'G'], evidence_card=[2, 2])
+        cpd_g = TabularCPD('G', 2, values=[[0.6], [0.4]])
+        self.bayesian_model.add_cpds(cpd_a, cpd_g, cpd_j, cpd_l, cpd_q, cpd_r)
+
+        self.markov_model = MarkovModel([('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd')])
+        random_state = np.random.RandomState(0)
+        self.markov_model.add_factors(DiscreteFactor(['a', 'b'], [2, 3], random_state.rand(6)),
+                                      DiscreteFactor(['c', 'b'], [2, 3], random_state.rand(6)),
+                                      DiscreteFactor(['a', 'c'], [2, 2], random_state.rand(4)),
+                                      DiscreteFactor(['c', 'd'], [2, 2], random_state.rand(4)))
+
+    def brute_force_map(self, evidence):
+        "Returns the most probable joint state of the variables not in `evidence` by enumeration."
+        free = [var for var in sorted(self.bayesian_model.nodes()) if var not in evidence]
+        best_probability, best_states = -1, None
+        for states in itertools.product(range(2), repeat=len(free)):
+            assignment = dict(zip(free, states))
+            assignment.update(evidence)
+            probability = np.prod([cpd.values[tuple(assignment[var] for var in cpd.variables)]
+                                   for cpd in self.bayesian_model.get_cpds()])
+            if probability > best_probability:
+                best_probability, best_states = probability, dict(zip(free, states))
+        return best_states
+
+    def test_query(self):
+        circuit = ArithmeticCircuit(self.bayesian_model)
+        inference = VariableElimination(self.bayesian_model)
+        for evidence in [None, {'Q': 1}, {'A': 0, 'L': 1}, {'J': 1, 'G': 0}]:
+            variables = [var for var in self.bayesian_model.nodes() if not evidence or var not in evidence]
+            result = circuit.query(variables, evidence=evidence)
+            expected = inference.query(variables, evidence=dict(evidence) if evidence else None)
+            for var in variables:
+                np_test.assert_array_almost_equal(result[var].values, expected[var].values)
+
+        circuit = ArithmeticCircuit(self.bayesian_model, elimination_order=['Q', 'L', 'J', 'G', 'R', 'A'])
+        np_test.assert_array_almost_equal(circuit.query(['A'], evidence={'Q': 0})['A'].values,
+                                          inference.query(['A'], evidence={'Q': 0})['A'].values)
+
+        self.assertRaises(ValueError, ArithmeticCircuit, self.bayesian_model, elimination_order=['A', 'J'])
+        self.assertRaises(ValueError, circuit.query, ['A'], evidence={'Z': 0})
+        self.assertRaises(ValueError, circuit.query, ['A'], evidence={'Q': 2})
+        self.assertRaises(TypeError, circuit.query, 'A')
+
+    def test_query_markov_model(self):
+        circuit = ArithmeticCircuit(self.markov_model)
+        inference = VariableElimination(self.markov_model)
+        result = circuit.query(['a', 'b', 'c'], evidence={'d': 1})
+        expected = inference.query(['a', 'b', 'c'], evidence={'d': 1})
+        for var in ['a', 'b', 'c']:
+            np_test.assert_array_almost_equal(result[var].values, expected[var].values)
+
+    def test_map_query(self):
+        circuit = ArithmeticCircuit(self.bayesian_model)
+        for evidence in [{}, {'Q': 1}, {'A': 0, 'L': 1}, {'J': 1, 'G': 0}]:
+            self.assertDictEqual(circuit.map_query(evidence=evidence), self.brute_force_map(evidence))
+        self.assertDictEqual(circuit.map_query(['A', 'R'], evidence={'Q': 1}),
+                             {var: state for var, state in self.brute_force_map({'Q': 1}).items() if var in 'AR'})
+
+        impossible = BayesianModel([('A', 'B')])
+        impossible.add_cpds(TabularCPD('A', 2, [[1.0], [0.0]]),
+                            TabularCPD('B', 2, [[1.0, 0.5], [0.0, 0.5]], evidence=['A'], evidence_card=[2]))
+        self.assertRaises(ValueError, ArithmeticCircuit(impossible).map_query, evidence={'B': 1})
+        self.assertRaises(ValueError, ArithmeticCircuit(impossible).query, ['A'], evidence={'B': 1})
+
+    def test_model_update(self):
+        data = pd.DataFrame(np.random.randint(0, 2, size=(500, 3)), columns=['A', 'B', 'C'])
+        model = BayesianModel([('A', 'B'), ('B', 'C')])
+        model.fit(data)
+        circuit = ArithmeticCircuit(model)
+        circuit.query(['A'], evidence={'C': 1})
+
+        model.update(pd.DataFrame(np.random.randint(0, 2, size=(300, 3)), columns=['A', 'B', 'C']))
+        np_test.assert_array_almost_equal(circuit.query(['A'], evidence={'C': 1})['A'].values,
+                                          VariableElimination(model).query(['A'], evidence={'C': 1})['A'].values)
+
+    def tearDown(self):
+        del self.bayesian_model
+        del self.markov_model
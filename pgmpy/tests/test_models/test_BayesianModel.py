@@ -10,6 +10,7 @@ import pgmpy.tests.help_functions as hf
 from pgmpy.factors.discrete import TabularCPD, JointProbabilityDistribution, DiscreteFactor
 from pgmpy.independencies import Independencies
 from pgmpy.estimators import BayesianEstimator, BaseEstimator, MaximumLikelihoodEstimator
+from pgmpy.inference import VariableElimination, BeliefPropagation
 
 
 class TestBaseModelCreation(unittest.TestCase):
@@ -446,6 +447,58 @@ class TestBayesianModelFitPredict(unittest.TestCase):
                                evidence=['A', 'B'], evidence_card=[2, 2])])
         self.assertSetEqual(cpds, set(self.model2.get_cpds()))
 
+    def test_fit_chunks(self):
+        chunks = [self.data2.iloc[:2], self.data2.iloc[2:]]
+        self.model2.fit(iter(chunks), state_names={'A': [0, 1], 'B': [0, 1], 'C': [0, 1]},
+                        complete_samples_only=False)
+        cpds = set([TabularCPD('A', 2, [[0.5], [0.5]]),
+                    TabularCPD('B', 2, [[2. / 3], [1. / 3]]),
+                    TabularCPD('C', 2, [[0, 0.5, 0.5, 0.5], [1, 0.5, 0.5, 0.5]],
+                               evidence=['A', 'B'], evidence_card=[2, 2])])
+        self.assertSetEqual(cpds, set(self.model2.get_cpds()))
+
+    def test_update(self):
+        data = pd.DataFrame(np.random.randint(low=0, high=2, size=(300, 5)), columns=['A', 'B', 'C', 'D', 'E'])
+        self.model_connected.fit(data[:100], estimator=BayesianEstimator, prior_type='BDeu')
+        cpd_b = self.model_connected.get_cpds('B')
+        self.model_connected.update(data[100:200])
+        self.model_connected.update(data[200:].values, chunksize=30)
+
+        model = BayesianModel(self.model_connected.edges())
+        model.add_nodes_from(self.model_connected.nodes())
+        model.fit(data, estimator=BayesianEstimator, prior_type='BDeu')
+        for node in model.nodes():
+            self.assertEqual(self.model_connected.get_cpds(node), model.get_cpds(node))
+        # CPDs are updated in place
+        self.assertIs(self.model_connected.get_cpds('B'), cpd_b)
+
+        self.assertRaises(ValueError, self.model_connected.update, data.replace(1, 2))
+        self.assertRaises(ValueError, self.model_connected.update, data, decay=0)
+        self.assertRaises(ValueError, self.model2.update, self.data1)
+        self.model_connected.add_edge('A', 'D')
+        self.assertRaises(ValueError, self.model_connected.update, data)
+
+    def test_update_decay(self):
+        self.model2.fit(self.data1)
+        self.model2.update(self.data1.iloc[[2, 2]], decay=0.5)
+        # the counts of A are 0.5 * [2, 1] + [0, 2] and the counts of B are 0.5 * [2, 1] + [2, 0]
+        cpds = set([TabularCPD('A', 2, [[2. / 7], [5. / 7]]),
+                    TabularCPD('B', 2, [[6. / 7], [1. / 7]]),
+                    TabularCPD('C', 2, [[0, 0, 1, 0.5], [1, 1, 0, 0.5]],
+                               evidence=['A', 'B'], evidence_card=[2, 2])])
+        self.assertSetEqual(cpds, set(self.model2.get_cpds()))
+
+    def test_update_inference(self):
+        self.model2.fit(self.data1)
+        variable_elimination = VariableElimination(self.model2)
+        belief_propagation = BeliefPropagation(self.model2)
+        for inference in [variable_elimination, belief_propagation]:
+            np_test.assert_array_almost_equal(inference.query(['A'], evidence={'C': 0})['A'].values, [0, 1])
+
+        self.model2.update(pd.DataFrame(data={'A': [0], 'B': [0], 'C': [0]}))
+        for inference in [variable_elimination, belief_propagation]:
+            np_test.assert_array_almost_equal(inference.query(['A'], evidence={'C': 0})['A'].values, [0.5625, 0.4375])
+
     def test_disconnected_fit(self):
         values = pd.DataFrame(np.random.randint(low=0, high=2, size=(1000, 5)),
                               columns=['A', 'B', 'C', 'D', 'E'])
@@ -4,7 +4,7 @@ import networkx as nx
 import pandas as pd
 import numpy as np
 
-from pgmpy.models import NaiveBayes
+from pgmpy.models import NaiveBayes, BayesianModel
 from pgmpy.independencies import Independencies
 from pgmpy.extern import six
 
@@ -190,6 +190,28 @@ class TestNaiveBayesFit(unittest.TestCase):
         self.assertRaises(ValueError, self.model1.fit, values2)
         self.assertRaises(ValueError, self.model2.fit, values2, 'A')
 
+    def test_predict(self):
+        values = pd.DataFrame(np.random.randint(low=0, high=3, size=(1000, 4)), columns=['A', 'B', 'C', 'D'])
+        self.model1.fit(values, 'A')
+        model = BayesianModel(self.model1.edges())
+        model.add_cpds(*self.model1.get_cpds())
+
+        test_values = values[:100].drop('A', axis=1)
+        np.testing.assert_allclose(self.model1.predict_probability(test_values).values,
+                                   model.predict_probability(test_values).values)
+        np.testing.assert_array_equal(self.model1.predict(test_values).values, model.predict(test_values).values)
+
+        # missing feature values are ignored
+        probabilities = self.model1.predict_probability(pd.DataFrame({'B': [0, 1], 'C': [np.NaN, 1], 'D': [2, 2]}))
+        np.testing.assert_allclose(probabilities.values[0],
+                                   model.predict_probability(pd.DataFrame({'B': [0], 'D': [2]}))[
+                                       ['A_0', 'A_1', 'A_2']].values[0])
+        self.assertListEqual(list(probabilities.columns), ['A_0', 'A_1', 'A_2'])
+
+        self.assertRaises(ValueError, self.model1.predict, pd.DataFrame({'B': [3], 'C': [0], 'D': [0]}))
+        # other missing variables are predicted by BayesianModel.predict
+        self.assertListEqual(sorted(self.model1.predict(values[:5].drop(['A', 'B'], axis=1)).columns), ['A', 'B'])
+
     def tearDown(self):
         del self.model1
         del self.model2
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import numpy.testing as np_test
+import pandas as pd
+
+from pgmpy.readwrite import BinaryReader, BinaryWriter
+from pgmpy.models import BayesianModel, MarkovModel
+from pgmpy.inference import BeliefPropagation
+
+
+class TestBinaryReaderWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'model.pgmb')
+        data = pd.DataFrame(data={'A': ['a0', 'a1', 'a1', 'a0', 'a1'], 'B': [0, 1, 1, 2, 0],
+                                  'C': [0, 0, 1, 1, 1], 'D': [1, 0, 1, 0, 0]})
+        self.model = BayesianModel([('A', 'C'), ('B', 'C'), ('C', 'D')])
+        self.model.name = 'test'
+        self.model.fit(data)
+
+    def test_write_read(self):
+        BinaryWriter(self.model).write_binary(self.path)
+        for mmap in [True, False]:
+            model = BinaryReader(self.path, mmap=mmap).get_model()
+            self.assertEqual(model.name, 'test')
+            self.assertSetEqual(set(model.nodes()), set(self.model.nodes()))
+            self.assertSetEqual(set(model.edges()), set(self.model.edges()))
+            for node in self.model.nodes():
+                cpd, expected = model.get_cpds(node), self.model.get_cpds(node)
+                self.assertEqual(cpd, expected)
+                self.assertListEqual(cpd.variables, expected.variables)
+                self.assertDictEqual(cpd.state_names, {var: expected.state_names[var] for var in cpd.variables})
+            self.assertTrue(model.check_model())
+
+        # the CPDs are views of the memory-mapped file, which is never modified
+        reader = BinaryReader(self.path)
+        model = reader.get_model()
+        self.assertTrue(all(np.may_share_memory(cpd.values, reader.blob) for cpd in model.get_cpds()))
+        model.get_cpds('A').values[...] = 0.5
+        np_test.assert_array_equal(BinaryReader(self.path).get_model().get_cpds('A').values,
+                                   self.model.get_cpds('A').values)
+
+    def test_beliefs(self):
+        belief_propagation = BeliefPropagation(self.model)
+        self.assertRaises(ValueError, BinaryWriter, self.model, belief_propagation)
+        belief_propagation.calibrate()
+        BinaryWriter(self.model, belief_propagation).write_binary(self.path)
+
+        reader = BinaryReader(self.path)
+        clique_beliefs, sepset_beliefs = reader.get_beliefs()
+        self.assertDictEqual(clique_beliefs, belief_propagation.get_clique_beliefs())
+        self.assertDictEqual(sepset_beliefs, belief_propagation.get_sepset_beliefs())
+        self.assertEqual(reader.get_model().get_cpds('D'), self.model.get_cpds('D'))
+
+        junction_tree = reader.get_junction_tree()
+        self.assertSetEqual(set(junction_tree.nodes()), set(clique_beliefs))
+        self.assertEqual(len(junction_tree.edges()), len(sepset_beliefs))
+
+        BinaryWriter(self.model).write_binary(self.path)
+        self.assertRaises(ValueError, BinaryReader(self.path).get_beliefs)
+
+    def test_errors(self):
+        self.assertRaises(TypeError, BinaryWriter, MarkovModel([('A', 'B')]))
+        self.assertRaises(ValueError, BinaryWriter, BayesianModel([('A', 'B')]))
+
+        with open(self.path, 'wb') as fout:
+            fout.write(b'network unknown {\n}\n')
+        self.assertRaises(ValueError, BinaryReader, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        del self.model
@@ -1,5 +1,8 @@
 import unittest
 
+import numpy as np
+import numpy.testing as np_test
+
 from mock import MagicMock, patch
 
 from pgmpy.factors.discrete import DiscreteFactor, TabularCPD, State
@@ -91,6 +94,19 @@ class TestBayesianModelSampling(unittest.TestCase):
         self.assertTrue(set(sample.Q).issubset({0, 1}))
         self.assertTrue(set(sample.G).issubset({0, 1}))
         self.assertTrue(set(sample.L).issubset({0, 1}))
+        self.assertEqual(set(sample.A), {0})
+        self.assertEqual(set(sample.J), {1})
+        self.assertEqual(set(sample.R), {0})
+        # The weight is P(A=0) * P(R=0) * P(J=1 | R=0, A=0)
+        np_test.assert_almost_equal(sample._weight.values, 0.2 * 0.4 * 0.1)
+
+    def test_likelihood_weighted_sample_no_evidence(self):
+        np.random.seed(0)
+        sample = self.sampling_inference.likelihood_weighted_sample(size=20000)
+        self.assertEquals(len(sample), 20000)
+        np_test.assert_array_equal(sample._weight.values, np.ones(20000))
+        # P(J=1) = 0.4 * 0.2 * 0.1 + 0.4 * 0.8 * 0.4 + 0.6 * 0.2 * 0.3 + 0.6 * 0.8 * 0.9
+        self.assertAlmostEqual(sample.J.mean(), 0.604, places=1)
 
     def tearDown(self):
         del self.sampling_inference
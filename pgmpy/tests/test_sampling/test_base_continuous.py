@@ -1,9 +1,11 @@
 import unittest
 
 import numpy as np
+from scipy.stats import multivariate_normal
 
-from pgmpy.factors.distributions import GaussianDistribution as JGD
-from pgmpy.sampling import LeapFrog, ModifiedEuler, GradLogPDFGaussian
+from pgmpy.factors.distributions import GaussianDistribution as JGD, CustomDistribution
+from pgmpy.factors.continuous import ContinuousFactor
+from pgmpy.sampling import LeapFrog, ModifiedEuler, GradLogPDFGaussian, GradLogPDFCustom
 
 
 class TestGradLogPDFGaussian(unittest.TestCase):
@@ -26,6 +28,69 @@ class TestGradLogPDFGaussian(unittest.TestCase):
         np.testing.assert_almost_equal(log, -3.21046521505)
 
 
+class TestGradLogPDFCustom(unittest.TestCase):
+
+    def setUp(self):
+        self.mean = np.array([1, 2, 3])
+        self.covariance = np.array([[1, 0.2, 0.4], [0.2, 2, 0.5], [0.4, 0.5, 3]])
+        self.pdf_calls = 0
+
+        def normal_pdf(x, y, z):
+            self.pdf_calls += 1
+            return multivariate_normal.pdf(np.stack(np.broadcast_arrays(x, y, z), axis=-1), self.mean,
+                                           self.covariance)
+
+        self.custom_model = CustomDistribution(['x', 'y', 'z'], normal_pdf)
+        self.factor_model = ContinuousFactor(['x', 'y', 'z'], lambda x, y, z: multivariate_normal.pdf(
+            (x, y, z), self.mean, self.covariance))
+        self.gaussian_model = JGD(['x', 'y', 'z'], self.mean, self.covariance)
+
+    def test_error(self):
+        with self.assertRaises(TypeError):
+            GradLogPDFCustom(1, self.custom_model)
+        with self.assertRaises(ValueError):
+            GradLogPDFCustom([1, 1], self.custom_model)
+
+    def test_gradient(self):
+        expected_grad, _ = GradLogPDFGaussian([0, 1, 0.5], self.gaussian_model).get_gradient_log_pdf()
+        expected_log = multivariate_normal.logpdf([0, 1, 0.5], self.mean, self.covariance)
+        for model in [self.custom_model, self.factor_model]:
+            grad, log = GradLogPDFCustom([0, 1, 0.5], model).get_gradient_log_pdf()
+            np.testing.assert_almost_equal(grad, expected_grad, decimal=6)
+            np.testing.assert_almost_equal(log, expected_log)
+
+    def test_batched_evaluation_and_cache(self):
+        GradLogPDFCustom([0.1, 0.2, 0.3], self.custom_model)
+        # One batched call and one call for checking that pdf works on arrays
+        self.assertEqual(self.pdf_calls, 2)
+        GradLogPDFCustom([0.4, 0.2, 0.3], self.custom_model)
+        self.assertEqual(self.pdf_calls, 3)
+        GradLogPDFCustom([0.1, 0.2, 0.3], self.custom_model)
+        self.assertEqual(self.pdf_calls, 3)
+
+        # Cache is dropped when the pdf of model changes
+        self.custom_model.pdf = lambda x, y, z: np.exp(-0.5 * (x ** 2 + y ** 2 + z ** 2))
+        grad, log = GradLogPDFCustom([0.1, 0.2, 0.3], self.custom_model).get_gradient_log_pdf()
+        np.testing.assert_almost_equal(grad, np.array([-0.1, -0.2, -0.3]))
+        np.testing.assert_almost_equal(log, -0.07)
+
+    def test_analytic_gradient(self):
+        class GradLogPDFNormal(GradLogPDFCustom):
+            @staticmethod
+            def gradient(x, y, z):
+                return np.array([-x, -y, -z])
+
+        grad, log = GradLogPDFNormal([1, 2, 3], self.custom_model).get_gradient_log_pdf()
+        np.testing.assert_array_equal(grad, np.array([-1, -2, -3]))
+        np.testing.assert_almost_equal(log, multivariate_normal.logpdf([1, 2, 3], self.mean, self.covariance))
+        self.assertEqual(self.pdf_calls, 1)
+
+    def tearDown(self):
+        del self.custom_model
+        del self.factor_model
+        del self.gaussian_model
+
+
 class TestLeapFrog(unittest.TestCase):
 
     def setUp(self):
@@ -73,6 +138,23 @@ class TestLeapFrog(unittest.TestCase):
         np.testing.assert_almost_equal(new_momentum, np.array([-1.42947981, -0.60709102, -1.21246612]))
         np.testing.assert_almost_equal(new_grad, np.array([-0.89536651, 0.98893516, -0.39566396]))
 
+    def test_leapfrog_mass_matrix(self):
+        expected_pos, expected_momentum, _ = self.test_with_grad_log.get_proposed_values()
+        for inverse_mass_matrix in [np.ones(3), np.eye(3)]:
+            new_pos, new_momentum, _ = LeapFrog(self.test_model, [0, 0, 0], [-1, -1, -1], 0.3, GradLogPDFGaussian,
+                                                inverse_mass_matrix=inverse_mass_matrix).get_proposed_values()
+            np.testing.assert_almost_equal(new_pos, expected_pos)
+            np.testing.assert_almost_equal(new_momentum, expected_momentum)
+
+        diagonal_pos, diagonal_momentum, _ = LeapFrog(self.test_model, [0, 0, 0], [-1, -1, -1], 0.3,
+                                                      GradLogPDFGaussian,
+                                                      inverse_mass_matrix=np.array([1, 2, 3])).get_proposed_values()
+        dense_pos, dense_momentum, _ = LeapFrog(self.test_model, [0, 0, 0], [-1, -1, -1], 0.3, GradLogPDFGaussian,
+                                                inverse_mass_matrix=np.diag([1, 2, 3])).get_proposed_values()
+        np.testing.assert_almost_equal(diagonal_pos, dense_pos)
+        np.testing.assert_almost_equal(diagonal_momentum, dense_momentum)
+        np.testing.assert_almost_equal(dense_pos, np.array([-0.35634146, -0.51219512, -0.99]))
+
     def tearDown(self):
         del self.test_model
         del self.test_with_grad_log
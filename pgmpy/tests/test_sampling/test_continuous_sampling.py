@@ -4,7 +4,7 @@ import numpy as np
 
 from pgmpy.factors.distributions import GaussianDistribution as JGD
 from pgmpy.sampling import (HamiltonianMC as HMC, HamiltonianMCDA as HMCda, GradLogPDFGaussian, NoUTurnSampler as NUTS,
-                            NoUTurnSamplerDA as NUTSda)
+                            NoUTurnSamplerDA as NUTSda, MultiChainSampler)
 
 
 class TestHMCInference(unittest.TestCase):
@@ -47,6 +47,32 @@ class TestHMCInference(unittest.TestCase):
         np.testing.assert_almost_equal(stepsize_bar, 3.6742481e-08)
         np.testing.assert_almost_equal(h_bar, 0.8875)
 
+    def test_mass_matrix_windows(self):
+        sampler = HMCda(model=self.test_model, grad_log_pdf=GradLogPDFGaussian, adapt_mass_matrix='diagonal')
+        self.assertEqual(sampler._mass_matrix_windows(1000),
+                         [(75, 100), (100, 150), (150, 250), (250, 450), (450, 950)])
+        self.assertEqual(sampler._mass_matrix_windows(100), [(15, 90)])
+        self.assertEqual(sampler._mass_matrix_windows(10), [])
+        self.assertEqual(self.hmc_sampler._mass_matrix_windows(1000), [])
+        with self.assertRaises(ValueError):
+            HMCda(model=self.test_model, grad_log_pdf=GradLogPDFGaussian, adapt_mass_matrix='full')
+
+    def test_update_inverse_mass_matrix(self):
+        np.random.seed(42)
+        positions = np.random.multivariate_normal(self.test_model.mean.flatten(), self.test_model.covariance, 1000)
+        for adapt_mass_matrix in ['diagonal', 'dense']:
+            sampler = HMCda(model=self.test_model, grad_log_pdf=GradLogPDFGaussian,
+                            adapt_mass_matrix=adapt_mass_matrix)
+            window_samples = []
+            updated = [sampler._update_inverse_mass_matrix(position, i, [(0, 1000)], window_samples)
+                       for i, position in enumerate(positions, 1)]
+            self.assertEqual(updated, [False] * 999 + [True])
+            self.assertEqual(window_samples, [])
+            expected = self.test_model.covariance
+            if adapt_mass_matrix == 'diagonal':
+                expected = np.diag(expected)
+            self.assertTrue(np.linalg.norm(sampler.inverse_mass_matrix - expected) < 0.3)
+
     def test_sample(self):
         # Seeding is done for _find_reasonable_stepsize method
         # Testing sample method simple HMC
@@ -120,6 +146,54 @@ class TestNUTSInference(unittest.TestCase):
         with self.assertRaises(ValueError):
             NUTSda(self.test_model, GradLogPDFGaussian).generate_sample(initial_pos=[1], num_samples=1,
                                                                         num_adapt=1).send(None)
+        with self.assertRaises(ValueError):
+            NUTS(self.test_model, GradLogPDFGaussian, max_tree_depth=0)
+        with self.assertRaises(ValueError):
+            NUTSda(self.test_model, GradLogPDFGaussian, max_tree_depth=2.5)
+
+    def test_sampling_mass_matrix(self):
+        mean = np.array([0, 0])
+        covariance = np.array([[100, 5], [5, 0.5]])
+        model = JGD(['x', 'y'], mean, covariance)
+        np.random.seed(31415)
+        sampler = NUTSda(model, GradLogPDFGaussian, adapt_mass_matrix='dense')
+        samples = sampler.sample(initial_pos=[1, 1], num_adapt=500, num_samples=3000, return_type='recarray')
+        sample_array = np.array([samples[var_name] for var_name in model.variables])[:, 500:]
+        self.assertTrue(np.linalg.norm(np.cov(sample_array) - covariance) < 15)
+        self.assertEqual(sampler.inverse_mass_matrix.shape, (2, 2))
+
+        np.random.seed(31415)
+        sampler = NUTSda(model, GradLogPDFGaussian, adapt_mass_matrix='diagonal')
+        samples = np.array(list(sampler.generate_sample(initial_pos=[1, 1], num_adapt=500, num_samples=3000)))
+        self.assertTrue(np.linalg.norm(np.cov(samples[500:].T) - covariance) < 15)
+        self.assertEqual(sampler.inverse_mass_matrix.shape, (2,))
+
+    def test_build_tree(self):
+        np.random.seed(42)
+        checkpoints = (np.empty((4, 3)), np.empty((4, 3)))
+        position = np.array([-1.0, 1.0, 0.0])
+        momentum = np.array([0.1, -0.1, 0.1])
+        grad_log, log_pdf = GradLogPDFGaussian(position, self.test_model).get_gradient_log_pdf()
+        hamiltonian0 = log_pdf - 0.5 * np.dot(momentum, momentum)
+        (_, _, _, position_bar, _, accept_set_bool, alpha,
+         n_alpha) = self.nuts_sampler._build_tree(position, momentum, grad_log, 1, 0, 0.1, hamiltonian0, checkpoints)
+        self.assertTrue(accept_set_bool)
+        self.assertEqual(n_alpha, 1)
+        self.assertTrue(0 < alpha <= 1)
+
+        # A large enough tree must stop at the first U-turn
+        (_, _, _, _, _, accept_set_bool, _,
+         n_alpha) = self.nuts_sampler._build_tree(position, momentum, grad_log, 1, 8, 0.1, hamiltonian0,
+                                                  (np.empty((8, 3)), np.empty((8, 3))))
+        self.assertFalse(accept_set_bool)
+        self.assertLess(n_alpha, 2 ** 8)
+
+    def test_max_tree_depth(self):
+        np.random.seed(1010101)
+        sampler = NUTSda(self.test_model, GradLogPDFGaussian, max_tree_depth=2)
+        _, _, n_alpha = sampler._sample(np.array([-0.4, 1, 3.6]), 0.01)
+        self.assertLessEqual(n_alpha, 2 ** 2 - 1)
+        self.assertEqual(NUTS(self.test_model, GradLogPDFGaussian, max_tree_depth=np.int64(5)).max_tree_depth, 5)
 
     def test_sampling(self):
         np.random.seed(1010101)
@@ -149,3 +223,63 @@ class TestNUTSInference(unittest.TestCase):
     def tearDown(self):
         del self.test_model
         del self.nuts_sampler
+
+
+class TestMultiChainSampler(unittest.TestCase):
+
+    def setUp(self):
+        mean = np.array([-1, 1])
+        covariance = np.array([[3, 0.4], [0.4, 2]])
+        self.test_model = JGD(['x', 'y'], mean, covariance)
+        self.nuts_sampler = NUTSda(self.test_model, GradLogPDFGaussian, adapt_mass_matrix='diagonal')
+
+    def test_errors(self):
+        with self.assertRaises(TypeError):
+            MultiChainSampler(self.test_model)
+        with self.assertRaises(ValueError):
+            MultiChainSampler(self.nuts_sampler, num_chains=0)
+        with self.assertRaises(ValueError):
+            MultiChainSampler(self.nuts_sampler, n_jobs=0)
+        with self.assertRaises(ValueError):
+            MultiChainSampler(self.nuts_sampler, num_chains=2).sample([[0, 0]], num_adapt=0, num_samples=1)
+        with self.assertRaises(ValueError):
+            MultiChainSampler(self.nuts_sampler, num_chains=2).sample([0, 0, 0], num_adapt=0, num_samples=1)
+
+    def test_initial_positions(self):
+        chains = MultiChainSampler(self.nuts_sampler, num_chains=np.int64(3), n_jobs=np.int64(1))
+        positions = chains._initial_positions([1, -1], np.random.RandomState(0), 2.0)
+        self.assertEqual(positions.shape, (3, 2))
+        self.assertTrue(np.all(np.abs(positions - np.array([1, -1])) <= 2.0))
+        self.assertEqual(len(set(map(tuple, positions))), 3)
+
+    def test_sample(self):
+        np.random.seed(0)
+        chains = MultiChainSampler(self.nuts_sampler, num_chains=3, n_jobs=3)
+        samples = chains.sample([0, 0], num_adapt=300, num_samples=1000, seed=42)
+        self.assertEqual(samples.shape, (3, 1000, 2))
+        self.assertTrue(np.linalg.norm(np.cov(samples.reshape(-1, 2).T) - self.test_model.covariance) < 0.5)
+        self.assertEqual(chains.inverse_mass_matrix.shape, (2,))
+        self.assertGreater(chains.stepsize, 0)
+
+        # Results don't depend on the number of worker processes or the global random state
+        np.random.seed(1)
+        serial_samples = MultiChainSampler(self.nuts_sampler, num_chains=3, n_jobs=1).sample([0, 0], num_adapt=300,
+                                                                                             num_samples=1000, seed=42)
+        np.testing.assert_array_almost_equal(samples, serial_samples)
+
+    def test_generate_sample(self):
+        chains = MultiChainSampler(HMC(self.test_model, GradLogPDFGaussian), num_chains=2, n_jobs=1)
+        blocks = list(chains.generate_sample([[0, 0], [1, 1]], num_adapt=0, num_samples=250, stepsize=0.3,
+                                             block_size=100, seed=1, trajectory_length=2))
+        self.assertEqual([chain for chain, _ in blocks], [0, 1, 0, 1, 0, 1])
+        self.assertEqual([len(block) for _, block in blocks], [100, 100, 100, 100, 50, 50])
+        self.assertAlmostEqual(chains.stepsize, 0.3)
+        self.assertIsNone(chains.inverse_mass_matrix)
+        samples = chains.sample([[0, 0], [1, 1]], num_adapt=0, num_samples=250, stepsize=0.3, seed=1,
+                                trajectory_length=2)
+        np.testing.assert_array_almost_equal(samples[0], np.concatenate([block for chain, block in blocks
+                                                                         if chain == 0]))
+
+    def tearDown(self):
+        del self.test_model
+        del self.nuts_sampler